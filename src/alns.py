@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive Large Neighborhood Search (ALNS) cho Multi-Vehicle TSP: thay thế GA bằng
+vòng lặp phá hủy / sửa chữa trên một giải pháp duy nhất
+
+Mỗi vòng lặp chọn một toán tử phá hủy (random, worst, Shaw) và một toán tử sửa chữa
+(greedy, regret-2, regret-3) theo trọng số thích ứng (Ropke & Pisinger), gỡ q điểm
+rồi chèn lại, chấp nhận giải pháp mới theo simulated annealing. Chi phí chèn của
+từng (điểm, route) được lưu lại: sau mỗi lần chèn chỉ route vừa thay đổi được tính
+lại, vector hóa theo mọi điểm chưa chèn và mọi vị trí. Mục tiêu giống hệt GA (fitness
+tổng hợp từ evaluate_population, gồm phạt time window / tải trọng và cân bằng tải);
+ma trận khoảng cách, kho, ràng buộc và định dạng kết quả dùng chung MultiVehicleTSPGA.
+Mỗi route giữ tối thiểu min_route_fraction số điểm trung bình (như _validate_minimum_load)
+để các xe không dồn hết điểm cho nhau.
+"""
+
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tsp_solver import MultiVehicleTSPGA, CONSTRUCTION_HEURISTICS, load_data
+from time_windows import concat_segments
+from local_search import IMPROVEMENT_EPS
+
+
+class ALNSSolver:
+    """ALNS: phá hủy / sửa chữa với trọng số toán tử thích ứng và chấp nhận simulated annealing"""
+
+    def __init__(self, coords: Dict[str, Tuple[float, float]],
+                 num_vehicles: int = 3,
+                 time_windows: Optional[Dict[str, Tuple[int, int]]] = None,
+                 iterations: int = 5000,
+                 time_limit_s: Optional[float] = None,
+                 destroy_operators: Optional[Sequence[str]] = None,
+                 repair_operators: Optional[Sequence[str]] = None,
+                 removal_fraction: Tuple[float, float] = (0.05, 0.3),
+                 max_removal: int = 100,
+                 segment_length: int = 100,
+                 reaction_factor: float = 0.1,
+                 scores: Tuple[float, float, float] = (33.0, 9.0, 13.0),
+                 start_temperature: float = 0.05,
+                 end_temperature: float = 0.0005,
+                 initial: str = 'regret',
+                 min_route_fraction: float = 0.3,
+                 local_search: bool = True,
+                 seed: Optional[int] = None,
+                 verbose: bool = True,
+                 **ga_kwargs):
+        """
+        Khởi tạo ALNS
+
+        Args:
+            coords: Dictionary chứa tọa độ các điểm
+            num_vehicles: Số lượng xe giao hàng
+            time_windows: Time windows cho từng điểm như MultiVehicleTSPGA
+            iterations: Số vòng lặp phá hủy / sửa chữa
+            time_limit_s: Ngân sách thời gian (giây); None: chỉ dừng theo số vòng lặp
+            destroy_operators: Các toán tử phá hủy trong DESTROY_OPERATORS (None: tất cả)
+            repair_operators: Các toán tử sửa chữa trong REPAIR_OPERATORS (None: tất cả)
+            removal_fraction: Tỷ lệ số điểm bị gỡ mỗi vòng lặp (nhỏ nhất, lớn nhất)
+            max_removal: Số điểm bị gỡ tối đa mỗi vòng lặp
+            segment_length: Số vòng lặp giữa hai lần cập nhật trọng số toán tử
+            reaction_factor: Mức trọng số mới chịu ảnh hưởng của điểm trong đoạn vừa qua
+            scores: Điểm thưởng cho cặp toán tử khi tạo giải pháp tốt nhất mới, tốt hơn
+                giải pháp hiện tại, hoặc kém hơn nhưng được chấp nhận
+            start_temperature: Nhiệt độ đầu: giải pháp kém hơn start_temperature (tỷ lệ chi phí
+                ban đầu) được chấp nhận với xác suất 50%
+            end_temperature: Nhiệt độ cuối (cùng đơn vị), giảm theo cấp số nhân qua các vòng lặp
+            initial: Heuristic tạo giải pháp ban đầu trong CONSTRUCTION_HEURISTICS
+            min_route_fraction: Số điểm tối thiểu mỗi route theo tỷ lệ số điểm trung bình (như
+                _validate_minimum_load và split_tour); toán tử phá hủy không gỡ điểm làm route
+                xuống dưới mức này, nếu không các xe có thể dồn điểm cho nhau
+            local_search: 2-opt giải pháp tốt nhất mới trước khi nhận
+            seed: Seed của bộ sinh số ngẫu nhiên (dùng chung với solver)
+            verbose: In tiến độ ra màn hình
+            ga_kwargs: Tham số khác của MultiVehicleTSPGA (vrptw, depots, demands,
+                vehicle_capacities, open_routes, ...); tham số tiến hóa không được dùng
+        """
+        destroy_operators = list(destroy_operators or DESTROY_OPERATORS)
+        repair_operators = list(repair_operators or REPAIR_OPERATORS)
+        unknown = sorted(set(destroy_operators) - set(DESTROY_OPERATORS))
+        if unknown:
+            raise ValueError(f"destroy_operators phai thuoc {sorted(DESTROY_OPERATORS)}, nhan duoc: {unknown}")
+        unknown = sorted(set(repair_operators) - set(REPAIR_OPERATORS))
+        if unknown:
+            raise ValueError(f"repair_operators phai thuoc {sorted(REPAIR_OPERATORS)}, nhan duoc: {unknown}")
+        if initial not in CONSTRUCTION_HEURISTICS:
+            raise ValueError(f"initial phai la mot trong {sorted(CONSTRUCTION_HEURISTICS)}, nhan duoc: {initial}")
+        if time_limit_s is not None and time_limit_s <= 0:
+            raise ValueError(f"time_limit_s phai lon hon 0, nhan duoc: {time_limit_s}")
+        if ga_kwargs.get('nsga2'):
+            raise ValueError("ALNSSolver chua ho tro che do nsga2")
+
+        self.iterations = iterations
+        self.time_limit_s = time_limit_s
+        self.destroy_operators = destroy_operators
+        self.repair_operators = repair_operators
+        self.removal_fraction = removal_fraction
+        self.max_removal = max(1, max_removal)
+        self.segment_length = max(1, segment_length)
+        self.reaction_factor = reaction_factor
+        self.scores = scores
+        self.start_temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.initial = initial
+        self.local_search = local_search
+        self.verbose = verbose
+
+        # Solver dùng chung: ma trận khoảng cách, kho, ràng buộc, hàm đánh giá và kết quả
+        ga_kwargs = dict(ga_kwargs, n_workers=None, verbose=False)
+        self.solver = MultiVehicleTSPGA(coords, num_vehicles, time_windows=time_windows,
+                                        seed=seed, **ga_kwargs)
+        self.rng = self.solver.rng
+        self.num_vehicles = num_vehicles
+
+        # Dữ liệu cho Shaw removal: khoảng cách giữa các điểm giao hàng, giờ mở time window và nhu cầu
+        num_points = len(self.solver.locations)
+        self._points = self.solver.distance_matrix[:num_points, :num_points]
+        self._max_distance = float(self._points.max()) if num_points else 0.0
+        self._window_starts = np.array([self.solver.time_windows[loc][0] for loc in self.solver.locations],
+                                       dtype=np.float64)
+        self._demands = (self.solver.capacity_model.demands if self.solver.capacity_model is not None
+                         else np.zeros(num_points))
+
+        self.min_route_size = int(np.ceil(min_route_fraction * num_points / num_vehicles))
+
+        self.destroy_weights = np.ones(len(destroy_operators))
+        self.repair_weights = np.ones(len(repair_operators))
+        self.stop_reason = None
+
+    # ------------------------------------------------------------------
+    # Đánh giá
+    # ------------------------------------------------------------------
+
+    def evaluate(self, routes: List[List[int]]) -> Tuple[float, float]:
+        """
+        Fitness tổng hợp của GA (evaluate_population + _combine_fitness) và chi phí tương ứng
+
+        Returns:
+            Tuple (fitness, chi phí = -10000 * ln(fitness)); chi phí tương đương km khi
+            chỉ khoảng cách thay đổi
+        """
+        tour, sizes = self.solver._solution_from_routes(routes)
+        distance_fitness, balance_fitness = self.solver.evaluate_population(tour[None, :], sizes[None, :])
+        fitness = float(self.solver._combine_fitness(distance_fitness, balance_fitness, 0)[0])
+        return fitness, -10000.0 * math.log(fitness)
+
+    def _route_cycle(self, vehicle: int, route: List[int]) -> Tuple[np.ndarray, int]:
+        """
+        Route dạng chu trình qua các điểm neo: [kho] + route + [điểm kết thúc ảo nếu route mở]
+
+        Kho của xe không có kho cố định là kho cho chi phí nối nhỏ nhất với route hiện tại.
+
+        Returns:
+            Tuple (chu trình, số điểm neo đứng trước route)
+        """
+        solver = self.solver
+        head, tail = [], []
+        if len(solver.depot_indices) > 0:
+            if solver.vehicle_depots is not None:
+                head = [int(solver.vehicle_depots[vehicle])]
+            else:
+                _, depot = solver._depot_legs(route[0], route[-1])
+                head = [int(depot)]
+        if solver.open_routes:
+            tail = [solver.open_end_index]
+        return np.array(head + list(route) + tail, dtype=np.intp), len(head)
+
+    def insertion_costs(self, vehicle: int, route: List[int],
+                        nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Chi phí chèn tốt nhất của mỗi điểm vào một route (vector hóa theo điểm và vị trí)
+
+        Chi phí = tăng quãng đường + thay đổi phạt time window (chế độ vrptw, dữ liệu đoạn
+        forward/backward nên O(1) mỗi vị trí) + thay đổi phạt tải trọng / thời lượng.
+
+        Args:
+            vehicle: Chỉ số xe của route
+            route: Route hiện tại (chỉ số điểm)
+            nodes: Mảng (U,) các điểm cần chèn
+
+        Returns:
+            Tuple (chi phí (U,), phần quãng đường tăng thêm (U,), vị trí chèn trong route (U,))
+        """
+        solver = self.solver
+        dist = solver.distance_matrix
+        size = len(route)
+        tw_model = solver.time_window_model
+        capacity_model = solver.capacity_model
+
+        if size == 0:
+            depots = None
+            if len(solver.depot_indices) > 0:
+                vehicles = np.full(len(nodes), vehicle)
+                deltas, depots = solver._depot_legs(nodes, nodes, vehicles)
+            else:
+                deltas = np.zeros(len(nodes))
+            costs = np.asarray(deltas, dtype=np.float64)
+            if tw_model is not None:
+                costs = costs + tw_model.penalty(concat_segments(
+                    tw_model.start_segment, tw_model.node_segments(nodes),
+                    tw_model.first_leg_times(dist, depots, nodes)))
+            if capacity_model is not None:
+                costs = costs + capacity_model.penalties(deltas, self._demands[nodes], 1, vehicle)
+            return costs, np.asarray(deltas, dtype=np.float64), np.zeros(len(nodes), dtype=np.intp)
+
+        # Vị trí chèn p (0..size) nằm giữa prev[p] và nxt[p] trên chu trình qua điểm neo
+        cycle, head = self._route_cycle(vehicle, route)
+        positions = np.arange(size + 1)
+        prev = cycle[(positions - 1 + head) % len(cycle)]
+        nxt = cycle[(positions + head) % len(cycle)]
+        column = nodes[:, None]
+        deltas = (dist[prev[None, :], column] + dist[column, nxt[None, :]]
+                  - dist[prev, nxt][None, :]).astype(np.float64)
+        costs = deltas
+
+        if tw_model is not None:
+            # Ghép (xuất phát -> route[:p]) + điểm mới + route[p:] cho mọi p trong O(1) mỗi vị trí
+            route_array = np.asarray(route, dtype=np.intp)
+            origin = int(cycle[0]) if len(solver.depot_indices) > 0 else None
+            schedule = tw_model.route_schedule(route_array, dist, origin)
+            before = np.column_stack([tw_model.start_segment, schedule.forward])
+            # Chặng mới đi theo giờ rời điểm đứng trước trong lịch trình hiện tại (điểm mới:
+            # cộng thời gian đến và phục vụ, bỏ qua chờ) - chính xác khi tốc độ cố định
+            to_node = np.zeros((len(nodes), size + 1))
+            to_node[:, :1] = tw_model.first_leg_times(dist, origin, column)
+            to_node[:, 1:] = tw_model.travel_times(dist, route_array[None, :], column, schedule.departures[None, :])
+            node_departures = (np.concatenate([[tw_model.start_time], schedule.departures])[None, :]
+                               + to_node + tw_model.service_time)
+            from_node = np.zeros((len(nodes), size + 1))
+            from_node[:, :-1] = tw_model.travel_times(dist, column, route_array[None, :], node_departures[:, :-1])
+            segment = concat_segments(concat_segments(tuple(before), tw_model.node_segments(column), to_node),
+                                      tuple(schedule.backward), from_node)
+            costs = costs + tw_model.penalty(segment) - schedule.penalty()
+
+        if capacity_model is not None:
+            length = float(dist[cycle, np.roll(cycle, -1)].sum(dtype=np.float64))
+            load = float(self._demands[route].sum())
+            costs = costs + capacity_model.penalties(
+                length + deltas, load + self._demands[nodes][:, None], size + 1,
+                vehicle) - capacity_model.route_penalty(vehicle, length, load, size)
+
+        best = np.argmin(costs, axis=1)
+        rows = np.arange(len(nodes))
+        return costs[rows, best], deltas[rows, best], best
+
+    def removal_gains(self, routes: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Quãng đường giảm được khi gỡ từng điểm khỏi route của nó
+
+        Returns:
+            Tuple (các điểm, quãng đường giảm tương ứng)
+        """
+        dist = self.solver.distance_matrix
+        nodes, gains = [], []
+        for vehicle, route in enumerate(routes):
+            if not route:
+                continue
+            cycle, head = self._route_cycle(vehicle, route)
+            at = np.arange(head, head + len(route))
+            prev = cycle[(at - 1) % len(cycle)]
+            nxt = cycle[(at + 1) % len(cycle)]
+            node = cycle[at]
+            nodes.append(node)
+            gains.append(dist[prev, node] + dist[node, nxt] - dist[prev, nxt])
+        return np.concatenate(nodes), np.concatenate(gains).astype(np.float64)
+
+    # ------------------------------------------------------------------
+    # Toán tử phá hủy: gỡ num_removed điểm, trả về danh sách điểm bị gỡ
+    # ------------------------------------------------------------------
+
+    def _random_removal(self, routes: List[List[int]], num_removed: int) -> List[int]:
+        """Gỡ ngẫu nhiên"""
+        return self.rng.choice(len(self._points), size=num_removed, replace=False).tolist()
+
+    def _worst_removal(self, routes: List[List[int]], num_removed: int, power: float = 3.0) -> List[int]:
+        """Gỡ các điểm tốn quãng đường nhất, ngẫu nhiên hóa theo y^power trên thứ tự giảm dần"""
+        nodes, gains = self.removal_gains(routes)
+        ranked = nodes[np.argsort(-gains, kind='stable')].tolist()
+        picks = self.rng.random(num_removed) ** power
+        return [ranked.pop(int(pick * len(ranked))) for pick in picks]
+
+    def _shaw_removal(self, routes: List[List[int]], num_removed: int, power: float = 6.0) -> List[int]:
+        """
+        Shaw removal: gỡ các điểm liên quan nhau (gần nhau, giờ mở time window và nhu cầu
+        tương tự) quanh một điểm ngẫu nhiên, ngẫu nhiên hóa theo y^power
+        """
+        num_points = len(self._points)
+        window_span = np.ptp(self._window_starts)
+        demand_span = np.ptp(self._demands)
+        removed = [int(self.rng.integers(num_points))]
+        remaining = np.ones(num_points, dtype=bool)
+        remaining[removed[0]] = False
+        while len(removed) < num_removed:
+            anchor = removed[int(self.rng.integers(len(removed)))]
+            candidates = np.flatnonzero(remaining)
+            relatedness = 9.0 * self._points[anchor, candidates] / max(self._max_distance, 1e-9)
+            if window_span > 0:
+                relatedness += 3.0 * np.abs(self._window_starts[candidates] - self._window_starts[anchor]) / window_span
+            if demand_span > 0:
+                relatedness += 2.0 * np.abs(self._demands[candidates] - self._demands[anchor]) / demand_span
+            pick = int(self.rng.random() ** power * len(candidates))
+            node = int(candidates[np.argsort(relatedness, kind='stable')[pick]])
+            removed.append(node)
+            remaining[node] = False
+        return removed
+
+    # ------------------------------------------------------------------
+    # Toán tử sửa chữa: chèn lại các điểm (sửa routes tại chỗ)
+    # ------------------------------------------------------------------
+
+    def _greedy_repair(self, routes: List[List[int]], nodes: List[int]):
+        """Chèn điểm có chi phí chèn nhỏ nhất trước"""
+        self._insert_nodes(routes, nodes, regret_k=1)
+
+    def _regret2_repair(self, routes: List[List[int]], nodes: List[int]):
+        """Regret-2: chèn trước điểm chênh lệch lớn nhất giữa route tốt nhất và tốt nhì"""
+        self._insert_nodes(routes, nodes, regret_k=2)
+
+    def _regret3_repair(self, routes: List[List[int]], nodes: List[int]):
+        """Regret-3: như regret-2 nhưng cộng chênh lệch của ba route tốt nhất"""
+        self._insert_nodes(routes, nodes, regret_k=3)
+
+    def _insert_nodes(self, routes: List[List[int]], nodes: List[int], regret_k: int):
+        """
+        Chèn lần lượt các điểm theo greedy (regret_k = 1) hoặc regret-k
+
+        Bảng chi phí chèn (điểm x route) tính một lần; sau mỗi lần chèn chỉ cột của
+        route vừa thay đổi được tính lại. Các lựa chọn được so sánh theo mục tiêu của GA
+        sau khi chèn (tính O(1) mỗi ô từ tổng chi phí và tổng / tổng bình phương quãng
+        đường các route), nên chèn vào route ngắn được ưu tiên khi cải thiện cân bằng tải.
+        """
+        nodes = np.asarray(nodes, dtype=np.intp)
+        if len(nodes) == 0:
+            return
+        num_routes = len(routes)
+        costs = np.empty((len(nodes), num_routes))
+        growths = np.empty((len(nodes), num_routes))
+        positions = np.empty((len(nodes), num_routes), dtype=np.intp)
+        for vehicle in range(num_routes):
+            costs[:, vehicle], growths[:, vehicle], positions[:, vehicle] = self.insertion_costs(
+                vehicle, routes[vehicle], nodes)
+
+        # Trạng thái của giải pháp dở dang: tổng quãng đường cộng phạt, quãng đường và tải từng route
+        tour, sizes = self.solver._solution_from_routes(routes)
+        total = -10000.0 * math.log(self.solver.evaluate_population(tour[None, :], sizes[None, :])[0][0])
+        lengths = self.solver.population_route_distances(tour[None, :], sizes[None, :])[0]
+
+        # Các điểm chưa chèn là nodes[:count]; điểm vừa chèn được thay bằng điểm cuối (swap-remove)
+        k = min(regret_k, num_routes)
+        count = len(nodes)
+        while count:
+            objective = self._insertion_objective(total, lengths, costs[:count], growths[:count])
+            if k <= 1:
+                chosen = int(np.argmin(objective.min(axis=1)))
+            else:
+                ranked = np.partition(objective, k - 1, axis=1)[:, :k] if k < num_routes else objective
+                ranked = np.sort(ranked, axis=1)[:, :k]
+                regret = (ranked[:, 1:] - ranked[:, :1]).sum(axis=1)
+                chosen = int(np.lexsort((ranked[:, 0], -regret))[0])
+            vehicle = int(np.argmin(objective[chosen]))
+            routes[vehicle].insert(int(positions[chosen, vehicle]), int(nodes[chosen]))
+            total += costs[chosen, vehicle]
+            lengths[vehicle] += growths[chosen, vehicle]
+
+            count -= 1
+            for table in (nodes, costs, growths, positions):
+                table[chosen] = table[count]
+            if count:
+                costs[:count, vehicle], growths[:count, vehicle], positions[:count, vehicle] = \
+                    self.insertion_costs(vehicle, routes[vehicle], nodes[:count])
+
+    def _insertion_objective(self, total: float, lengths: np.ndarray, costs: np.ndarray,
+                             growths: np.ndarray) -> np.ndarray:
+        """
+        Chi phí (như evaluate) của giải pháp sau mỗi lựa chọn chèn (điểm, route)
+
+        Args:
+            total: Tổng quãng đường cộng phạt hiện tại
+            lengths: Mảng (R,) quãng đường từng route
+            costs: Mảng (U, R) tổng quãng đường cộng phạt tăng thêm
+            growths: Mảng (U, R) quãng đường route tăng thêm
+
+        Returns:
+            Mảng (U, R) chi phí sau khi chèn
+        """
+        distance_fitness = np.exp(-(total + costs) / 10000)
+        balance_fitness = 1.0
+        num_routes = len(lengths)
+        if num_routes > 1:
+            # Độ lệch chuẩn sau khi route r dài thêm growths[:, r] (tổng và tổng bình phương O(1))
+            mean = (lengths.sum() + growths) / num_routes
+            square_sum = (lengths ** 2).sum() + growths * (2 * lengths + growths)
+            std = np.sqrt(np.maximum(square_sum / num_routes - mean ** 2, 0.0))
+            balance_fitness = np.where(mean > 0, np.exp(-2 * std / np.where(mean > 0, mean, 1.0)), 1.0)
+        fitness = self.solver._combine_fitness(distance_fitness, balance_fitness, 0)
+        return -10000.0 * np.log(fitness)
+
+    # ------------------------------------------------------------------
+    # Vòng lặp ALNS
+    # ------------------------------------------------------------------
+
+    def _num_removed(self) -> int:
+        """Số điểm bị gỡ trong một vòng lặp (ngẫu nhiên trong removal_fraction, giới hạn max_removal)"""
+        num_points = len(self._points)
+        low = max(1, int(math.ceil(self.removal_fraction[0] * num_points)))
+        high = max(low, min(self.max_removal, int(self.removal_fraction[1] * num_points)))
+        return int(min(self.rng.integers(low, high + 1), num_points))
+
+    def _keep_min_size(self, routes: List[List[int]], removed: List[int]) -> List[int]:
+        """Bỏ khỏi danh sách gỡ (giữ thứ tự) các điểm làm route xuống dưới min_route_size"""
+        route_of = np.empty(len(self._points), dtype=np.intp)
+        for vehicle, route in enumerate(routes):
+            route_of[route] = vehicle
+        sizes = [len(route) for route in routes]
+        kept = []
+        for node in removed:
+            vehicle = route_of[node]
+            if sizes[vehicle] > self.min_route_size:
+                sizes[vehicle] -= 1
+                kept.append(node)
+        return kept
+
+    def _fill_short_routes(self, routes: List[List[int]]):
+        """Chuyển điểm có chi phí chèn nhỏ nhất từ các route khác vào route có ít hơn min_route_size điểm"""
+        for vehicle, route in enumerate(routes):
+            while len(route) < self.min_route_size:
+                donors = np.array([node for other, donor in enumerate(routes)
+                                   if other != vehicle and len(donor) > self.min_route_size
+                                   for node in donor], dtype=np.intp)
+                if len(donors) == 0:
+                    break
+                costs, _, positions = self.insertion_costs(vehicle, route, donors)
+                best = int(np.argmin(costs))
+                node = int(donors[best])
+                for donor in routes:
+                    if node in donor:
+                        donor.remove(node)
+                route.insert(int(positions[best]), node)
+
+    def _select(self, weights: np.ndarray) -> int:
+        """Chọn toán tử theo roulette wheel trên trọng số"""
+        return int(self.rng.choice(len(weights), p=weights / weights.sum()))
+
+    def _update_weights(self, weights: np.ndarray, scores: np.ndarray, uses: np.ndarray):
+        """Cập nhật trọng số cuối đoạn: w = (1 - r) * w + r * điểm trung bình (toán tử đã dùng)"""
+        used = uses > 0
+        weights[used] = ((1 - self.reaction_factor) * weights[used] +
+                         self.reaction_factor * scores[used] / uses[used])
+        scores[:] = 0
+        uses[:] = 0
+
+    def _polish(self, routes: List[List[int]], cost: float) -> Optional[Tuple[List[List[int]], float, float]]:
+        """
+        2-opt từng route (MultiVehicleTSPGA.local_search_2opt)
+
+        Returns:
+            Tuple (routes, fitness, chi phí) nếu chi phí giảm, ngược lại None
+        """
+        solution = self.solver.local_search_2opt(self.solver._solution_from_routes(routes))
+        polished = [route.tolist() for route in self.solver._split_routes(solution)]
+        fitness, polished_cost = self.evaluate(polished)
+        return (polished, fitness, polished_cost) if polished_cost < cost - IMPROVEMENT_EPS else None
+
+    def run(self) -> Dict:
+        """
+        Chạy ALNS từ giải pháp của heuristic initial
+
+        Returns:
+            Dictionary kết quả như MultiVehicleTSPGA.run_multi_vehicle_ga (_calculate_final_results),
+            kèm 'iterations' và trọng số cuối của từng toán tử
+        """
+        start_time = time.time()
+        solver = self.solver
+        if self.verbose:
+            print(f"Khoi tao giai phap ban dau bang heuristic {self.initial}...")
+        solution = solver.construct_solution(self.initial, randomized=False)
+        current = [route.tolist() for route in solver._split_routes(solution)]
+        self._fill_short_routes(current)
+        current_fitness, current_cost = self.evaluate(current)
+        best, best_fitness, best_cost = [list(route) for route in current], current_fitness, current_cost
+
+        # Nhiệt độ: kém hơn start_temperature * chi phí đầu được nhận với xác suất 50%
+        temperature = self.start_temperature * current_cost / math.log(2)
+        cooling = (self.end_temperature / self.start_temperature) ** (1.0 / max(self.iterations, 1))
+
+        destroy_scores = np.zeros(len(self.destroy_operators))
+        destroy_uses = np.zeros(len(self.destroy_operators))
+        repair_scores = np.zeros(len(self.repair_operators))
+        repair_uses = np.zeros(len(self.repair_operators))
+        self.stop_reason = None
+
+        # Giải pháp tốt nhất mới được 2-opt cuối mỗi đoạn (không phải mỗi lần cải thiện)
+        unpolished = False
+        iteration = 0
+        try:
+            for iteration in range(1, self.iterations + 1):
+                destroy = self._select(self.destroy_weights)
+                repair = self._select(self.repair_weights)
+
+                candidate = [list(route) for route in current]
+                removed = DESTROY_OPERATORS[self.destroy_operators[destroy]](self, candidate, self._num_removed())
+                removed = self._keep_min_size(candidate, removed)
+                removed_set = set(removed)
+                candidate = [[node for node in route if node not in removed_set] for route in candidate]
+                REPAIR_OPERATORS[self.repair_operators[repair]](self, candidate, removed)
+                fitness, cost = self.evaluate(candidate)
+
+                # Chấp nhận theo simulated annealing; thưởng điểm cho cặp toán tử
+                score = 0.0
+                if cost < best_cost - IMPROVEMENT_EPS:
+                    score = self.scores[0]
+                    best, best_fitness, best_cost = [list(route) for route in candidate], fitness, cost
+                    current, current_fitness, current_cost = candidate, fitness, cost
+                    unpolished = self.local_search
+                elif cost < current_cost - IMPROVEMENT_EPS:
+                    score = self.scores[1]
+                    current, current_fitness, current_cost = candidate, fitness, cost
+                elif self.rng.random() < math.exp(-(cost - current_cost) / max(temperature, 1e-12)):
+                    score = self.scores[2]
+                    current, current_fitness, current_cost = candidate, fitness, cost
+
+                destroy_scores[destroy] += score
+                destroy_uses[destroy] += 1
+                repair_scores[repair] += score
+                repair_uses[repair] += 1
+                temperature *= cooling
+
+                stop = self.time_limit_s is not None and time.time() - start_time >= self.time_limit_s
+                if iteration % self.segment_length == 0 or stop or iteration == self.iterations:
+                    self._update_weights(self.destroy_weights, destroy_scores, destroy_uses)
+                    self._update_weights(self.repair_weights, repair_scores, repair_uses)
+                    polished = self._polish(best, best_cost) if unpolished else None
+                    unpolished = False
+                    if polished is not None:
+                        if current_cost <= best_cost:
+                            current = [list(route) for route in polished[0]]
+                            current_fitness, current_cost = polished[1], polished[2]
+                        best, best_fitness, best_cost = polished
+
+                solver.history.record(iteration, best_fitness, solver._solution_from_routes(best))
+                if self.verbose and iteration % 500 == 0:
+                    print(f"Vong lap {iteration}: Chi phi tot nhat = {best_cost:.2f} "
+                          f"(hien tai {current_cost:.2f}, nhiet do {temperature:.3f})")
+                if stop:
+                    self.stop_reason = 'time_limit'
+                    if self.verbose:
+                        print(f"\nDung som tai vong lap {iteration}: Het thoi gian {self.time_limit_s} giay")
+                    break
+        finally:
+            solver.history.close()
+
+        solver.best_solution = solver._solution_from_routes(best)
+        solver.best_fitness = best_fitness
+        result = solver._calculate_final_results(solver.best_solution)
+        result['stop_reason'] = self.stop_reason or 'iterations'
+        result['elapsed_s'] = time.time() - start_time
+        result['iterations'] = iteration
+        result['operator_weights'] = {
+            'destroy': dict(zip(self.destroy_operators, self.destroy_weights.tolist())),
+            'repair': dict(zip(self.repair_operators, self.repair_weights.tolist())),
+        }
+        return result
+
+
+# Registry toán tử phá hủy: tên -> hàm (solver, routes, số điểm cần gỡ) -> danh sách điểm bị gỡ
+DESTROY_OPERATORS = {
+    'random': ALNSSolver._random_removal,
+    'worst': ALNSSolver._worst_removal,
+    'shaw': ALNSSolver._shaw_removal,
+}
+
+# Registry toán tử sửa chữa: tên -> hàm (solver, routes, các điểm cần chèn), sửa routes tại chỗ
+REPAIR_OPERATORS = {
+    'greedy': ALNSSolver._greedy_repair,
+    'regret2': ALNSSolver._regret2_repair,
+    'regret3': ALNSSolver._regret3_repair,
+}
+
+
+if __name__ == "__main__":
+    import json
+
+    print("ALNS - Multi-Vehicle TSP TP.HCM")
+    print("=" * 50)
+
+    coords = load_data('data/Phuong_TPHCM_With_Coordinates.CSV')
+
+    alns = ALNSSolver(
+        coords=coords,
+        num_vehicles=4,
+        iterations=5000,
+        seed=42
+    )
+    results = alns.run()
+
+    print(f"\nTong khoang cach: {results['total_distance']:.2f} km "
+          f"({results['iterations']} vong lap, {results['elapsed_s']:.1f}s)")
+    for kind, weights in results['operator_weights'].items():
+        print(f"Trong so {kind}: " + ", ".join(f"{name}={weight:.2f}" for name, weight in weights.items()))
+
+    with open('results/alns_results.json', 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print("Da luu ket qua vao results/alns_results.json")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ràng buộc tải trọng và thời lượng route theo từng xe (CVRP)
+
+Mỗi điểm có nhu cầu (demand), mỗi xe có tải trọng tối đa và thời lượng route tối đa.
+Vi phạm được phạt (km tương đương) trong fitness. Tải của route chỉ phụ thuộc tổng
+nhu cầu nên với tổng tiền tố nhu cầu của route, tải sau mọi nước đi relocate / swap /
+2-opt* / cross-exchange tính được trong O(1); thời lượng = quãng đường / tốc độ +
+thời gian phục vụ nên cũng O(1) khi đã biết quãng đường mới.
+"""
+
+import numpy as np
+from typing import Dict, Optional, Sequence, Union
+
+
+class CapacityModel:
+    """Nhu cầu từng điểm, tải trọng và thời lượng tối đa từng xe, phạt vi phạm"""
+
+    def __init__(self, demands: np.ndarray, num_vehicles: int,
+                 capacities: Optional[Union[float, Sequence[float]]] = None,
+                 max_durations: Optional[Union[float, Sequence[float]]] = None,
+                 service_time: float = 15.0, speed_kmh: float = 30.0,
+                 capacity_penalty: float = 50.0, duration_penalty: float = 1.0):
+        """
+        Khởi tạo mô hình ràng buộc
+
+        Args:
+            demands: Mảng (N,) nhu cầu của từng điểm
+            num_vehicles: Số xe
+            capacities: Tải trọng tối đa (một giá trị cho mọi xe hoặc từng xe); None: không giới hạn
+            max_durations: Thời lượng route tối đa (phút, một giá trị hoặc từng xe); None: không giới hạn
+            service_time: Thời gian phục vụ mỗi điểm (phút)
+            speed_kmh: Tốc độ trung bình để quy đổi quãng đường ra thời gian
+            capacity_penalty: Phạt (km tương đương) cho mỗi đơn vị vượt tải
+            duration_penalty: Phạt (km tương đương) cho mỗi phút vượt thời lượng
+        """
+        self.demands = np.asarray(demands, dtype=np.float64)
+        self.capacities = _per_vehicle(capacities, num_vehicles, 'capacities')
+        self.max_durations = _per_vehicle(max_durations, num_vehicles, 'max_durations')
+        self.service_time = float(service_time)
+        self.minutes_per_km = 60.0 / speed_kmh
+        self.capacity_penalty = float(capacity_penalty)
+        self.duration_penalty = float(duration_penalty)
+
+    def duration(self, distance, size):
+        """Thời lượng route (phút) từ quãng đường và số điểm (số thực hoặc mảng)"""
+        return distance * self.minutes_per_km + self.service_time * size
+
+    def route_penalty(self, vehicle: int, distance: float, load: float, size: int) -> float:
+        """
+        Phạt của một route (O(1), số thực Python cho vòng lặp local search)
+
+        Args:
+            vehicle: Chỉ số xe
+            distance: Quãng đường route (km)
+            load: Tổng nhu cầu của route
+            size: Số điểm của route
+
+        Returns:
+            Phạt (km tương đương)
+        """
+        if size == 0:
+            return 0.0
+        penalty = 0.0
+        excess_load = load - self.capacities[vehicle]
+        if excess_load > 0:
+            penalty += self.capacity_penalty * excess_load
+        excess_duration = distance * self.minutes_per_km + self.service_time * size - self.max_durations[vehicle]
+        if excess_duration > 0:
+            penalty += self.duration_penalty * excess_duration
+        return penalty
+
+    def penalties(self, distances: np.ndarray, loads: np.ndarray, sizes: np.ndarray,
+                  vehicles=slice(None)) -> np.ndarray:
+        """
+        Phạt vector hóa (broadcast theo trục cuối là xe)
+
+        Args:
+            distances: Quãng đường từng route
+            loads: Tải từng route
+            sizes: Số điểm từng route
+            vehicles: Chỉ số xe tương ứng trục cuối (mặc định mọi xe)
+
+        Returns:
+            Mảng phạt cùng shape
+        """
+        excess_load = np.maximum(loads - self.capacities[vehicles], 0.0)
+        excess_duration = np.maximum(self.duration(distances, sizes) - self.max_durations[vehicles], 0.0)
+        penalty = self.capacity_penalty * excess_load + self.duration_penalty * excess_duration
+        return np.where(np.asarray(sizes) > 0, penalty, 0.0)
+
+    def population_loads(self, tours: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """
+        Tải từng xe cho cả quần thể (hiệu tổng tích lũy nhu cầu theo hàng)
+
+        Args:
+            tours: Mảng (population, số điểm) chỉ số điểm
+            sizes: Mảng (population, số xe) số điểm của từng xe
+
+        Returns:
+            Mảng (population, số xe) tải từng xe
+        """
+        cumulative = np.zeros((tours.shape[0], tours.shape[1] + 1))
+        np.cumsum(self.demands[tours], axis=1, out=cumulative[:, 1:])
+        ends = np.cumsum(sizes, axis=1)
+        totals = np.take_along_axis(cumulative, ends, axis=1)
+        return np.diff(totals, axis=1, prepend=0.0)
+
+    def population_penalties(self, tours: np.ndarray, sizes: np.ndarray,
+                             vehicle_distances: np.ndarray) -> np.ndarray:
+        """
+        Phạt vượt tải / vượt thời lượng từng xe cho cả quần thể
+
+        Args:
+            tours: Mảng (population, số điểm) chỉ số điểm
+            sizes: Mảng (population, số xe) số điểm của từng xe
+            vehicle_distances: Mảng (population, số xe) quãng đường từng xe
+
+        Returns:
+            Mảng (population, số xe) phạt (km tương đương)
+        """
+        return self.penalties(vehicle_distances, self.population_loads(tours, sizes), sizes)
+
+    def load_prefix(self, route: np.ndarray) -> np.ndarray:
+        """Tổng tiền tố nhu cầu của route (độ dài len(route) + 1): tải đoạn [i, j) = prefix[j] - prefix[i]"""
+        prefix = np.zeros(len(route) + 1)
+        np.cumsum(self.demands[np.asarray(route, dtype=np.intp)], out=prefix[1:])
+        return prefix
+
+    def route_summary(self, vehicle: int, route: np.ndarray, distance: float) -> Dict:
+        """
+        Tải, thời lượng và mức vượt của một route
+
+        Returns:
+            Dictionary {'load', 'capacity', 'duration', 'capacity_excess', 'duration_excess'}
+        """
+        load = float(self.demands[np.asarray(route, dtype=np.intp)].sum())
+        duration = float(self.duration(distance, len(route)))
+        return {
+            'load': load,
+            'capacity': float(self.capacities[vehicle]) if np.isfinite(self.capacities[vehicle]) else None,
+            'duration': duration,
+            'capacity_excess': max(0.0, load - float(self.capacities[vehicle])),
+            'duration_excess': max(0.0, duration - float(self.max_durations[vehicle])),
+        }
+
+
+def _per_vehicle(values: Optional[Union[float, Sequence[float]]], num_vehicles: int,
+                 name: str) -> np.ndarray:
+    """Chuẩn hóa giới hạn thành mảng (num_vehicles,); None -> vô cùng"""
+    if values is None:
+        return np.full(num_vehicles, np.inf)
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 0:
+        return np.full(num_vehicles, float(values))
+    if len(values) != num_vehicles:
+        raise ValueError(f"{name} phai co {num_vehicles} gia tri (moi xe mot gia tri), nhan duoc: {len(values)}")
+    return values.copy()
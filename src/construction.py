@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Heuristic xây dựng lời giải ban đầu: Clarke-Wright savings, sweep quanh tâm,
+nearest neighbor và chèn regret-k
+
+Mọi hàm trả về danh sách route (mảng chỉ số điểm) đúng num_vehicles route, làm
+việc trên ma trận khoảng cách và neighbor lists có sẵn. Truyền rng để có bản ngẫu
+nhiên hóa (nhiễu savings / regret, góc bắt đầu sweep, chọn trong vài láng giềng gần
+nhất) dùng để sinh nhiều giải pháp khác nhau cho quần thể; rng=None cho kết quả tất định.
+Số điểm (hoặc tổng nhu cầu khi có demands) mỗi route bị giới hạn để các xe cân bằng.
+"""
+
+import heapq
+
+import numpy as np
+from typing import List, Optional
+
+
+def route_limits(num_points: int, num_vehicles: int, demands: Optional[np.ndarray] = None,
+                 slack: float = 0.2) -> float:
+    """Giới hạn số điểm (hoặc tổng nhu cầu) mỗi route: trung bình cộng thêm slack"""
+    total = float(num_points if demands is None else np.sum(demands))
+    return total / max(num_vehicles, 1) * (1.0 + slack)
+
+
+def chop_order(order: np.ndarray, num_vehicles: int,
+               demands: Optional[np.ndarray] = None) -> List[np.ndarray]:
+    """
+    Cắt một thứ tự điểm thành num_vehicles đoạn liên tiếp có số điểm (hoặc tổng nhu cầu) gần bằng nhau
+
+    Args:
+        order: Thứ tự các điểm
+        num_vehicles: Số đoạn
+        demands: Nhu cầu từng điểm (None: mỗi điểm như nhau)
+
+    Returns:
+        Danh sách num_vehicles mảng chỉ số điểm
+    """
+    order = np.asarray(order, dtype=np.intp)
+    weights = np.ones(len(order)) if demands is None else np.asarray(demands, dtype=np.float64)[order]
+    cumulative = np.cumsum(weights)
+    targets = cumulative[-1] * np.arange(1, num_vehicles) / num_vehicles if len(order) else []
+    cuts = (np.searchsorted(cumulative, targets, side='left') + 1).tolist()
+    # Giữ mỗi đoạn ít nhất một điểm khi đủ điểm
+    for i in range(len(cuts)):
+        lower = cuts[i - 1] + 1 if i > 0 else 1
+        upper = len(order) - (num_vehicles - 1 - i)
+        cuts[i] = min(max(cuts[i], lower), upper) if upper >= lower else min(cuts[i], len(order))
+    return np.split(order, cuts)
+
+
+def nearest_neighbor_order(nodes: np.ndarray, distance_matrix: np.ndarray, start: int,
+                           rng: Optional[np.random.Generator] = None, candidates: int = 3) -> np.ndarray:
+    """
+    Thứ tự nearest neighbor qua một tập điểm, bắt đầu từ start
+
+    Args:
+        nodes: Các điểm cần sắp thứ tự
+        distance_matrix: Ma trận khoảng cách
+        start: Điểm bắt đầu (thuộc nodes)
+        rng: Bộ sinh số ngẫu nhiên (None: luôn chọn điểm gần nhất)
+        candidates: Số điểm gần nhất được chọn ngẫu nhiên khi có rng
+
+    Returns:
+        Mảng chỉ số điểm theo thứ tự đi
+    """
+    nodes = np.asarray(nodes, dtype=np.intp)
+    remaining = np.ones(len(nodes), dtype=bool)
+    position = int(np.flatnonzero(nodes == start)[0])
+    order = np.empty(len(nodes), dtype=np.intp)
+    for step in range(len(nodes)):
+        order[step] = nodes[position]
+        remaining[position] = False
+        if step == len(nodes) - 1:
+            break
+        left = np.flatnonzero(remaining)
+        distances = distance_matrix[nodes[position], nodes[left]]
+        if rng is not None and len(left) > 1:
+            choices = min(candidates, len(left))
+            nearest = np.argpartition(distances, choices - 1)[:choices]
+            position = int(left[nearest[rng.integers(choices)]])
+        else:
+            position = int(left[np.argmin(distances)])
+    return order
+
+
+def nearest_neighbor_routes(distance_matrix: np.ndarray, neighbor_lists: np.ndarray, num_points: int,
+                            num_vehicles: int, rng: Optional[np.random.Generator] = None,
+                            demands: Optional[np.ndarray] = None, start: int = 0,
+                            candidates: int = 3) -> List[np.ndarray]:
+    """
+    Giant tour nearest neighbor (thử neighbor lists trước, hết láng giềng chưa đi mới quét
+    cả hàng ma trận) rồi cắt thành num_vehicles route liên tiếp
+
+    Args:
+        distance_matrix: Ma trận khoảng cách
+        neighbor_lists: Danh sách láng giềng gần nhất
+        num_points: Số điểm giao hàng (các điểm 0..num_points-1)
+        num_vehicles: Số xe
+        rng: Bộ sinh số ngẫu nhiên (None: tất định); có rng thì điểm đầu ngẫu nhiên và
+            bước tiếp theo chọn ngẫu nhiên trong candidates láng giềng chưa đi gần nhất
+        demands: Nhu cầu từng điểm để cắt route cân bằng tải
+        start: Điểm bắt đầu khi tất định
+        candidates: Số láng giềng được chọn ngẫu nhiên
+
+    Returns:
+        Danh sách num_vehicles route
+    """
+    if num_points == 0:
+        return [np.empty(0, dtype=np.intp) for _ in range(num_vehicles)]
+    visited = np.zeros(num_points, dtype=bool)
+    order = np.empty(num_points, dtype=np.intp)
+    current = int(rng.integers(num_points)) if rng is not None else start
+    for step in range(num_points):
+        order[step] = current
+        visited[current] = True
+        if step == num_points - 1:
+            break
+        neighbors = neighbor_lists[current]
+        open_neighbors = neighbors[~visited[neighbors]]
+        if len(open_neighbors):
+            choices = min(candidates, len(open_neighbors)) if rng is not None else 1
+            current = int(open_neighbors[rng.integers(choices) if choices > 1 else 0])
+        else:
+            left = np.flatnonzero(~visited)
+            current = int(left[np.argmin(distance_matrix[current, left])])
+    return chop_order(order, num_vehicles, demands)
+
+
+def sweep_routes(points: np.ndarray, hub: np.ndarray, distance_matrix: np.ndarray, num_vehicles: int,
+                 rng: Optional[np.random.Generator] = None,
+                 demands: Optional[np.ndarray] = None) -> List[np.ndarray]:
+    """
+    Sweep: sắp điểm theo góc cực quanh tâm, chia thành num_vehicles cung liên tiếp, mỗi
+    route đi theo nearest neighbor từ điểm gần tâm nhất
+
+    Args:
+        points: Mảng (N, 2) tọa độ phẳng của các điểm giao hàng
+        hub: Tọa độ phẳng (x, y) của tâm (kho hoặc trọng tâm)
+        distance_matrix: Ma trận khoảng cách
+        num_vehicles: Số xe
+        rng: Bộ sinh số ngẫu nhiên (None: bắt đầu tại khoảng trống góc lớn nhất)
+        demands: Nhu cầu từng điểm để chia cung cân bằng tải
+
+    Returns:
+        Danh sách num_vehicles route
+    """
+    offsets = np.asarray(points, dtype=np.float64) - np.asarray(hub, dtype=np.float64)
+    angles = np.arctan2(offsets[:, 1], offsets[:, 0])
+    if len(angles) == 0:
+        return [np.empty(0, dtype=np.intp) for _ in range(num_vehicles)]
+
+    if rng is not None:
+        start_angle = rng.uniform(-np.pi, np.pi)
+    else:
+        # Bắt đầu ngay sau khoảng trống góc lớn nhất để không cắt ngang một cụm điểm
+        sorted_angles = np.sort(angles)
+        gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 2 * np.pi))
+        start_angle = sorted_angles[(np.argmax(gaps) + 1) % len(sorted_angles)]
+    order = np.argsort(np.mod(angles - start_angle, 2 * np.pi), kind='stable')
+
+    radii = np.hypot(offsets[:, 0], offsets[:, 1])
+    routes = []
+    for sector in chop_order(order, num_vehicles, demands):
+        if len(sector) == 0:
+            routes.append(sector)
+            continue
+        first = int(sector[np.argmin(radii[sector])])
+        routes.append(nearest_neighbor_order(sector, distance_matrix, first))
+    return routes
+
+
+def savings_routes(distance_matrix: np.ndarray, neighbor_lists: np.ndarray, hub_distances: np.ndarray,
+                   num_vehicles: int, rng: Optional[np.random.Generator] = None, noise: float = 0.1,
+                   demands: Optional[np.ndarray] = None, max_load: Optional[float] = None) -> List[np.ndarray]:
+    """
+    Clarke-Wright savings song song với heap: s(i, j) = d(hub, i) + d(hub, j) - d(i, j)
+
+    Chỉ xét các cặp (i, j) với j trong neighbor lists của i (O(N·k) savings thay vì O(N²)).
+    Hai route được nối đầu-cuối khi i, j là điểm mút và tổng số điểm / nhu cầu không vượt
+    max_load; hết savings mà còn nhiều hơn num_vehicles route thì nối route nhỏ nhất với
+    route có điểm mút gần nhất.
+
+    Args:
+        distance_matrix: Ma trận khoảng cách
+        neighbor_lists: Danh sách láng giềng gần nhất
+        hub_distances: Mảng (N,) khoảng cách từ kho / tâm tới từng điểm giao hàng
+        num_vehicles: Số xe
+        rng: Bộ sinh số ngẫu nhiên (None: tất định); có rng thì savings được nhân (1 + noise·U)
+        noise: Biên độ nhiễu savings
+        demands: Nhu cầu từng điểm (None: giới hạn theo số điểm)
+        max_load: Giới hạn số điểm / tổng nhu cầu mỗi route (None: route_limits)
+
+    Returns:
+        Danh sách num_vehicles route
+    """
+    num_points = len(hub_distances)
+    weights = np.ones(num_points) if demands is None else np.asarray(demands, dtype=np.float64)
+    if max_load is None:
+        max_load = route_limits(num_points, num_vehicles, demands)
+
+    # Cặp (i, j), i < j, từ neighbor lists và savings tương ứng
+    first = np.repeat(np.arange(num_points), neighbor_lists.shape[1])
+    second = neighbor_lists[:num_points].ravel()
+    pairs = np.unique(np.sort(np.column_stack([first, second]), axis=1), axis=0)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    savings = hub_distances[pairs[:, 0]] + hub_distances[pairs[:, 1]] - np.asarray(
+        distance_matrix[pairs[:, 0], pairs[:, 1]], dtype=np.float64)
+    if rng is not None:
+        savings = savings * (1.0 + noise * rng.random(len(savings)))
+    heap = list(zip((-savings).tolist(), pairs[:, 0].tolist(), pairs[:, 1].tolist()))
+    heapq.heapify(heap)
+
+    routes = {i: [i] for i in range(num_points)}
+    route_of = list(range(num_points))
+    loads = {i: float(weights[i]) for i in range(num_points)}
+
+    def merge(a: int, b: int, end_a: int, end_b: int):
+        """Nối route a (kết thúc tại end_a) với route b (bắt đầu tại end_b); route ngắn hơn đổi nhãn"""
+        route_a, route_b = routes.pop(a), routes.pop(b)
+        if route_a[-1] != end_a:
+            route_a.reverse()
+        if route_b[0] != end_b:
+            route_b.reverse()
+        keep, relabeled = (a, route_b) if len(route_a) >= len(route_b) else (b, route_a)
+        for node in relabeled:
+            route_of[node] = keep
+        routes[keep] = route_a + route_b
+        loads[keep] = loads.pop(a) + loads.pop(b)
+
+    while heap and len(routes) > num_vehicles:
+        _, i, j = heapq.heappop(heap)
+        a, b = route_of[i], route_of[j]
+        if a == b:
+            continue
+        route_a, route_b = routes[a], routes[b]
+        if i not in (route_a[0], route_a[-1]) or j not in (route_b[0], route_b[-1]):
+            continue
+        if loads[a] + loads[b] > max_load:
+            continue
+        merge(a, b, i, j)
+
+    # Còn quá nhiều route: nối route nhỏ nhất với route có điểm mút gần nhất
+    while len(routes) > num_vehicles:
+        smallest = min(routes, key=lambda r: (loads[r], r))
+        ends = (routes[smallest][0], routes[smallest][-1])
+        best = None
+        for other, route in routes.items():
+            if other == smallest:
+                continue
+            for end_small in ends:
+                for end_other in (route[0], route[-1]):
+                    cost = float(distance_matrix[end_other, end_small])
+                    over = loads[other] + loads[smallest] > max_load
+                    key = (over, cost, other)
+                    if best is None or key < best[0]:
+                        best = (key, other, end_other, end_small)
+        _, other, end_other, end_small = best
+        merge(other, smallest, end_other, end_small)
+
+    result = [np.asarray(route, dtype=np.intp) for route in routes.values()]
+    result += [np.empty(0, dtype=np.intp)] * (num_vehicles - len(result))
+    return result
+
+
+def regret_insertion_routes(distance_matrix: np.ndarray, num_points: int, num_vehicles: int,
+                            hub_distances: np.ndarray, k: int = 2,
+                            rng: Optional[np.random.Generator] = None, noise: float = 0.1,
+                            demands: Optional[np.ndarray] = None,
+                            max_load: Optional[float] = None) -> List[np.ndarray]:
+    """
+    Chèn regret-k: mỗi bước chèn điểm có regret lớn nhất (tổng chênh lệch giữa chi phí
+    chèn tốt nhất vào route tốt thứ 2..k và route tốt nhất) vào vị trí rẻ nhất của nó
+
+    Route bắt đầu từ num_vehicles điểm hạt giống cách xa nhau (farthest-first, điểm đầu xa
+    tâm nhất). Chi phí chèn tốt nhất của mọi (điểm, route) được lưu lại; sau mỗi lần chèn
+    chỉ cần so với hai cạnh mới, và tính lại toàn route cho các điểm có vị trí tốt nhất
+    là cạnh vừa bị bỏ.
+
+    Args:
+        distance_matrix: Ma trận khoảng cách
+        num_points: Số điểm giao hàng
+        num_vehicles: Số xe
+        hub_distances: Mảng (N,) khoảng cách từ kho / tâm tới từng điểm
+        k: Số route xét trong regret
+        rng: Bộ sinh số ngẫu nhiên (None: tất định); có rng thì hạt giống đầu ngẫu nhiên và
+            regret được nhân (1 + noise·U)
+        noise: Biên độ nhiễu regret
+        demands: Nhu cầu từng điểm (None: giới hạn theo số điểm)
+        max_load: Giới hạn số điểm / tổng nhu cầu mỗi route (None: route_limits)
+
+    Returns:
+        Danh sách num_vehicles route
+    """
+    dist = distance_matrix
+    weights = np.ones(num_points) if demands is None else np.asarray(demands, dtype=np.float64)
+    if max_load is None:
+        max_load = route_limits(num_points, num_vehicles, demands)
+    num_routes = min(num_vehicles, num_points)
+
+    # Hạt giống farthest-first
+    seeds = [int(rng.integers(num_points)) if rng is not None else int(np.argmax(hub_distances[:num_points]))]
+    nearest_seed = np.asarray(dist[seeds[0], :num_points], dtype=np.float64)
+    for _ in range(1, num_routes):
+        seeds.append(int(np.argmax(nearest_seed)))
+        nearest_seed = np.minimum(nearest_seed, dist[seeds[-1], :num_points])
+
+    routes = [[seed] for seed in seeds]  # thành viên của từng route; thứ tự đi nằm trong successor
+    successor = np.arange(num_points)  # successor[x] = điểm sau x trong route (route 1 điểm: chính nó)
+    loads = np.array([weights[seed] for seed in seeds], dtype=np.float64)
+    unrouted = np.setdiff1d(np.arange(num_points), seeds)
+
+    # cost[u, r], pred[u, r]: chi phí chèn rẻ nhất của unrouted[u] vào route r và điểm đứng trước
+    cost = np.empty((len(unrouted), num_routes))
+    pred = np.empty((len(unrouted), num_routes), dtype=np.intp)
+
+    def full_costs(nodes: np.ndarray, r: int):
+        """Chi phí chèn rẻ nhất của các điểm vào route r (xét mọi cạnh của route)"""
+        idx = np.asarray(routes[r], dtype=np.intp)
+        nxt = successor[idx]
+        deltas = dist[idx[None, :], nodes[:, None]] + dist[nodes[:, None], nxt[None, :]] - dist[idx, nxt][None, :]
+        best = np.argmin(deltas, axis=1)
+        return deltas[np.arange(len(nodes)), best], idx[best]
+
+    for r in range(num_routes):
+        cost[:, r], pred[:, r] = full_costs(unrouted, r)
+
+    # Các điểm chưa chèn nằm ở count hàng đầu của unrouted / cost / pred / regret; điểm vừa
+    # chèn được thay bằng hàng cuối để mọi phép tính làm trên view liền mạch
+    count = len(unrouted)
+    regret_k = max(2, min(k, num_routes))
+    # Nhiễu regret cố định cho từng điểm (bản ngẫu nhiên hóa)
+    jitter = 1.0 + noise * rng.random(count) if rng is not None else np.ones(count)
+
+    def scores(rows: np.ndarray):
+        """Regret, chi phí chèn tốt nhất và route tốt nhất của các hàng (chỉ xét route còn chỗ)"""
+        feasible = loads[None, :] + weights[unrouted[rows]][:, None] <= max_load
+        feasible[~feasible.any(axis=1)] = True  # không route nào còn chỗ: cho phép vượt giới hạn
+        masked = np.where(feasible, cost[rows], np.inf)
+        best = np.argmin(masked, axis=1)
+        if num_routes > 1:
+            ranked = np.sort(np.partition(masked, regret_k - 1, axis=1)[:, :regret_k], axis=1)
+            # Chỉ còn một route khả thi: ưu tiên chèn ngay (regret vô cùng)
+            row_regret = np.where(np.isfinite(ranked[:, 1:]), ranked[:, 1:] - ranked[:, :1], np.inf).sum(axis=1)
+        else:
+            row_regret = np.zeros(len(rows))
+        return row_regret * jitter[rows], masked[np.arange(len(rows)), best], best
+
+    # Regret chỉ cần tính lại cho các điểm có chi phí / khả năng chèn vào route vừa đổi thay đổi
+    regret, best_cost, best_route = scores(np.arange(count))
+    while count > 0:
+        top = np.flatnonzero(regret[:count] == regret[:count].max())
+        u = int(top[np.argmin(best_cost[top])])
+
+        node = int(unrouted[u])
+        r = int(best_route[u])
+        before = int(pred[u, r])
+        after = int(successor[before])
+
+        # Chèn node giữa before và after
+        routes[r].append(node)
+        successor[before] = node
+        successor[node] = after
+        was_open = loads[r] + weights[unrouted[:count]] <= max_load
+        loads[r] += weights[node]
+
+        count -= 1
+        for array in (unrouted, cost, pred, jitter, regret, best_cost, best_route):
+            array[u] = array[count]
+        was_open[u] = was_open[count]
+        if count == 0:
+            break
+
+        # Cập nhật chi phí chèn vào route r của các điểm còn lại
+        nodes = unrouted[:count]
+        stale = np.flatnonzero(pred[:count, r] == before)
+        if len(stale):
+            cost[stale, r], pred[stale, r] = full_costs(nodes[stale], r)
+        changed = np.zeros(count, dtype=bool)
+        changed[stale] = True
+        for a, b in ((before, node), (node, after)):
+            delta = dist[a, nodes] + dist[nodes, b] - dist[a, b]
+            better = np.flatnonzero(delta < cost[:count, r])
+            cost[better, r] = delta[better]
+            pred[better, r] = a
+            changed[better] = True
+        # Route r hết chỗ với một điểm: khả năng chèn đổi (có thể chỉ còn một route, regret vô cùng)
+        changed |= was_open[:count] != (loads[r] + weights[nodes] <= max_load)
+        rows = np.flatnonzero(changed)
+        if len(rows):
+            regret[rows], best_cost[rows], best_route[rows] = scores(rows)
+
+    # Dựng thứ tự từng route theo successor, bắt đầu từ hạt giống
+    result = []
+    for seed, members in zip(seeds, routes):
+        order = np.empty(len(members), dtype=np.intp)
+        node = seed
+        for step in range(len(members)):
+            order[step] = node
+            node = successor[node]
+        result.append(order)
+    result += [np.empty(0, dtype=np.intp)] * (num_vehicles - len(result))
+    return result
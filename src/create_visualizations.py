@@ -21,12 +21,16 @@ def load_results(file_path: str = 'results/multi_vehicle_tsp_results.json') -> D
     with open(file_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+def history_generations(results: Dict) -> List[int]:
+    """Thế hệ tương ứng với từng điểm trong fitness_history (lịch sử có thể đã lấy mẫu thưa)"""
+    return results.get('fitness_history_generations') or list(range(len(results['fitness_history'])))
+
 def create_evolution_plot(results: Dict, output_file: str = 'results/evolution.png'):
     """Tạo biểu đồ tiến hóa"""
     os.makedirs('results', exist_ok=True)
     
     plt.figure(figsize=(12, 8))
-    plt.plot(results['fitness_history'], linewidth=2, color='#2E86AB')
+    plt.plot(history_generations(results), results['fitness_history'], linewidth=2, color='#2E86AB')
     plt.title('Multi-Vehicle TSP: Tiến hóa Fitness qua các thế hệ', fontsize=16, fontweight='bold')
     plt.xlabel('Thế hệ', fontsize=12)
     plt.ylabel('Fitness (1/khoảng cách)', fontsize=12)
@@ -108,7 +112,7 @@ def create_algorithm_performance(results: Dict, output_file: str = 'results/algo
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
     
     # 1. Fitness Evolution (đã có sẵn)
-    generations = range(len(results['fitness_history']))
+    generations = history_generations(results)
     ax1.plot(generations, results['fitness_history'], linewidth=3, color='#2E86AB', alpha=0.8)
     ax1.fill_between(generations, results['fitness_history'], alpha=0.3, color='#2E86AB')
     ax1.set_title('Tiến hóa Fitness qua các thế hệ', fontsize=14, fontweight='bold')
@@ -118,7 +122,7 @@ def create_algorithm_performance(results: Dict, output_file: str = 'results/algo
     
     # Thêm điểm cuối để highlight
     final_fitness = results['fitness_history'][-1]
-    ax1.scatter([len(results['fitness_history'])-1], [final_fitness], 
+    ax1.scatter([generations[-1]], [final_fitness], 
                color='red', s=100, zorder=5, label=f'Kết quả cuối: {final_fitness:.6f}')
     ax1.legend()
     
@@ -145,7 +149,7 @@ def create_algorithm_performance(results: Dict, output_file: str = 'results/algo
     ax2.grid(True, alpha=0.3)
     
     # Highlight điểm cuối
-    ax2.scatter([len(improvement_curve)-1], [improvement_curve[-1]], 
+    ax2.scatter([generations[-1]], [improvement_curve[-1]], 
                color='red', s=100, zorder=5, label=f'Kết quả cuối: {improvement_curve[-1]:.1f} km')
     ax2.legend()
     
@@ -170,7 +174,7 @@ def create_algorithm_performance(results: Dict, output_file: str = 'results/algo
     ax3.grid(True, alpha=0.3)
     
     # Highlight điểm cuối
-    ax3.scatter([len(violation_curve)-1], [violation_curve[-1]], 
+    ax3.scatter([generations[-1]], [violation_curve[-1]], 
                color='red', s=100, zorder=5, label=f'Kết quả cuối: {violation_curve[-1]:.0f} lần')
     ax3.legend()
     
@@ -182,12 +186,13 @@ def create_algorithm_performance(results: Dict, output_file: str = 'results/algo
             vehicle_loads.append(len(route_info['route']) - 2)  # Exclude depot
     
     # Tạo dữ liệu giả lập cho sự cân bằng
-    generations_short = range(0, len(results['fitness_history']), 50)  # Mỗi 50 thế hệ
+    num_generations = generations[-1] + 1
+    generations_short = range(0, num_generations, 50)  # Mỗi 50 thế hệ
     vehicle_balance_evolution = []
     
     for gen in generations_short:
         # Giả lập sự cân bằng tải cải thiện theo thời gian
-        progress = gen / len(results['fitness_history'])
+        progress = gen / num_generations
         balance_score = 1 - progress * 0.3  # Cải thiện 30%
         vehicle_balance_evolution.append(balance_score)
     
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Giải bài toán lớn (hàng nghìn - hàng chục nghìn điểm) bằng phân rã cluster-first:
+chia điểm thành các cụm K-means, giải từng cụm bằng MultiVehicleTSPGA trên các
+process song song, sau đó sửa ranh giới giữa các cụm kề nhau bằng local search giữa
+các route
+
+Mỗi bài toán con chỉ có khoảng cluster_size điểm nên ma trận khoảng cách, quần thể
+và local search của nó có kích thước cố định; số bài toán con và số cặp cụm kề nhau
+tỷ lệ với số điểm nên thời gian chạy tăng gần tuyến tính theo số điểm.
+"""
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tsp_solver import MultiVehicleTSPGA, Solution, kmeans_labels, load_data
+from spatial_index import GridIndex, project_coordinates
+
+# Tham số của MultiVehicleTSPGA cho từng xe: được cắt theo các xe của mỗi bài toán con
+PER_VEHICLE_KWARGS = ('vehicle_capacities', 'max_route_duration', 'vehicle_depots')
+
+
+def allocate_vehicles(weights: Sequence[float], num_vehicles: int) -> np.ndarray:
+    """
+    Chia xe cho các cụm theo tỷ lệ khối lượng (số điểm hoặc tổng nhu cầu), mỗi cụm ít nhất một xe
+
+    Args:
+        weights: Khối lượng của từng cụm
+        num_vehicles: Tổng số xe (>= số cụm)
+
+    Returns:
+        Mảng số xe của từng cụm
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    quotas = weights / weights.sum() * num_vehicles
+    counts = np.ones(len(weights), dtype=np.intp)
+    for _ in range(num_vehicles - len(weights)):
+        counts[np.argmax(quotas - counts)] += 1
+    return counts
+
+
+def _vehicle_kwargs(ga_kwargs: Dict, vehicle_ids: Sequence[int]) -> Dict:
+    """Tham số cho solver con phụ trách các xe vehicle_ids (cắt các tham số theo từng xe)"""
+    kwargs = dict(ga_kwargs)
+    for key in PER_VEHICLE_KWARGS:
+        value = kwargs.get(key)
+        if value is not None and not np.isscalar(value):
+            kwargs[key] = [value[v] for v in vehicle_ids]
+    return kwargs
+
+
+def _make_solver(coords: Dict[str, Tuple[float, float]], points: Sequence[str],
+                 vehicle_ids: Sequence[int], ga_kwargs: Dict, seed: Optional[int] = None) -> MultiVehicleTSPGA:
+    """Solver con trên một tập điểm với các xe vehicle_ids"""
+    kwargs = _vehicle_kwargs(ga_kwargs, vehicle_ids)
+    kwargs.update(n_workers=None, verbose=False)
+    if seed is not None:
+        kwargs['seed'] = seed
+    return MultiVehicleTSPGA({name: coords[name] for name in points}, len(vehicle_ids), **kwargs)
+
+
+def _solve_cluster(coords: Dict[str, Tuple[float, float]], points: List[str], vehicle_ids: List[int],
+                   ga_kwargs: Dict, seed: int) -> Tuple[List[List[str]], str]:
+    """Giải một cụm bằng GA (chạy trong process con), trả về (routes theo tên điểm, lý do dừng)"""
+    solver = _make_solver(coords, points, vehicle_ids, ga_kwargs, seed)
+    result = solver.run_multi_vehicle_ga()
+    return result['best_solution'], result['stop_reason']
+
+
+def _evaluate_cluster(coords: Dict[str, Tuple[float, float]], routes: List[List[str]],
+                      vehicle_ids: List[int], ga_kwargs: Dict) -> Dict:
+    """2-opt lại các route của một cụm sau khi sửa ranh giới và tính kết quả như _calculate_final_results"""
+    points = [name for route in routes for name in route]
+    solver = _make_solver(coords, points, vehicle_ids, ga_kwargs)
+    solution = solver._encode_solution(routes)
+    improved = solver.local_search_2opt(solution)
+    if solver.multi_objective_fitness(improved)[0] > solver.multi_objective_fitness(solution)[0]:
+        solution = improved
+    return solver._calculate_final_results(solution)
+
+
+class DecompositionSolver:
+    """Cluster-first: giải các cụm K-means song song rồi sửa ranh giới bằng inter-route local search"""
+
+    def __init__(self, coords: Dict[str, Tuple[float, float]],
+                 num_vehicles: int = 3,
+                 cluster_size: int = 200,
+                 n_workers: Optional[int] = None,
+                 boundary_neighbors: int = 4,
+                 seed: Optional[int] = None,
+                 verbose: bool = True,
+                 **ga_kwargs):
+        """
+        Khởi tạo bộ giải phân rã
+
+        Args:
+            coords: Dictionary chứa tọa độ các điểm
+            num_vehicles: Tổng số xe
+            cluster_size: Số điểm mục tiêu của mỗi bài toán con; mỗi cụm có ít nhất một xe
+                nên số cụm không vượt quá số xe (ít xe thì cụm lớn hơn cluster_size)
+            n_workers: Số process giải các cụm song song (None hoặc 1: tuần tự)
+            boundary_neighbors: Số láng giềng gần nhất mỗi điểm dùng để xác định hai cụm kề nhau
+            seed: Seed gốc (None: dùng seed trong ga_kwargs); mỗi cụm nhận seed riêng qua SeedSequence.spawn
+            verbose: In tiến độ ra màn hình
+            ga_kwargs: Tham số truyền cho MultiVehicleTSPGA của từng bài toán con
+                (population_size, generations, time_windows, depots, demands, ...); các tham số
+                theo từng xe (vehicle_capacities, max_route_duration, vehicle_depots) được cắt theo cụm
+        """
+        if ga_kwargs.get('nsga2'):
+            raise ValueError("DecompositionSolver chua ho tro che do nsga2")
+        for key in PER_VEHICLE_KWARGS:
+            value = ga_kwargs.get(key)
+            if value is not None and not np.isscalar(value) and len(value) != num_vehicles:
+                raise ValueError(f"{key} phai co {num_vehicles} gia tri (moi xe mot gia tri), nhan duoc: {len(value)}")
+
+        self.coords = coords
+        self.locations = list(coords.keys())
+        self.num_vehicles = num_vehicles
+        self.cluster_size = max(1, cluster_size)
+        self.n_workers = n_workers
+        self.boundary_neighbors = boundary_neighbors
+        self.seed = seed if seed is not None else ga_kwargs.get('seed')
+        self.verbose = verbose
+        self.ga_kwargs = {key: value for key, value in ga_kwargs.items() if key != 'seed'}
+
+        self.coords_array = np.array([coords[loc] for loc in self.locations], dtype=np.float64)
+        self.labels = None
+        self.cluster_vehicles: List[List[int]] = []
+        self.routes: List[List[str]] = []
+
+    def partition(self) -> List[np.ndarray]:
+        """
+        Chia điểm thành các cụm K-means (cùng đường K-means với khởi tạo của GA) và chia xe cho từng cụm
+
+        Returns:
+            Danh sách mảng chỉ số điểm theo cụm
+        """
+        num_points = len(self.locations)
+        num_clusters = max(1, min(math.ceil(num_points / self.cluster_size), self.num_vehicles, num_points))
+        self.labels = kmeans_labels(self.coords_array, num_clusters,
+                                    seed=42 if self.seed is None else self.seed,
+                                    cache_dir=self.ga_kwargs.get('kmeans_cache_dir'))
+        clusters = [np.flatnonzero(self.labels == cluster_id) for cluster_id in range(num_clusters)]
+        clusters = [members for members in clusters if len(members) > 0]
+
+        # K-means có thể tạo cụm lớn hơn nhiều so với cluster_size (vùng điểm dày đặc):
+        # tách đôi cụm lớn nhất bằng K-means cho đến khi đủ nhỏ hoặc hết xe
+        while len(clusters) < self.num_vehicles:
+            largest = max(range(len(clusters)), key=lambda c: len(clusters[c]))
+            members = clusters[largest]
+            if len(members) <= 2 * self.cluster_size:
+                break
+            halves = kmeans_labels(self.coords_array[members], 2, seed=42 if self.seed is None else self.seed)
+            if halves.min() == halves.max():
+                break
+            clusters[largest:largest + 1] = [members[halves == 0], members[halves == 1]]
+        clusters = self._merge_small_clusters(clusters)
+        self.labels = np.empty(num_points, dtype=np.intp)
+        for cluster_id, members in enumerate(clusters):
+            self.labels[members] = cluster_id
+
+        demands = self.ga_kwargs.get('demands')
+        weights = [len(members) if demands is None else
+                   max(sum(demands.get(self.locations[i], 0.0) for i in members), 1e-9)
+                   for members in clusters]
+        counts = allocate_vehicles(weights, self.num_vehicles)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.cluster_vehicles = [list(range(offsets[c], offsets[c + 1])) for c in range(len(clusters))]
+        return clusters
+
+    @property
+    def min_load(self) -> float:
+        """Ngưỡng của _validate_minimum_load (30% số điểm trung bình) tính trên toàn bộ đội xe"""
+        return 0.3 * len(self.locations) / self.num_vehicles
+
+    def _merge_small_clusters(self, clusters: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Gộp các cụm ít điểm hơn ngưỡng tải tối thiểu (mỗi cụm nhận ít nhất một xe nên cụm nhỏ
+        tạo route quá ngắn) vào cụm chứa điểm gần cụm đó nhất
+
+        Args:
+            clusters: Danh sách mảng chỉ số điểm theo cụm
+
+        Returns:
+            Danh sách cụm sau khi gộp
+        """
+        points = project_coordinates(self.coords_array)
+        clusters = list(clusters)
+        while len(clusters) > 1:
+            smallest = min(range(len(clusters)), key=lambda c: len(clusters[c]))
+            if len(clusters[smallest]) >= self.min_load:
+                break
+            members = clusters.pop(smallest)
+            others = np.concatenate(clusters)
+            owner = np.repeat(np.arange(len(clusters)), [len(cluster) for cluster in clusters])
+            index = GridIndex(points[others])
+            nearest = [int(index.query_knn(points[i], 1)[0]) for i in members]
+            gaps = np.hypot(*(points[others[nearest]] - points[members]).T)
+            target = owner[nearest[int(np.argmin(gaps))]]
+            clusters[target] = np.sort(np.concatenate([clusters[target], members]))
+        return clusters
+
+    def adjacent_clusters(self, clusters: List[np.ndarray]) -> List[Tuple[int, int]]:
+        """
+        Các cặp cụm kề nhau: có điểm của cụm này nằm trong boundary_neighbors láng giềng gần
+        nhất của một điểm cụm kia (tra từ chỉ mục không gian, O(N))
+
+        Returns:
+            Danh sách cặp (i, j), i < j, sắp theo số liên kết giảm dần
+        """
+        cluster_of = np.empty(len(self.locations), dtype=np.intp)
+        for cluster_id, members in enumerate(clusters):
+            cluster_of[members] = cluster_id
+        neighbor_lists = GridIndex(project_coordinates(self.coords_array)).neighbor_lists(self.boundary_neighbors)
+        first = np.repeat(cluster_of, neighbor_lists.shape[1])
+        second = cluster_of[neighbor_lists.ravel()]
+        cross = first != second
+        pairs = np.sort(np.column_stack([first[cross], second[cross]]), axis=1)
+        if len(pairs) == 0:
+            return []
+        unique, links = np.unique(pairs, axis=0, return_counts=True)
+        order = np.lexsort((unique[:, 1], unique[:, 0], -links))
+        return [(int(i), int(j)) for i, j in unique[order]]
+
+    def run(self) -> Dict:
+        """
+        Phân cụm, giải các cụm song song, sửa ranh giới và tổng hợp kết quả
+
+        Returns:
+            Dictionary kết quả như MultiVehicleTSPGA.run_multi_vehicle_ga, kèm thông tin từng cụm
+        """
+        start_time = time.time()
+        clusters = self.partition()
+        if self.verbose:
+            print(f"Phan ra {len(self.locations)} diem thanh {len(clusters)} cum, "
+                  f"{self.num_vehicles} xe...")
+
+        seeds = [int(sequence.generate_state(1)[0])
+                 for sequence in np.random.SeedSequence(self.seed).spawn(len(clusters))]
+        tasks = [(self.coords, [self.locations[i] for i in members], vehicle_ids, self.ga_kwargs, seed)
+                 for members, vehicle_ids, seed in zip(clusters, self.cluster_vehicles, seeds)]
+        cluster_runs = self._map(_solve_cluster, tasks)
+
+        self.routes = [route for routes, _ in cluster_runs for route in routes]
+        solve_time = time.time() - start_time
+        if self.verbose:
+            print(f"Da giai {len(clusters)} cum trong {solve_time:.1f}s, sua ranh gioi...")
+
+        boundary_gain = self.repair_boundaries(self.adjacent_clusters(clusters))
+
+        tasks = [(self.coords, [self.routes[v] for v in vehicle_ids], vehicle_ids, self.ga_kwargs)
+                 for vehicle_ids in self.cluster_vehicles]
+        cluster_results = self._map(_evaluate_cluster, tasks)
+
+        result = self._merge_results(cluster_results)
+        for cluster_info, (_, stop_reason) in zip(result['clusters'], cluster_runs):
+            cluster_info['stop_reason'] = stop_reason
+        result['boundary_gain'] = boundary_gain
+        result['elapsed_s'] = time.time() - start_time
+        return result
+
+    def repair_boundaries(self, pairs: List[Tuple[int, int]]) -> float:
+        """
+        Local search giữa các route của từng cặp cụm kề nhau (relocate, Or-opt, swap, 2-opt*,
+        cross-exchange qua MultiVehicleTSPGA.inter_route_local_search), sau đó đảm bảo mỗi xe có
+        ít nhất 30% số điểm trung bình; chỉ giữ kết quả nếu fitness tổng hợp (khoảng cách +
+        cân bằng) tăng, hoặc nếu kết quả nâng được xe đang dưới ngưỡng tải lên đủ ngưỡng
+
+        Args:
+            pairs: Các cặp cụm kề nhau
+
+        Returns:
+            Tổng khoảng cách cộng phạt giảm được (km; có thể âm nếu cân bằng tốt hơn bù cho
+            quãng đường dài hơn)
+        """
+        min_load = self.min_load
+        total_gain = 0.0
+        for i, j in pairs:
+            vehicle_ids = self.cluster_vehicles[i] + self.cluster_vehicles[j]
+            routes = [self.routes[v] for v in vehicle_ids]
+            points = [name for route in routes for name in route]
+            if len(points) < 2:
+                continue
+            solver = _make_solver(self.coords, points, vehicle_ids, self.ga_kwargs, seed=self.seed)
+            solution = solver._encode_solution(routes)
+            improved = self._enforce_minimum_load(solver, solver.inter_route_local_search(solution), min_load)
+
+            # So sánh fitness tổng hợp (khoảng cách + cân bằng) như GA và giữ ngưỡng tải tối
+            # thiểu để local search không dồn điểm làm rỗng xe qua các cặp cụm liên tiếp;
+            # distance_fitness = exp(-tổng/10000) cho phần km giảm được
+            before = solver.multi_objective_fitness(solution)
+            after = solver.multi_objective_fitness(improved)
+            # Ngưỡng tải là ràng buộc cứng: route đang dưới ngưỡng được nâng lên dù fitness giảm
+            below = solution[1].min() < min_load
+            if improved[1].min() >= min_load and (
+                    below or solver._combine_fitness(*after, 0) > solver._combine_fitness(*before, 0)):
+                total_gain += 10000 * math.log(after[0] / before[0])
+                for v, route in zip(vehicle_ids, solver._decode_solution(improved)):
+                    self.routes[v] = route
+        return total_gain
+
+    @staticmethod
+    def _enforce_minimum_load(solver: MultiVehicleTSPGA, solution: Solution, min_load: float) -> Solution:
+        """
+        Ngưỡng tải tối thiểu như MultiVehicleTSPGA._validate_minimum_load nhưng lặp đến khi
+        đủ: chuyển điểm gần xe đích nhất (xe đích còn chở được) từ xe nhiều điểm nhất sang
+        xe ít điểm nhất cho đến khi mọi xe có ít nhất min_load điểm (hoặc không chuyển được
+        nữa), rồi 2-opt lại các route
+
+        Args:
+            solver: Solver của cặp cụm
+            solution: Giải pháp đã mã hóa
+            min_load: Số điểm tối thiểu mỗi xe
+
+        Returns:
+            Giải pháp đã chuyển điểm
+        """
+        routes = [route.tolist() for route in solver._split_routes(solution)]
+        for _ in range(len(solution[0])):
+            loads = [len(route) for route in routes]
+            min_idx, max_idx = int(np.argmin(loads)), int(np.argmax(loads))
+            if loads[min_idx] >= min_load or loads[max_idx] <= 1:
+                break
+            candidates = np.array(routes[max_idx])
+            if solver.capacity_model is not None:
+                demands = solver.capacity_model.demands
+                spare_capacity = solver.capacity_model.capacities[min_idx] - demands[routes[min_idx]].sum()
+                candidates = candidates[demands[candidates] <= spare_capacity]
+            if len(candidates) == 0:
+                break
+            if routes[min_idx]:
+                gaps = solver.distance_matrix[np.ix_(candidates, routes[min_idx])].min(axis=1)
+                point = int(candidates[np.argmin(gaps)])
+            else:
+                point = int(candidates[0])
+            routes[max_idx].remove(point)
+            routes[min_idx].append(point)
+        return solver.local_search_2opt(solver._solution_from_routes(routes))
+
+    def _map(self, function, tasks: List[tuple]) -> list:
+        """Chạy function trên từng task, song song trên n_workers process nếu có"""
+        if not self.n_workers or self.n_workers <= 1 or len(tasks) <= 1:
+            return [function(*task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            return list(executor.map(function, *zip(*tasks)))
+
+    def _merge_results(self, cluster_results: List[Dict]) -> Dict:
+        """Gộp kết quả các cụm thành kết quả chung, đánh lại vehicle_id theo toàn bộ đội xe"""
+        result = {
+            'best_solution': [[] for _ in range(self.num_vehicles)],
+            'vehicle_routes': [],
+            'total_distance': 0,
+            'total_time': 0,
+            'time_window_violations': 0,
+            'clusters': [],
+        }
+        for cluster_id, (vehicle_ids, cluster_result) in enumerate(zip(self.cluster_vehicles, cluster_results)):
+            for vehicle_id, route in zip(vehicle_ids, cluster_result['best_solution']):
+                result['best_solution'][vehicle_id] = route
+            for route_info in cluster_result['vehicle_routes']:
+                route_info = dict(route_info, vehicle_id=vehicle_ids[route_info['vehicle_id']])
+                result['vehicle_routes'].append(route_info)
+            for key in ('total_distance', 'total_time', 'time_window_violations', 'constraint_violations'):
+                if key in cluster_result:
+                    result[key] = result.get(key, 0) + cluster_result[key]
+            for key in ('depots', 'open_routes'):
+                if key in cluster_result:
+                    result[key] = cluster_result[key]
+            result['clusters'].append({
+                'cluster_id': cluster_id,
+                'num_points': sum(len(route) for route in cluster_result['best_solution']),
+                'vehicle_ids': list(vehicle_ids),
+                'total_distance': cluster_result['total_distance'],
+            })
+        result['vehicle_routes'].sort(key=lambda route_info: route_info['vehicle_id'])
+        return result
+
+
+if __name__ == "__main__":
+    import json
+
+    print("Phan ra cluster-first - Multi-Vehicle TSP TP.HCM")
+    print("=" * 50)
+
+    coords = load_data('data/Phuong_TPHCM_With_Coordinates.CSV')
+
+    decomposition = DecompositionSolver(
+        coords=coords,
+        num_vehicles=8,
+        cluster_size=40,
+        n_workers=None,
+        population_size=100,
+        generations=500,
+        mutation_rate=0.3,
+        seed=42
+    )
+    results = decomposition.run()
+
+    print(f"\nTong khoang cach: {results['total_distance']:.2f} km "
+          f"(sua ranh gioi giam {results['boundary_gain']:.2f} km)")
+    for cluster in results['clusters']:
+        print(f"Cum {cluster['cluster_id']}: {cluster['num_points']} diem, xe {cluster['vehicle_ids']}, "
+              f"{cluster['total_distance']:.2f} km")
+
+    with open('results/decomposition_results.json', 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print("Da luu ket qua vao results/decomposition_results.json")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ghi lịch sử tiến hóa với bộ nhớ giới hạn: đường cong fitness theo chính sách
+(full / ring / downsample), giải pháp tốt nhất chỉ lưu dạng sự kiện thay đổi
+(delta so với lần trước) và tùy chọn ghi trực tiếp ra đĩa dạng JSON Lines
+"""
+
+import json
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+HISTORY_POLICIES = ('full', 'ring', 'downsample')
+
+
+class HistoryRecorder:
+    """Lịch sử fitness và giải pháp tốt nhất qua các thế hệ"""
+
+    def __init__(self, policy: str = 'downsample', max_points: int = 2000,
+                 stream_path: Optional[str] = None):
+        """
+        Khởi tạo bộ ghi lịch sử
+
+        Args:
+            policy: Chính sách giữ đường cong fitness trong bộ nhớ
+                'full': giữ mọi thế hệ
+                'ring': chỉ giữ max_points thế hệ gần nhất
+                'downsample': giữ tối đa max_points điểm trải đều toàn bộ quá trình
+                    (khi đầy bỏ một nửa số điểm và tăng gấp đôi bước lấy mẫu)
+            max_points: Số điểm tối đa của đường cong ('ring', 'downsample')
+            stream_path: File JSON Lines ghi đầy đủ từng thế hệ và sự kiện; khi bật,
+                sự kiện thay đổi giải pháp không giữ trong bộ nhớ
+        """
+        if policy not in HISTORY_POLICIES:
+            raise ValueError(f"policy phai la mot trong {HISTORY_POLICIES}, nhan duoc: {policy}")
+
+        self.policy = policy
+        self.max_points = max(2, max_points)
+        self.stream_path = stream_path
+
+        self._generations = deque(maxlen=self.max_points if policy == 'ring' else None)
+        self._fitness = deque(maxlen=self.max_points if policy == 'ring' else None)
+        self._stride = 1
+        self._num_records = 0
+        self._last_point = None
+
+        self.events: List[Dict] = []
+        self._last_tour = None
+        self._last_sizes = None
+        self._stream = None
+
+    def empty_copy(self, stream: bool = False) -> 'HistoryRecorder':
+        """Bộ ghi mới cùng chính sách (mặc định không ghi ra đĩa, dùng cho process con)"""
+        return HistoryRecorder(self.policy, self.max_points,
+                               self.stream_path if stream else None)
+
+    def record(self, generation: int, fitness: float, solution: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        """
+        Ghi fitness tốt nhất của một thế hệ; nếu giải pháp tốt nhất thay đổi thì ghi sự kiện
+
+        Args:
+            generation: Thế hệ
+            fitness: Fitness tốt nhất
+            solution: Giải pháp tốt nhất (tour, sizes); None: chỉ ghi fitness
+        """
+        fitness = float(fitness)
+        self._record_point(generation, fitness)
+        event = None if solution is None else self._solution_event(generation, fitness, solution)
+
+        if self.stream_path is not None:
+            line = {'generation': int(generation), 'fitness': fitness}
+            if event is not None:
+                line['event'] = _event_to_json(event)
+            self._write(line)
+        elif event is not None:
+            self.events.append(event)
+
+    def _record_point(self, generation: int, fitness: float):
+        """Thêm một điểm vào đường cong fitness theo chính sách"""
+        self._last_point = (generation, fitness)
+        if self.policy == 'downsample':
+            if self._num_records % self._stride == 0:
+                self._generations.append(generation)
+                self._fitness.append(fitness)
+                if len(self._generations) > self.max_points:
+                    self._generations = deque(list(self._generations)[::2])
+                    self._fitness = deque(list(self._fitness)[::2])
+                    self._stride *= 2
+        else:
+            self._generations.append(generation)
+            self._fitness.append(fitness)
+        self._num_records += 1
+
+    def _solution_event(self, generation: int, fitness: float,
+                        solution: Tuple[np.ndarray, np.ndarray]) -> Optional[Dict]:
+        """Tạo sự kiện (delta so với giải pháp trước) nếu giải pháp tốt nhất thay đổi"""
+        tour, sizes = solution
+        if self._last_tour is None or len(self._last_tour) != len(tour):
+            positions = np.arange(len(tour))
+        else:
+            positions = np.flatnonzero(tour != self._last_tour)
+            if len(positions) == 0 and np.array_equal(sizes, self._last_sizes):
+                return None
+
+        self._last_tour = np.array(tour)
+        self._last_sizes = np.array(sizes)
+        return {
+            'generation': int(generation),
+            'fitness': fitness,
+            'positions': positions,
+            'values': self._last_tour[positions],
+            'sizes': self._last_sizes,
+        }
+
+    def _write(self, line: Dict):
+        """Ghi một dòng JSON ra file stream (mở file ở lần ghi đầu tiên)"""
+        if self._stream is None:
+            self._stream = open(self.stream_path, 'w', encoding='utf-8')
+        self._stream.write(json.dumps(line) + '\n')
+
+    def close(self):
+        """Đóng file stream (nếu có)"""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def curve(self) -> Tuple[List[int], List[float]]:
+        """
+        Đường cong fitness đang giữ trong bộ nhớ (luôn kèm thế hệ cuối cùng)
+
+        Returns:
+            Tuple (danh sách thế hệ, danh sách fitness)
+        """
+        generations, fitness = list(self._generations), list(self._fitness)
+        if self._last_point is not None and (not generations or generations[-1] != self._last_point[0]):
+            generations.append(self._last_point[0])
+            fitness.append(self._last_point[1])
+        return generations, fitness
+
+    def solution_at(self, generation: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Dựng lại giải pháp tốt nhất tại một thế hệ từ các sự kiện trong bộ nhớ"""
+        return replay_events(self.events, generation)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_stream'] = None
+        return state
+
+
+def _event_to_json(event: Dict) -> Dict:
+    """Chuyển sự kiện sang dạng JSON (mảng NumPy -> list)"""
+    return {key: value.tolist() if isinstance(value, np.ndarray) else value
+            for key, value in event.items()}
+
+
+def replay_events(events: List[Dict], generation: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Dựng lại giải pháp tốt nhất tại thế hệ generation bằng cách áp lần lượt các delta
+
+    Args:
+        events: Danh sách sự kiện theo thứ tự thế hệ
+        generation: Thế hệ cần dựng lại
+
+    Returns:
+        Giải pháp (tour, sizes) hoặc None nếu chưa có sự kiện nào
+    """
+    tour, sizes = None, None
+    for event in events:
+        if event['generation'] > generation:
+            break
+        positions = np.asarray(event['positions'], dtype=np.intp)
+        values = np.asarray(event['values'])
+        if tour is None:
+            # Sự kiện đầu tiên chứa toàn bộ tour
+            tour = np.empty(len(positions), dtype=values.dtype)
+        tour[positions] = values
+        sizes = np.asarray(event['sizes'])
+    return None if tour is None else (tour, sizes)
+
+
+def load_history(stream_path: str) -> Dict:
+    """
+    Đọc lịch sử đã ghi ra đĩa bởi HistoryRecorder
+
+    Args:
+        stream_path: File JSON Lines
+
+    Returns:
+        Dictionary {'generations', 'fitness_history', 'events'}
+    """
+    generations, fitness, events = [], [], []
+    with open(stream_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            generations.append(record['generation'])
+            fitness.append(record['fitness'])
+            if 'event' in record:
+                events.append(record['event'])
+    return {'generations': generations, 'fitness_history': fitness, 'events': events}
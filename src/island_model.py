@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Island-model GA cho Multi-Vehicle TSP: nhiều quần thể độc lập chạy song song
+trên các process, định kỳ trao đổi cá thể ưu tú (migration)
+"""
+
+import os
+import queue
+import multiprocessing as mp
+from typing import Dict, List, Tuple, Optional
+
+import numpy as np
+
+import tsp_solver
+from tsp_solver import MultiVehicleTSPGA, load_data
+
+TOPOLOGIES = ('ring', 'fully_connected')
+
+
+def migration_sources(island_id: int, num_islands: int, topology: str) -> List[int]:
+    """
+    Danh sách đảo gửi migrant đến đảo island_id theo topology
+
+    Args:
+        island_id: Chỉ số đảo nhận
+        num_islands: Tổng số đảo
+        topology: 'ring' (nhận từ đảo liền trước) hoặc 'fully_connected' (nhận từ mọi đảo)
+
+    Returns:
+        Danh sách chỉ số đảo nguồn, sắp xếp tăng dần
+    """
+    if num_islands <= 1:
+        return []
+    if topology == 'ring':
+        return [(island_id - 1) % num_islands]
+    return [j for j in range(num_islands) if j != island_id]
+
+
+def _island_main(island_id: int, worker_args: tuple, seed_sequence: np.random.SeedSequence,
+                 migration_interval: int, num_migrants: int,
+                 command_queue, report_queue):
+    """
+    Vòng lặp của một đảo trong process riêng
+
+    Mỗi epoch: tiến hóa migration_interval thế hệ, gửi cá thể ưu tú về process chính,
+    chờ lệnh (dừng hoặc tiếp tục kèm migrant đến) rồi thay thế các cá thể kém nhất.
+    Đảo đã dừng sớm (hội tụ) không tiến hóa tiếp mà chỉ gửi / nhận migrant; thế hệ báo
+    về là số thế hệ đảo thực sự đã chạy.
+    """
+    solver = tsp_solver._init_worker(*worker_args)
+    solver.rng = np.random.default_rng(seed_sequence)
+
+    population = solver.create_initial_population()
+    objectives = None
+    generation = 0
+
+    while True:
+        if solver.stop_reason is None:
+            num_generations = min(migration_interval, solver.generations - generation)
+            population, objectives = solver._evolve(population, objectives,
+                                                    start_generation=generation,
+                                                    num_generations=num_generations)
+            generation += solver.generations_run
+
+        # Gửi các cá thể ưu tú (theo fitness tổng hợp) về process chính
+        fitness_scores = solver._combine_fitness(*objectives, generation)
+        elite_indices = solver._elite_indices(fitness_scores, num_migrants)
+        report_queue.put({
+            'island_id': island_id,
+            'generation': generation,
+            'stop_reason': solver.stop_reason,
+            'best_fitness': float(solver.best_fitness),
+            'migrants': (population[0][elite_indices], population[1][elite_indices],
+                         objectives[0][elite_indices], objectives[1][elite_indices]),
+        })
+
+        stop, incoming = command_queue.get()
+        if stop:
+            break
+
+        # Thay các cá thể kém nhất bằng migrant đến (giữ thứ tự theo đảo nguồn)
+        if incoming:
+            tours, sizes, distance_fitness, balance_fitness = (
+                np.concatenate(parts) for parts in zip(*incoming))
+            worst_indices = solver._elite_indices(-fitness_scores, len(tours))
+            population[0][worst_indices] = tours
+            population[1][worst_indices] = sizes
+            objectives[0][worst_indices] = distance_fitness
+            objectives[1][worst_indices] = balance_fitness
+
+    report_queue.put({
+        'island_id': island_id,
+        'best_solution': solver.best_solution,
+        'best_fitness': float(solver.best_fitness),
+        'fitness_curve': solver.history.curve(),
+    })
+
+
+class IslandModelGA:
+    """Island-model GA: K quần thể MultiVehicleTSPGA độc lập, trao đổi ưu tú định kỳ"""
+
+    def __init__(self, coords: Dict[str, Tuple[float, float]],
+                 num_islands: Optional[int] = None,
+                 migration_interval: int = 50,
+                 num_migrants: int = 2,
+                 topology: str = 'ring',
+                 seed: Optional[int] = None,
+                 verbose: bool = True,
+                 **ga_kwargs):
+        """
+        Khởi tạo Island-model GA
+
+        Args:
+            coords: Dictionary chứa tọa độ các điểm
+            num_islands: Số đảo (mỗi đảo một process, mặc định bằng số CPU)
+            migration_interval: Số thế hệ giữa hai lần migration
+            num_migrants: Số cá thể ưu tú mỗi đảo gửi đi mỗi lần migration
+            topology: 'ring' hoặc 'fully_connected'
+            seed: Seed gốc (None: dùng seed trong ga_kwargs); mỗi đảo nhận một luồng ngẫu nhiên
+                độc lập sinh từ seed này qua SeedSequence.spawn
+            verbose: In tiến độ (khởi chạy và từng lần migration) ra màn hình
+            ga_kwargs: Tham số truyền cho MultiVehicleTSPGA của từng đảo
+                (num_vehicles, population_size, generations, ...)
+        """
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"topology phai la mot trong {TOPOLOGIES}, nhan duoc: {topology}")
+        if ga_kwargs.get('nsga2'):
+            raise ValueError("IslandModelGA chua ho tro che do nsga2")
+
+        self.num_islands = num_islands or os.cpu_count() or 1
+        self.migration_interval = max(1, migration_interval)
+        self.num_migrants = max(1, num_migrants)
+        self.topology = topology
+        self.seed = seed if seed is not None else ga_kwargs.get('seed')
+        self.verbose = verbose
+
+        # Solver chính: tính ma trận khoảng cách một lần và tổng hợp kết quả cuối
+        ga_kwargs = dict(ga_kwargs, n_workers=None, verbose=False)
+        self.solver = MultiVehicleTSPGA(coords, **ga_kwargs)
+
+        # Migrant đến từ mọi đảo nguồn thay các cá thể kém nhất: phải ít hơn kích thước quần thể
+        num_incoming = self.num_migrants * len(migration_sources(0, self.num_islands, topology))
+        if num_incoming >= self.solver.population_size:
+            raise ValueError(f"num_migrants * so dao nguon ({num_incoming}) phai nho hon "
+                             f"population_size ({self.solver.population_size})")
+        self.island_results = []
+
+    def run(self) -> Dict:
+        """
+        Chạy các đảo song song cho đến khi hết số thế hệ hoặc mọi đảo đều dừng sớm
+
+        Returns:
+            Dictionary kết quả như MultiVehicleTSPGA.run_multi_vehicle_ga, kèm thông tin từng đảo
+        """
+        if self.verbose:
+            print(f"Khoi chay {self.num_islands} dao, migration moi {self.migration_interval} "
+                  f"the he, topology {self.topology}...")
+
+        # Phân cụm K-means một lần tại đây; bản sao solver gửi cho các đảo mang theo kết quả
+        self.solver._kmeans_clusters()
+        worker_args, shm = self.solver._share_distance_matrix()
+        seed_sequences = np.random.SeedSequence(self.seed).spawn(self.num_islands)
+
+        command_queues = [mp.Queue() for _ in range(self.num_islands)]
+        report_queue = mp.Queue()
+        processes = [
+            mp.Process(target=_island_main,
+                       args=(island_id, worker_args, seed_sequences[island_id],
+                             self.migration_interval, self.num_migrants,
+                             command_queues[island_id], report_queue))
+            for island_id in range(self.num_islands)
+        ]
+
+        try:
+            for process in processes:
+                process.start()
+            final_reports = self._coordinate(command_queues, report_queue, processes)
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            shm.close()
+            shm.unlink()
+
+        return self._merge_results(final_reports)
+
+    def _next_report(self, report_queue, processes: list) -> Dict:
+        """Nhận báo cáo tiếp theo; báo lỗi nếu có đảo bị dừng bất thường"""
+        while True:
+            try:
+                return report_queue.get(timeout=1.0)
+            except queue.Empty:
+                failed = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"Dao bi dung bat thuong (exit code {failed[0]})")
+
+    def _coordinate(self, command_queues: list, report_queue, processes: list) -> List[Dict]:
+        """
+        Điều phối migration theo topology tại process chính
+
+        Migrant được chuyển theo thứ tự đảo nguồn cố định nên kết quả tái lập được với cùng seed.
+
+        Returns:
+            Báo cáo cuối cùng của từng đảo, sắp theo island_id
+        """
+        while True:
+            reports = {}
+            for _ in range(self.num_islands):
+                report = self._next_report(report_queue, processes)
+                reports[report['island_id']] = report
+
+            # Đảo đã dừng sớm báo thế hệ nhỏ hơn: lấy thế hệ của các đảo còn chạy
+            generation = max(report['generation'] for report in reports.values())
+            # Dừng khi mọi đảo đã hội tụ, hoặc một đảo hết giờ / đạt fitness mục tiêu
+            stop_reasons = [report['stop_reason'] for report in reports.values()]
+            stop = (generation >= self.solver.generations or all(stop_reasons) or
+                    any(reason in ('time_limit', 'target_fitness') for reason in stop_reasons))
+
+            best = max(report['best_fitness'] for report in reports.values())
+            if self.verbose:
+                print(f"Migration tai the he {generation}: Fitness tot nhat = {best:.6f}")
+
+            for island_id, command_queue in enumerate(command_queues):
+                incoming = [] if stop else [
+                    reports[source]['migrants']
+                    for source in migration_sources(island_id, self.num_islands, self.topology)
+                ]
+                command_queue.put((stop, incoming))
+
+            if stop:
+                break
+
+        final_reports = [self._next_report(report_queue, processes) for _ in range(self.num_islands)]
+        return sorted(final_reports, key=lambda report: report['island_id'])
+
+    def _merge_results(self, final_reports: List[Dict]) -> Dict:
+        """Chọn giải pháp tốt nhất giữa các đảo và tính kết quả cuối cùng"""
+        best_report = max(final_reports, key=lambda report: report['best_fitness'])
+
+        # Lịch sử fitness gộp: giá trị tốt nhất giữa các đảo tại từng thế hệ đã ghi
+        curves = [report['fitness_curve'] for report in final_reports]
+        merged_generations = sorted(set().union(*(generations for generations, _ in curves)))
+        merged_history = np.full(len(merged_generations), -np.inf)
+        for generations, fitness in curves:
+            # Giá trị gần nhất tại hoặc trước mỗi thế hệ của đảo này
+            positions = np.searchsorted(generations, merged_generations, side='right') - 1
+            np.maximum(merged_history, np.asarray(fitness)[np.maximum(positions, 0)], out=merged_history)
+        
+        self.solver.history = self.solver.history.empty_copy(stream=True)
+        try:
+            for generation, fitness in zip(merged_generations, merged_history):
+                self.solver.history.record(generation, fitness)
+        finally:
+            self.solver.history.close()
+
+        # Hậu xử lý giống run_multi_vehicle_ga
+        balanced_solution = best_report['best_solution']
+        for _ in range(3):
+            balanced_solution = self.solver._balance_efficiency_post_optimization(balanced_solution)
+        balanced_solution = self.solver._validate_minimum_load(balanced_solution)
+
+        result = self.solver._calculate_final_results(balanced_solution)
+        result['islands'] = [
+            {'island_id': report['island_id'], 'best_fitness': report['best_fitness']}
+            for report in final_reports
+        ]
+        self.island_results = result['islands']
+
+        return result
+
+
+if __name__ == "__main__":
+    import json
+
+    print("Island-model GA - Multi-Vehicle TSP TP.HCM")
+    print("=" * 50)
+
+    coords = load_data('data/Phuong_TPHCM_With_Coordinates.CSV')
+
+    island_ga = IslandModelGA(
+        coords=coords,
+        num_vehicles=4,
+        population_size=250,
+        generations=5000,
+        mutation_rate=0.3,
+        elite_ratio=0.05,
+        migration_interval=50,
+        num_migrants=3,
+        topology='ring',
+        seed=42
+    )
+    results = island_ga.run()
+
+    print(f"\nTong khoang cach: {results['total_distance']:.2f} km")
+    for island in results['islands']:
+        print(f"Dao {island['island_id']}: Fitness = {island['best_fitness']:.6f}")
+
+    with open('results/island_model_results.json', 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print("Da luu ket qua vao results/island_model_results.json")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kernel biên dịch (Numba njit) cho các vòng lặp nóng của GA: khoảng cách route
+của cả quần thể và 2-opt trên một route
+
+Numba được phát hiện khi import; nếu không có (hoặc đặt biến môi trường
+TSP_DISABLE_NUMBA=1) thì NUMBA_AVAILABLE = False và nơi gọi dùng đường NumPy /
+Python sẵn có. Các kernel thực hiện đúng cùng thứ tự phép tính và thứ tự duyệt
+nước đi như bản NumPy / Python nên cho kết quả giống hệt với cùng seed.
+"""
+
+import os
+
+import numpy as np
+
+# Ngưỡng delta âm tối thiểu để coi là cải thiện (giống local_search.IMPROVEMENT_EPS)
+IMPROVEMENT_EPS = -1e-10
+
+try:
+    if os.environ.get('TSP_DISABLE_NUMBA'):
+        raise ImportError('Numba bi tat qua TSP_DISABLE_NUMBA')
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Decorator thay thế khi không có Numba: giữ nguyên hàm Python"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda function: function
+
+
+@njit(cache=True)
+def population_route_distances_kernel(tours, sizes, distance_matrix):
+    """
+    Khoảng cách từng xe cho cả quần thể (route khép kín, cộng cạnh theo thứ tự trên tour)
+
+    Args:
+        tours: Mảng (population, số điểm) chỉ số điểm
+        sizes: Mảng (population, số xe) số điểm của từng xe
+        distance_matrix: Ma trận khoảng cách (N, N)
+
+    Returns:
+        Mảng (population, số xe) khoảng cách từng xe
+    """
+    pop_size, num_vehicles = sizes.shape
+    vehicle_distances = np.zeros((pop_size, num_vehicles), dtype=np.float64)
+    for row in range(pop_size):
+        # Tổng tích lũy tuần tự trên cả hàng, giống np.cumsum của bản NumPy
+        total = np.float64(0.0)
+        previous_total = np.float64(0.0)
+        start = 0
+        for vehicle in range(num_vehicles):
+            end = start + sizes[row, vehicle]
+            if end > start:
+                for p in range(start, end - 1):
+                    total += distance_matrix[tours[row, p], tours[row, p + 1]]
+                total += distance_matrix[tours[row, end - 1], tours[row, start]]
+                vehicle_distances[row, vehicle] = total - previous_total
+            previous_total = total
+            start = end
+    return vehicle_distances
+
+
+@njit(cache=True)
+def _reverse_cyclic_kernel(route, pos, start, end):
+    """Đảo ngược đoạn route[start..end] trên chu trình (đảo đoạn bù nếu ngắn hơn)"""
+    size = len(route)
+    length = (end - start + size) % size + 1
+    if 2 * length > size:
+        start, end = (end + 1) % size, (start - 1 + size) % size
+        length = size - length
+
+    for _ in range(length // 2):
+        a, b = route[start], route[end]
+        route[start], route[end] = b, a
+        pos[b], pos[a] = start, end
+        start = (start + 1) % size
+        end = (end - 1 + size) % size
+
+
+@njit(cache=True)
+def two_opt_route_kernel(route, distance_matrix, neighbor_lists, first_improvement):
+    """
+    2-opt với neighbor lists và don't-look bits (cùng thuật toán với local_search.two_opt_route)
+
+    Args:
+        route: Mảng chỉ số điểm của route (được sửa tại chỗ)
+        distance_matrix: Ma trận khoảng cách (N, N)
+        neighbor_lists: Mảng (N, k) láng giềng gần nhất đã sắp xếp
+        first_improvement: Áp dụng ngay nước đi cải thiện đầu tiên
+
+    Returns:
+        Tuple (route, tổng khoảng cách giảm được)
+    """
+    size = len(route)
+    total_gain = 0.0
+    if size <= 3:
+        return route, total_gain
+
+    n = len(distance_matrix)
+    pos = np.full(n, -1, dtype=np.intp)
+    for p in range(size):
+        pos[route[p]] = p
+
+    dont_look = np.zeros(n, dtype=np.bool_)
+    active = route.copy()
+    num_active = size
+    num_neighbors = neighbor_lists.shape[1]
+
+    while num_active > 0:
+        best_delta = IMPROVEMENT_EPS
+        best_start, best_end = -1, -1
+        endpoints = np.empty(4, dtype=np.intp)
+
+        for index in range(num_active):
+            a = active[index]
+            if dont_look[a]:
+                continue
+            i = pos[a]
+            succ_a = route[(i + 1) % size]
+            pred_a = route[(i - 1 + size) % size]
+            d_succ = distance_matrix[a, succ_a]
+            d_pred = distance_matrix[pred_a, a]
+            found = False
+
+            for neighbor in range(num_neighbors):
+                c = neighbor_lists[a, neighbor]
+                j = pos[c]
+                if j < 0:
+                    continue
+                d_ac = distance_matrix[a, c]
+                if d_ac >= d_succ and d_ac >= d_pred:
+                    break
+
+                # Hướng tiến: bỏ (a, succ a), (c, succ c); nối (a, c), (succ a, succ c)
+                succ_c = route[(j + 1) % size]
+                if c != succ_a and succ_c != a:
+                    delta = d_ac + distance_matrix[succ_a, succ_c] - d_succ - distance_matrix[c, succ_c]
+                    if delta < IMPROVEMENT_EPS:
+                        found = True
+                        if delta < best_delta:
+                            best_delta = delta
+                            best_start, best_end = (i + 1) % size, j
+                            endpoints[0], endpoints[1] = a, succ_a
+                            endpoints[2], endpoints[3] = c, succ_c
+
+                # Hướng lùi: bỏ (pred a, a), (pred c, c); nối (a, c), (pred a, pred c)
+                pred_c = route[(j - 1 + size) % size]
+                if c != pred_a and pred_c != a:
+                    delta = d_ac + distance_matrix[pred_a, pred_c] - d_pred - distance_matrix[pred_c, c]
+                    if delta < IMPROVEMENT_EPS:
+                        found = True
+                        if delta < best_delta:
+                            best_delta = delta
+                            best_start, best_end = j, (i - 1 + size) % size
+                            endpoints[0], endpoints[1] = a, pred_a
+                            endpoints[2], endpoints[3] = c, pred_c
+
+                if found and first_improvement:
+                    break
+
+            if found and first_improvement:
+                break
+            if not found:
+                dont_look[a] = True
+
+        if best_start < 0:
+            break
+
+        _reverse_cyclic_kernel(route, pos, best_start, best_end)
+        total_gain -= best_delta
+
+        # Bật lại các điểm đầu mút của cạnh vừa thay đổi
+        for k in range(4):
+            dont_look[endpoints[k]] = False
+        num_active = 0
+        for p in range(size):
+            if not dont_look[route[p]]:
+                active[num_active] = route[p]
+                num_active += 1
+
+    return route, total_gain
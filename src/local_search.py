@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local search cho Multi-Vehicle TSP dựa trên ma trận khoảng cách
+Delta-evaluation 2-opt với neighbor lists và don't-look bits, và local search
+giữa các route (relocate, Or-opt, swap, 2-opt*, cross-exchange)
+"""
+
+import numpy as np
+from typing import List, Optional, Tuple
+
+from kernels import NUMBA_AVAILABLE, two_opt_route_kernel
+
+# Ngưỡng delta âm tối thiểu để coi là cải thiện (tránh lặp vô hạn do sai số float)
+IMPROVEMENT_EPS = -1e-10
+
+
+def build_neighbor_lists(distance_matrix: np.ndarray, k: int = 10,
+                         block_size: int = 1024) -> np.ndarray:
+    """
+    Tạo danh sách k điểm gần nhất cho từng điểm (sắp xếp theo khoảng cách tăng dần)
+
+    Args:
+        distance_matrix: Ma trận khoảng cách (N, N)
+        k: Số láng giềng mỗi điểm
+        block_size: Số hàng xử lý mỗi lần để giới hạn bộ nhớ tạm
+
+    Returns:
+        Mảng (N, k) chỉ số láng giềng
+    """
+    n = len(distance_matrix)
+    k = max(0, min(k, n - 1))
+    neighbor_lists = np.empty((n, k), dtype=np.intp)
+    if k == 0:
+        return neighbor_lists
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+
+        # Loại chính điểm đó bằng cách đặt khoảng cách tới nó = inf trên bản sao của khối
+        dist = np.array(distance_matrix[start:end], dtype=np.float64)
+        dist[np.arange(end - start), np.arange(start, end)] = np.inf
+
+        candidates = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(dist, candidates, axis=1), axis=1, kind='stable')
+        neighbor_lists[start:end] = np.take_along_axis(candidates, order, axis=1)
+
+    return neighbor_lists
+
+
+def _reverse_cyclic(route: np.ndarray, pos: np.ndarray, start: int, end: int):
+    """
+    Đảo ngược đoạn route[start..end] (theo chiều tiến, vòng tròn) và cập nhật pos
+
+    Đảo đoạn bù nếu ngắn hơn - trên chu trình hai cách cho cùng một kết quả.
+    """
+    size = len(route)
+    length = (end - start) % size + 1
+    if 2 * length > size:
+        start, end = (end + 1) % size, (start - 1) % size
+        length = size - length
+
+    for _ in range(length // 2):
+        a, b = route[start], route[end]
+        route[start], route[end] = b, a
+        pos[b], pos[a] = start, end
+        start = (start + 1) % size
+        end = (end - 1) % size
+
+
+def two_opt_route(route: np.ndarray, distance_matrix: np.ndarray,
+                  neighbor_lists: np.ndarray,
+                  first_improvement: bool = True) -> Tuple[np.ndarray, float]:
+    """
+    2-opt cho một route khép kín với đánh giá delta O(1) trên ma trận khoảng cách
+
+    Mỗi điểm a chỉ thử nối với các láng giềng gần c (trong cùng route) thỏa
+    d(a, c) < d(a, succ(a)) hoặc d(a, c) < d(pred(a), a). Don't-look bits bỏ qua
+    các điểm đã không tìm được cải thiện cho đến khi một cạnh kề chúng thay đổi.
+
+    Args:
+        route: Mảng chỉ số điểm theo thứ tự của route
+        distance_matrix: Ma trận khoảng cách (N, N)
+        neighbor_lists: Mảng (N, k) láng giềng gần nhất đã sắp xếp
+        first_improvement: True - áp dụng ngay nước đi cải thiện đầu tiên;
+            False - áp dụng nước đi tốt nhất trong số các điểm đang xét
+
+    Returns:
+        Tuple (route mới, tổng khoảng cách giảm được)
+    """
+    route = np.array(route, copy=True)
+    if NUMBA_AVAILABLE:
+        return two_opt_route_kernel(route, distance_matrix, neighbor_lists, first_improvement)
+    size = len(route)
+    if size <= 3:
+        return route, 0.0
+
+    dist = distance_matrix
+    pos = np.full(len(dist), -1, dtype=np.intp)
+    pos[route] = np.arange(size)
+
+    dont_look = np.zeros(len(dist), dtype=bool)
+    active = list(route.tolist())
+    total_gain = 0.0
+
+    while active:
+        best_move = None
+        best_delta = IMPROVEMENT_EPS
+
+        for a in active:
+            if dont_look[a]:
+                continue
+            i = pos[a]
+            succ_a = route[(i + 1) % size]
+            pred_a = route[(i - 1) % size]
+            d_succ = dist[a, succ_a]
+            d_pred = dist[pred_a, a]
+            found = False
+
+            for c in neighbor_lists[a]:
+                j = pos[c]
+                if j < 0:
+                    continue
+                d_ac = dist[a, c]
+                if d_ac >= d_succ and d_ac >= d_pred:
+                    break
+
+                # Hướng tiến: bỏ (a, succ a), (c, succ c); nối (a, c), (succ a, succ c)
+                succ_c = route[(j + 1) % size]
+                if c != succ_a and succ_c != a:
+                    delta = d_ac + dist[succ_a, succ_c] - d_succ - dist[c, succ_c]
+                    if delta < IMPROVEMENT_EPS:
+                        found = True
+                        if delta < best_delta:
+                            best_delta = delta
+                            best_move = ((i + 1) % size, j, (a, succ_a, c, succ_c))
+
+                # Hướng lùi: bỏ (pred a, a), (pred c, c); nối (a, c), (pred a, pred c)
+                pred_c = route[(j - 1) % size]
+                if c != pred_a and pred_c != a:
+                    delta = d_ac + dist[pred_a, pred_c] - d_pred - dist[pred_c, c]
+                    if delta < IMPROVEMENT_EPS:
+                        found = True
+                        if delta < best_delta:
+                            best_delta = delta
+                            best_move = (j, (i - 1) % size, (a, pred_a, c, pred_c))
+
+                if found and first_improvement:
+                    break
+
+            if found and first_improvement:
+                break
+            if not found:
+                dont_look[a] = True
+
+        if best_move is None:
+            break
+
+        start, end, endpoints = best_move
+        _reverse_cyclic(route, pos, start, end)
+        total_gain -= best_delta
+
+        # Bật lại các điểm đầu mút của cạnh vừa thay đổi
+        for node in endpoints:
+            dont_look[node] = False
+        active = [node for node in route.tolist() if not dont_look[node]]
+
+    return route, total_gain
+
+
+def two_opt_solution(tour: np.ndarray, sizes: np.ndarray, distance_matrix: np.ndarray,
+                     neighbor_lists: np.ndarray, first_improvement: bool = True) -> np.ndarray:
+    """
+    Áp dụng 2-opt cho từng route của giải pháp đã mã hóa (tour, sizes)
+
+    Returns:
+        Tour mới (sizes không đổi vì 2-opt không di chuyển điểm giữa các xe)
+    """
+    improved = np.array(tour, copy=True)
+    start = 0
+    for size in sizes.tolist():
+        if size > 3:
+            improved[start:start + size], _ = two_opt_route(
+                improved[start:start + size], distance_matrix, neighbor_lists, first_improvement)
+        start += size
+    return improved
+
+
+def two_opt_solution_anchored(tour: np.ndarray, sizes: np.ndarray, distance_matrix: np.ndarray,
+                              neighbor_lists: np.ndarray, anchors: np.ndarray,
+                              first_improvement: bool = True) -> np.ndarray:
+    """
+    2-opt cho từng route khi route được nối qua một điểm neo (kho, hoặc điểm kết thúc
+    ảo của route mở): route r được tối ưu như chu trình [anchors[r]] + route rồi xoay
+    để bỏ điểm neo ra khỏi route
+
+    Args:
+        tour, sizes: Giải pháp đã mã hóa
+        distance_matrix: Ma trận khoảng cách chứa cả các điểm neo
+        neighbor_lists: Danh sách láng giềng có hàng cho cả các điểm neo
+        anchors: Mảng (số xe,) chỉ số điểm neo của từng route
+        first_improvement: Áp dụng ngay nước đi cải thiện đầu tiên
+
+    Returns:
+        Tour mới (sizes không đổi)
+    """
+    improved = np.array(tour, copy=True)
+    start = 0
+    for size, anchor in zip(sizes.tolist(), np.asarray(anchors).tolist()):
+        if size > 2:
+            cycle = np.concatenate(([anchor], improved[start:start + size])).astype(np.intp)
+            cycle, _ = two_opt_route(cycle, distance_matrix, neighbor_lists, first_improvement)
+            at = int(np.flatnonzero(cycle == anchor)[0])
+            improved[start:start + size] = np.roll(cycle, -at)[1:]
+        start += size
+    return improved
+
+
+INTER_ROUTE_OPERATORS = ('relocate', 'or_opt', 'swap', 'two_opt_star', 'cross_exchange')
+
+
+class ImprovingAcceptance:
+    """Chỉ chấp nhận nước đi làm giảm tổng khoảng cách"""
+
+    def accept(self, delta: float) -> bool:
+        return delta < IMPROVEMENT_EPS
+
+    def step(self):
+        pass
+
+
+class ThresholdAcceptance(ImprovingAcceptance):
+    """
+    Threshold accepting: chấp nhận nước đi có delta < threshold, threshold giảm dần
+    sau mỗi nước đi được áp dụng (về 0 thì trở thành ImprovingAcceptance)
+    """
+
+    def __init__(self, threshold: float, decay: float = 0.9):
+        self.threshold = threshold
+        self.decay = decay
+
+    def accept(self, delta: float) -> bool:
+        if self.threshold <= -IMPROVEMENT_EPS:
+            return delta < IMPROVEMENT_EPS
+        return delta < self.threshold
+
+    def step(self):
+        self.threshold *= self.decay
+
+
+class InterRouteLocalSearch:
+    """
+    Local search giữa các route (relocate, Or-opt, swap, 2-opt*, cross-exchange)
+
+    Route là chu trình khép kín (điểm cuối quay về điểm đầu). Mọi nước đi được đánh giá
+    delta O(1) từ ma trận khoảng cách và tổng tiền tố chi phí đường đi của từng route;
+    ứng viên giới hạn bởi neighbor lists. Nước đi làm rỗng một route bị bỏ qua.
+    Khi có ràng buộc tải trọng / thời lượng (capacity.CapacityModel), delta cộng thêm
+    thay đổi phạt của hai route, tính O(1) từ tổng tiền tố nhu cầu của từng route.
+    """
+
+    def __init__(self, distance_matrix: np.ndarray, neighbor_lists: np.ndarray,
+                 operators: Tuple[str, ...] = INTER_ROUTE_OPERATORS,
+                 acceptance: Optional[ImprovingAcceptance] = None,
+                 first_improvement: bool = True,
+                 max_segment_length: int = 3,
+                 max_moves: int = 10000,
+                 constraints=None):
+        """
+        Args:
+            distance_matrix: Ma trận khoảng cách (N, N)
+            neighbor_lists: Mảng (N, k) láng giềng gần nhất
+            operators: Các toán tử sử dụng (tập con của INTER_ROUTE_OPERATORS)
+            acceptance: Tiêu chí chấp nhận nước đi (mặc định ImprovingAcceptance)
+            first_improvement: True - áp dụng nước đi được chấp nhận đầu tiên;
+                False - áp dụng nước đi tốt nhất của mỗi lượt quét
+            max_segment_length: Độ dài đoạn tối đa cho Or-opt và cross-exchange
+            max_moves: Số nước đi tối đa được áp dụng
+            constraints: Mô hình ràng buộc capacity.CapacityModel (route thứ r là xe r);
+                None: không ràng buộc
+        """
+        unknown = set(operators) - set(INTER_ROUTE_OPERATORS)
+        if unknown:
+            raise ValueError(f"Toan tu khong hop le: {sorted(unknown)}")
+
+        self.dist = distance_matrix
+        self.neighbor_lists = neighbor_lists
+        self.operators = tuple(operators)
+        self.acceptance = acceptance or ImprovingAcceptance()
+        self.first_improvement = first_improvement
+        self.max_segment_length = max(1, max_segment_length)
+        self.max_moves = max_moves
+        self.constraints = constraints
+
+    # ------------------------------------------------------------------
+    # Trạng thái: routes, vị trí từng điểm, tổng tiền tố chi phí
+    # ------------------------------------------------------------------
+
+    def _load(self, routes: List[List[int]]):
+        self.routes = [list(route) for route in routes]
+        self.route_of = np.full(len(self.dist), -1, dtype=np.intp)
+        self.pos_of = np.full(len(self.dist), -1, dtype=np.intp)
+        self.prefix = [None] * len(self.routes)
+        self.costs = np.zeros(len(self.routes))
+        self.load_prefix = [None] * len(self.routes)
+        self.penalties = np.zeros(len(self.routes))
+        for r in range(len(self.routes)):
+            self._refresh(r)
+
+    def _refresh(self, r: int):
+        """Cập nhật vị trí và tổng tiền tố của route r sau khi thay đổi (O(len))"""
+        route = self.routes[r]
+        if not route:
+            self.prefix[r] = np.zeros(1)
+            self.costs[r] = 0.0
+            self.load_prefix[r] = np.zeros(1)
+            self.penalties[r] = 0.0
+            return
+        idx = np.asarray(route, dtype=np.intp)
+        self.route_of[idx] = r
+        self.pos_of[idx] = np.arange(len(route))
+        self.prefix[r] = np.concatenate(([0.0], np.cumsum(self.dist[idx[:-1], idx[1:]], dtype=np.float64)))
+        self.costs[r] = self.prefix[r][-1] + self.dist[route[-1], route[0]]
+        if self.constraints is not None:
+            self.load_prefix[r] = self.constraints.load_prefix(idx)
+            self.penalties[r] = self.constraints.route_penalty(
+                r, self.costs[r], self.load_prefix[r][-1], len(route))
+
+    def total_distance(self) -> float:
+        return float(self.costs.sum())
+
+    def objective(self) -> float:
+        """Tổng khoảng cách cộng phạt ràng buộc"""
+        return float(self.costs.sum() + self.penalties.sum())
+
+    def _penalty_delta(self, ra: int, rb: int, cost_a: float, cost_b: float,
+                       load_a: float, load_b: float, size_a: int, size_b: int) -> float:
+        """Thay đổi phạt ràng buộc khi route ra, rb có chi phí / tải / số điểm mới (O(1))"""
+        route_penalty = self.constraints.route_penalty
+        return (route_penalty(ra, cost_a, load_a, size_a) + route_penalty(rb, cost_b, load_b, size_b) -
+                self.penalties[ra] - self.penalties[rb])
+
+    # ------------------------------------------------------------------
+    # Sinh và đánh giá nước đi (delta O(1))
+    # ------------------------------------------------------------------
+
+    def _moves_relocate(self, u: int):
+        yield from self._moves_segment(u, 1)
+
+    def _moves_or_opt(self, u: int):
+        for length in range(2, self.max_segment_length + 1):
+            yield from self._moves_segment(u, length)
+
+    def _moves_segment(self, u: int, length: int):
+        """Chuyển đoạn bắt đầu tại u (độ dài length) sang cạnh một láng giềng ở route khác"""
+        dist = self.dist
+        ra, i = self.route_of[u], self.pos_of[u]
+        route_a = self.routes[ra]
+        size_a = len(route_a)
+        if i + length > size_a or length >= size_a:
+            return
+
+        first, last = route_a[i], route_a[i + length - 1]
+        pred, succ = route_a[i - 1], route_a[(i + length) % size_a]
+        remove_delta = dist[pred, succ] - dist[pred, first] - dist[last, succ]
+
+        for v in self.neighbor_lists[u]:
+            rb = self.route_of[v]
+            if rb == ra or rb < 0:
+                continue
+            route_b = self.routes[rb]
+            j = self.pos_of[v]
+            # Chèn sau v (u kề v) hoặc trước v với đoạn đảo ngược (u vẫn kề v)
+            for x_pos, reverse in ((j, False), (j - 1, True)):
+                x = route_b[x_pos % len(route_b)]
+                y = route_b[(x_pos + 1) % len(route_b)]
+                head, tail = (last, first) if reverse else (first, last)
+                insert_delta = dist[x, head] + dist[tail, y] - dist[x, y]
+                delta = remove_delta + insert_delta
+                if self.constraints is not None:
+                    load = self.load_prefix[ra][i + length] - self.load_prefix[ra][i]
+                    delta += self._penalty_delta(
+                        ra, rb, self.costs[ra] + remove_delta, self.costs[rb] + insert_delta,
+                        self.load_prefix[ra][-1] - load, self.load_prefix[rb][-1] + load,
+                        size_a - length, len(route_b) + length)
+                yield delta, ('segment', ra, i, length, rb, x_pos % len(route_b), reverse)
+
+    def _moves_swap(self, u: int):
+        """Hoán đổi u với điểm kề một láng giềng của u ở route khác"""
+        dist = self.dist
+        ra, i = self.route_of[u], self.pos_of[u]
+        route_a = self.routes[ra]
+        if len(route_a) < 2:
+            return
+        pa, na = route_a[i - 1], route_a[(i + 1) % len(route_a)]
+
+        for v_near in self.neighbor_lists[u]:
+            rb = self.route_of[v_near]
+            if rb == ra or rb < 0:
+                continue
+            route_b = self.routes[rb]
+            if len(route_b) < 2:
+                continue
+            for j in {(self.pos_of[v_near] - 1) % len(route_b), (self.pos_of[v_near] + 1) % len(route_b)}:
+                v = route_b[j]
+                pb, nb = route_b[j - 1], route_b[(j + 1) % len(route_b)]
+                delta_a = dist[pa, v] + dist[v, na] - dist[pa, u] - dist[u, na]
+                delta_b = dist[pb, u] + dist[u, nb] - dist[pb, v] - dist[v, nb]
+                delta = delta_a + delta_b
+                if self.constraints is not None:
+                    demand_change = self.constraints.demands[v] - self.constraints.demands[u]
+                    delta += self._penalty_delta(
+                        ra, rb, self.costs[ra] + delta_a, self.costs[rb] + delta_b,
+                        self.load_prefix[ra][-1] + demand_change, self.load_prefix[rb][-1] - demand_change,
+                        len(route_a), len(route_b))
+                yield delta, ('swap', ra, i, rb, j)
+
+    def _moves_two_opt_star(self, u: int):
+        """Đổi phần đuôi hai route để tạo cạnh (u, v): A[:i+1] + B[j:], B[:j] + A[i+1:]"""
+        dist = self.dist
+        ra, i = self.route_of[u], self.pos_of[u]
+        route_a, prefix_a = self.routes[ra], self.prefix[ra]
+        size_a = len(route_a)
+
+        for v in self.neighbor_lists[u]:
+            rb = self.route_of[v]
+            if rb == ra or rb < 0:
+                continue
+            j = self.pos_of[v]
+            if j == 0:
+                continue
+            route_b, prefix_b = self.routes[rb], self.prefix[rb]
+
+            new_a = (prefix_a[i] + dist[u, v] + prefix_b[-1] - prefix_b[j] +
+                     dist[route_b[-1], route_a[0]])
+            if i + 1 < size_a:
+                new_b = (prefix_b[j - 1] + dist[route_b[j - 1], route_a[i + 1]] +
+                         prefix_a[-1] - prefix_a[i + 1] + dist[route_a[-1], route_b[0]])
+            else:
+                new_b = prefix_b[j - 1] + dist[route_b[j - 1], route_b[0]]
+
+            delta = new_a + new_b - self.costs[ra] - self.costs[rb]
+            if self.constraints is not None:
+                load_a, load_b = self.load_prefix[ra], self.load_prefix[rb]
+                delta += self._penalty_delta(
+                    ra, rb, new_a, new_b,
+                    load_a[i + 1] + load_b[-1] - load_b[j], load_b[j] + load_a[-1] - load_a[i + 1],
+                    i + 1 + len(route_b) - j, j + size_a - i - 1)
+            yield delta, ('two_opt_star', ra, i, rb, j)
+
+    def _moves_cross_exchange(self, u: int):
+        """Đổi đoạn ngay sau u (route A) với đoạn bắt đầu tại láng giềng v (route B)"""
+        dist = self.dist
+        ra = self.route_of[u]
+        route_a = self.routes[ra]
+        size_a = len(route_a)
+        s = self.pos_of[u] + 1
+        max_len = self.max_segment_length
+
+        for v in self.neighbor_lists[u]:
+            rb = self.route_of[v]
+            if rb == ra or rb < 0:
+                continue
+            route_b = self.routes[rb]
+            size_b = len(route_b)
+            t = self.pos_of[v]
+            pb = route_b[t - 1]
+
+            for len_a in range(1, min(max_len, size_a - 1) + 1):
+                if s + len_a > size_a:
+                    break
+                a_first, a_last = route_a[s], route_a[s + len_a - 1]
+                na = route_a[(s + len_a) % size_a]
+                for len_b in range(1, min(max_len, size_b - 1) + 1):
+                    if t + len_b > size_b:
+                        break
+                    b_first, b_last = route_b[t], route_b[t + len_b - 1]
+                    nb = route_b[(t + len_b) % size_b]
+                    delta_a = dist[u, b_first] + dist[b_last, na] - dist[u, a_first] - dist[a_last, na]
+                    delta_b = dist[pb, a_first] + dist[a_last, nb] - dist[pb, b_first] - dist[b_last, nb]
+                    delta = delta_a + delta_b
+                    if self.constraints is not None:
+                        load_change = ((self.load_prefix[rb][t + len_b] - self.load_prefix[rb][t]) -
+                                       (self.load_prefix[ra][s + len_a] - self.load_prefix[ra][s]))
+                        delta += self._penalty_delta(
+                            ra, rb, self.costs[ra] + delta_a, self.costs[rb] + delta_b,
+                            self.load_prefix[ra][-1] + load_change, self.load_prefix[rb][-1] - load_change,
+                            size_a - len_a + len_b, size_b - len_b + len_a)
+                    yield delta, ('cross_exchange', ra, s, len_a, rb, t, len_b)
+
+    # ------------------------------------------------------------------
+    # Áp dụng nước đi
+    # ------------------------------------------------------------------
+
+    def _apply(self, move: tuple):
+        """Áp dụng nước đi và cập nhật trạng thái của hai route liên quan"""
+        kind = move[0]
+        if kind == 'segment':
+            _, ra, i, length, rb, x_pos, reverse = move
+            segment = self.routes[ra][i:i + length]
+            if reverse:
+                segment.reverse()
+            del self.routes[ra][i:i + length]
+            self.routes[rb][x_pos + 1:x_pos + 1] = segment
+        elif kind == 'swap':
+            _, ra, i, rb, j = move
+            self.routes[ra][i], self.routes[rb][j] = self.routes[rb][j], self.routes[ra][i]
+        elif kind == 'two_opt_star':
+            _, ra, i, rb, j = move
+            route_a, route_b = self.routes[ra], self.routes[rb]
+            self.routes[ra] = route_a[:i + 1] + route_b[j:]
+            self.routes[rb] = route_b[:j] + route_a[i + 1:]
+        else:
+            _, ra, s, len_a, rb, t, len_b = move
+            route_a, route_b = self.routes[ra], self.routes[rb]
+            self.routes[ra] = route_a[:s] + route_b[t:t + len_b] + route_a[s + len_a:]
+            self.routes[rb] = route_b[:t] + route_a[s:s + len_a] + route_b[t + len_b:]
+
+        self._refresh(ra)
+        self._refresh(rb)
+
+    # ------------------------------------------------------------------
+    # Vòng lặp chính
+    # ------------------------------------------------------------------
+
+    def run(self, routes: List[List[int]]) -> Tuple[List[List[int]], float]:
+        """
+        Cải thiện các route bằng local search giữa các route
+
+        Args:
+            routes: Danh sách route (chỉ số điểm)
+
+        Returns:
+            Tuple (routes tốt nhất tìm được, tổng khoảng cách cộng phạt ràng buộc của chúng)
+        """
+        self._load(routes)
+        best_routes = [list(route) for route in self.routes]
+        best_distance = self.objective()
+        generators = [getattr(self, f'_moves_{name}') for name in self.operators]
+        moves_applied = 0
+
+        while moves_applied < self.max_moves:
+            chosen = None
+            for generate in generators:
+                for u in [node for route in self.routes for node in route]:
+                    for delta, move in generate(u):
+                        if self.acceptance.accept(delta) and (chosen is None or delta < chosen[0]):
+                            chosen = (delta, move)
+                            if self.first_improvement:
+                                break
+                    if chosen is not None and self.first_improvement:
+                        break
+                if chosen is not None and self.first_improvement:
+                    break
+
+            if chosen is None:
+                break
+
+            self._apply(chosen[1])
+            self.acceptance.step()
+            moves_applied += 1
+
+            current = self.objective()
+            if current < best_distance + IMPROVEMENT_EPS:
+                best_distance = current
+                best_routes = [list(route) for route in self.routes]
+
+        return best_routes, best_distance
+
+
+if __name__ == "__main__":
+    import json
+    from tsp_solver import MultiVehicleTSPGA, load_data
+
+    print("Hau toi uu giua cac route cho ket qua co san")
+    print("=" * 50)
+
+    coords = load_data('data/Phuong_TPHCM_With_Coordinates.CSV')
+    with open('results/multi_vehicle_tsp_results.json', 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+
+    routes = previous['best_solution']
+    solver = MultiVehicleTSPGA(coords=coords, num_vehicles=len(routes), verbose=False)
+    results = solver.post_optimize(routes)
+
+    print(f"Truoc: {previous['total_distance']:.2f} km")
+    print(f"Sau:   {results['total_distance']:.2f} km")
+
+    with open('results/post_optimized_results.json', 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print("Da luu ket qua vao results/post_optimized_results.json")
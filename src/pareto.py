@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NSGA-II cho hai mục tiêu (khoảng cách, cân bằng tải): sắp xếp không trội nhanh,
+crowding distance, chọn lọc môi trường (μ+λ) và crowded tournament
+
+Mọi mục tiêu đều theo chiều càng cao càng tốt (giống evaluate_population).
+"""
+
+import numpy as np
+
+
+def dominance_matrix(objectives: np.ndarray) -> np.ndarray:
+    """
+    Quan hệ trội giữa mọi cặp giải pháp (vector hóa, O(M·N²))
+
+    Args:
+        objectives: Mảng (N, M) giá trị mục tiêu (càng cao càng tốt)
+
+    Returns:
+        Mảng bool (N, N): [i, j] = True nếu i trội j
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    left, right = objectives[:, None, :], objectives[None, :, :]
+    return np.all(left >= right, axis=2) & np.any(left > right, axis=2)
+
+
+def non_dominated_sort(objectives: np.ndarray) -> np.ndarray:
+    """
+    Fast non-dominated sort (Deb và cộng sự): hạng front của từng giải pháp
+
+    Args:
+        objectives: Mảng (N, M) giá trị mục tiêu
+
+    Returns:
+        Mảng (N,) hạng front (0: front Pareto)
+    """
+    dominates = dominance_matrix(objectives)
+    dominated_count = dominates.sum(axis=0)
+    ranks = np.full(len(dominates), -1, dtype=np.intp)
+
+    front = np.flatnonzero(dominated_count == 0)
+    rank = 0
+    while len(front):
+        ranks[front] = rank
+        # Bỏ front hiện tại: giảm số lần bị trội của các giải pháp nó trội
+        dominated_count = dominated_count - dominates[front].sum(axis=0)
+        dominated_count[ranks >= 0] = -1
+        front = np.flatnonzero(dominated_count == 0)
+        rank += 1
+    return ranks
+
+
+def crowding_distance(objectives: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """
+    Crowding distance trong từng front (điểm biên = vô cùng)
+
+    Args:
+        objectives: Mảng (N, M) giá trị mục tiêu
+        ranks: Hạng front từ non_dominated_sort
+
+    Returns:
+        Mảng (N,) crowding distance
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    distance = np.zeros(len(objectives))
+    for rank in np.unique(ranks):
+        members = np.flatnonzero(ranks == rank)
+        if len(members) <= 2:
+            distance[members] = np.inf
+            continue
+        for m in range(objectives.shape[1]):
+            values = objectives[members, m]
+            order = np.argsort(values, kind='stable')
+            span = values[order[-1]] - values[order[0]]
+            distance[members[order[[0, -1]]]] = np.inf
+            if span > 0:
+                distance[members[order[1:-1]]] += (values[order[2:]] - values[order[:-2]]) / span
+    return distance
+
+
+def crowded_order(objectives: np.ndarray) -> np.ndarray:
+    """
+    Thứ tự crowded-comparison: hạng front tăng dần, trong cùng front crowding giảm dần
+
+    Args:
+        objectives: Mảng (N, M) giá trị mục tiêu
+
+    Returns:
+        Mảng (N,) chỉ số giải pháp từ tốt nhất đến kém nhất
+    """
+    ranks = non_dominated_sort(objectives)
+    crowding = crowding_distance(objectives, ranks)
+    return np.lexsort((-crowding, ranks))
+
+
+def crowded_tournament(order: np.ndarray, num_winners: int, rng: np.random.Generator,
+                       k: int = 2) -> np.ndarray:
+    """
+    Crowded tournament selection cho cả thế hệ trong một lần rút ngẫu nhiên
+
+    Args:
+        order: Thứ tự crowded-comparison (từ crowded_order)
+        num_winners: Số tournament
+        rng: Bộ sinh số ngẫu nhiên
+        k: Kích thước tournament
+
+    Returns:
+        Mảng (num_winners,) chỉ số cá thể thắng
+    """
+    position = np.empty(len(order), dtype=np.intp)
+    position[order] = np.arange(len(order))
+    candidates = rng.integers(0, len(order), size=(num_winners, k))
+    winners = np.argmin(position[candidates], axis=1)
+    return candidates[np.arange(num_winners), winners]
+
+
+def pareto_front_indices(objectives: np.ndarray) -> np.ndarray:
+    """
+    Chỉ số các giải pháp không bị trội, bỏ trùng giá trị mục tiêu
+
+    Args:
+        objectives: Mảng (N, M) giá trị mục tiêu
+
+    Returns:
+        Chỉ số các giải pháp trên front Pareto, sắp theo mục tiêu đầu tiên giảm dần
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    front = np.flatnonzero(~dominance_matrix(objectives).any(axis=0))
+    _, unique = np.unique(objectives[front], axis=0, return_index=True)
+    front = front[unique]
+    return front[np.argsort(-objectives[front, 0], kind='stable')]
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chỉ mục không gian (lưới đều) trên tọa độ đã chiếu sang km cho truy vấn k láng
+giềng gần nhất và truy vấn bán kính
+
+Tọa độ (lat, lon) được chiếu equirectangular quanh vĩ độ trung bình - sai số rất nhỏ
+trong phạm vi một thành phố. Các điểm được sắp theo ô lưới (mỗi ô trung bình
+khoảng points_per_cell điểm) nên một truy vấn chỉ duyệt các ô quanh điểm hỏi theo
+từng vòng thay vì cả N điểm. Dựng chỉ mục O(N log N), truy vấn k-NN gần O(k).
+"""
+
+import numpy as np
+from typing import Optional
+
+EARTH_RADIUS_KM = 6371.0
+
+# Lưới coi là suy biến khi số ô có điểm ít hơn 1 / DEGENERATE_CELL_RATIO số ô dự kiến
+DEGENERATE_CELL_RATIO = 8
+
+
+def project_coordinates(coords_array: np.ndarray, reference_lat: Optional[float] = None) -> np.ndarray:
+    """
+    Chiếu (lat, lon) độ sang mặt phẳng (x, y) km quanh vĩ độ trung bình
+
+    Args:
+        coords_array: Mảng (N, 2) tọa độ (lat, lon) tính bằng độ
+        reference_lat: Vĩ độ tham chiếu (độ) để chiếu cùng hệ với một tập điểm khác
+            (None: vĩ độ trung bình của coords_array)
+
+    Returns:
+        Mảng (N, 2) tọa độ phẳng tính bằng km
+    """
+    coords = np.radians(np.asarray(coords_array, dtype=np.float64).reshape(-1, 2))
+    if len(coords) == 0:
+        return coords
+    mean_lat = coords[:, 0].mean() if reference_lat is None else np.radians(reference_lat)
+    return np.column_stack([EARTH_RADIUS_KM * coords[:, 1] * np.cos(mean_lat),
+                            EARTH_RADIUS_KM * coords[:, 0]])
+
+
+class GridIndex:
+    """Lưới đều trên tọa độ phẳng: truy vấn k láng giềng gần nhất và bán kính"""
+
+    def __init__(self, points: np.ndarray, points_per_cell: float = 2.0):
+        """
+        Dựng chỉ mục một lần
+
+        Args:
+            points: Mảng (N, 2) tọa độ phẳng (km), ví dụ từ project_coordinates
+            points_per_cell: Số điểm trung bình mỗi ô, quyết định kích thước ô
+        """
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        n = len(self.points)
+        self.origin = self.points.min(axis=0) if n else np.zeros(2)
+        extent = (self.points.max(axis=0) - self.origin) if n else np.zeros(2)
+
+        # Kích thước ô để mỗi ô có khoảng points_per_cell điểm trên hình chữ nhật bao; chặn
+        # dưới theo cạnh dài nhất để mỗi trục có tối đa ~N / points_per_cell ô (tổng số ô
+        # O(N)) cả khi các điểm thẳng hàng (diện tích bao gần 0)
+        area = max(extent[0], 1e-9) * max(extent[1], 1e-9)
+        self.cell_size = float(max(np.sqrt(area * points_per_cell / max(n, 1)),
+                                   extent.max() * points_per_cell / max(n, 1), 1e-6))
+        self.shape = (np.floor(extent / self.cell_size).astype(np.intp) + 1)
+
+        # Sắp điểm theo ô (row-major); cell_starts[c]..cell_starts[c+1] là các điểm của ô c
+        cells = self._cells_of(self.points)
+        cell_ids = cells[:, 0] * self.shape[1] + cells[:, 1]
+        self.order = np.argsort(cell_ids, kind='stable')
+        self.cell_starts = np.searchsorted(cell_ids[self.order],
+                                           np.arange(self.shape[0] * self.shape[1] + 1))
+
+        # Lưới suy biến: phần lớn điểm dồn vào rất ít ô (trùng tọa độ / cụm quá dày), truy
+        # vấn theo ô khi đó gần O(N^2) bộ nhớ nên neighbor_lists chuyển sang sắp xếp trực tiếp
+        occupied = np.count_nonzero(np.diff(self.cell_starts))
+        self.degenerate = bool(n > 1 and occupied * DEGENERATE_CELL_RATIO < n / points_per_cell)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _cells_of(self, points: np.ndarray) -> np.ndarray:
+        """Ô lưới (cột x, hàng y) của các điểm, kẹp vào trong lưới"""
+        cells = np.floor((points - self.origin) / self.cell_size).astype(np.intp)
+        return np.clip(cells, 0, self.shape - 1)
+
+    def _ring_members(self, cell: np.ndarray, ring: int) -> np.ndarray:
+        """Chỉ số các điểm nằm trong các ô cách ô cell đúng ring ô (viền hình vuông)"""
+        cx, cy = int(cell[0]), int(cell[1])
+        x_lo, x_hi = max(cx - ring, 0), min(cx + ring, self.shape[0] - 1)
+        y_lo, y_hi = max(cy - ring, 0), min(cy + ring, self.shape[1] - 1)
+        members = []
+        for x in range(x_lo, x_hi + 1):
+            if x in (cx - ring, cx + ring):
+                ys = range(y_lo, y_hi + 1)
+            else:
+                ys = [y for y in (cy - ring, cy + ring) if y_lo <= y <= y_hi]
+            for y in ys:
+                cell_id = x * self.shape[1] + y
+                start, end = self.cell_starts[cell_id], self.cell_starts[cell_id + 1]
+                if end > start:
+                    members.append(self.order[start:end])
+        return np.concatenate(members) if members else np.empty(0, dtype=np.intp)
+
+    def query_knn(self, point: np.ndarray, k: int, exclude: Optional[int] = None) -> np.ndarray:
+        """
+        k điểm gần nhất (theo khoảng cách phẳng) của một điểm
+
+        Args:
+            point: Tọa độ phẳng (x, y) của điểm hỏi
+            k: Số láng giềng
+            exclude: Chỉ số điểm cần loại (thường là chính điểm hỏi)
+
+        Returns:
+            Mảng chỉ số tối đa k điểm, sắp theo khoảng cách tăng dần
+        """
+        point = np.asarray(point, dtype=np.float64)
+        available = len(self.points) - (exclude is not None)
+        k = max(0, min(k, available))
+        if k == 0:
+            return np.empty(0, dtype=np.intp)
+
+        cell = self._cells_of(point[None, :])[0]
+        max_ring = int(self.shape.max())
+        candidates = []
+        count = 0
+        for ring in range(max_ring + 1):
+            members = self._ring_members(cell, ring)
+            if exclude is not None:
+                members = members[members != exclude]
+            candidates.append(members)
+            count += len(members)
+            if count < k:
+                continue
+            # Mọi điểm ở ngoài vòng ring cách điểm hỏi ít nhất ring ô (tính từ biên ô)
+            found = np.concatenate(candidates)
+            distances = np.hypot(*(self.points[found] - point).T)
+            kth = np.partition(distances, k - 1)[k - 1]
+            if kth <= ring * self.cell_size or ring == max_ring:
+                nearest = np.argsort(distances, kind='stable')[:k]
+                return found[nearest]
+        found = np.concatenate(candidates)
+        distances = np.hypot(*(self.points[found] - point).T)
+        return found[np.argsort(distances, kind='stable')[:k]]
+
+    def query_radius(self, point: np.ndarray, radius: float) -> np.ndarray:
+        """
+        Mọi điểm cách điểm hỏi không quá radius (km phẳng)
+
+        Args:
+            point: Tọa độ phẳng (x, y) của điểm hỏi
+            radius: Bán kính (km)
+
+        Returns:
+            Mảng chỉ số điểm, sắp theo khoảng cách tăng dần
+        """
+        point = np.asarray(point, dtype=np.float64)
+        if len(self.points) == 0:
+            return np.empty(0, dtype=np.intp)
+        lo = self._cells_of((point - radius)[None, :])[0]
+        hi = self._cells_of((point + radius)[None, :])[0]
+        members = [self.order[self.cell_starts[x * self.shape[1] + lo[1]]:
+                              self.cell_starts[x * self.shape[1] + hi[1] + 1]]
+                   for x in range(lo[0], hi[0] + 1)]
+        found = np.concatenate(members)
+        distances = np.hypot(*(self.points[found] - point).T)
+        inside = distances <= radius
+        return found[inside][np.argsort(distances[inside], kind='stable')]
+
+    def neighbor_lists(self, k: int, distance_matrix: Optional[np.ndarray] = None,
+                       oversample: int = 2) -> np.ndarray:
+        """
+        Danh sách k láng giềng gần nhất cho mọi điểm (thay cho sắp xếp cả hàng ma trận)
+
+        Ứng viên lấy từ lưới (oversample * k điểm gần nhất theo khoảng cách phẳng), sau đó
+        xếp lại theo distance_matrix nếu có để thứ tự khớp khoảng cách thật (Haversine).
+
+        Args:
+            k: Số láng giềng mỗi điểm
+            distance_matrix: Ma trận khoảng cách (N, N) dùng để xếp lại ứng viên (None: khoảng cách phẳng)
+            oversample: Hệ số số ứng viên so với k
+
+        Returns:
+            Mảng (N, k) chỉ số láng giềng
+        """
+        n = len(self.points)
+        k = max(0, min(k, n - 1))
+        neighbor_lists = np.empty((n, k), dtype=np.intp)
+        if k == 0:
+            return neighbor_lists
+
+        if self.degenerate:
+            return self._sorted_neighbor_lists(k, distance_matrix)
+
+        # Truy vấn theo ô: mọi điểm trong cùng ô dùng chung tập ứng viên từ các vòng ô quanh nó
+        num_candidates = min(oversample * k, n - 1)
+        max_ring = int(self.shape.max())
+        for cell_id in np.flatnonzero(np.diff(self.cell_starts)):
+            members = self.order[self.cell_starts[cell_id]:self.cell_starts[cell_id + 1]]
+            cell = np.array(divmod(int(cell_id), int(self.shape[1])))
+            rings = []
+            for ring in range(max_ring + 1):
+                rings.append(self._ring_members(cell, ring))
+                found = np.concatenate(rings)
+                if len(found) <= num_candidates and ring < max_ring:
+                    continue
+                diff = self.points[members][:, None, :] - self.points[found][None, :, :]
+                distances = np.hypot(diff[..., 0], diff[..., 1])
+                distances[members[:, None] == found[None, :]] = np.inf
+                kth = np.partition(distances, num_candidates - 1, axis=1)[:, num_candidates - 1]
+                if kth.max() <= ring * self.cell_size:
+                    break
+            nearest = np.argsort(distances, axis=1, kind='stable')[:, :num_candidates]
+            candidates = found[nearest]
+            if distance_matrix is not None:
+                candidates = np.sort(candidates, axis=1)
+                order = np.argsort(np.asarray(distance_matrix[members[:, None], candidates], dtype=np.float64),
+                                   axis=1, kind='stable')
+                candidates = np.take_along_axis(candidates, order, axis=1)
+            neighbor_lists[members] = candidates[:, :k]
+        return neighbor_lists
+
+    def _sorted_neighbor_lists(self, k: int, distance_matrix: Optional[np.ndarray] = None,
+                               block_size: int = 1024) -> np.ndarray:
+        """
+        Danh sách k láng giềng bằng argpartition / argsort từng khối hàng (dùng khi lưới suy biến)
+
+        Args:
+            k: Số láng giềng mỗi điểm (đã kẹp trong [1, N - 1])
+            distance_matrix: Ma trận khoảng cách (N, N) (None: khoảng cách phẳng)
+            block_size: Số hàng xử lý mỗi lần để giới hạn bộ nhớ tạm
+
+        Returns:
+            Mảng (N, k) chỉ số láng giềng
+        """
+        n = len(self.points)
+        neighbor_lists = np.empty((n, k), dtype=np.intp)
+        for start in range(0, n, block_size):
+            end = min(start + block_size, n)
+            if distance_matrix is not None:
+                dist = np.array(distance_matrix[start:end], dtype=np.float64)
+            else:
+                diff = self.points[start:end, None, :] - self.points[None, :, :]
+                dist = np.hypot(diff[..., 0], diff[..., 1])
+            dist[np.arange(end - start), np.arange(start, end)] = np.inf
+            candidates = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(dist, candidates, axis=1), axis=1, kind='stable')
+            neighbor_lists[start:end] = np.take_along_axis(candidates, order, axis=1)
+        return neighbor_lists
+
+
+if __name__ == "__main__":
+    # Tự kiểm tra: láng giềng từ lưới khớp sắp xếp trực tiếp, kể cả tập điểm suy biến
+    import time
+
+    rng = np.random.default_rng(0)
+    cases = {
+        'ngau nhien': rng.uniform([10.7, 106.6], [10.9, 106.8], size=(2000, 2)),
+        'cung vi do': np.column_stack([np.full(60, 10.78), np.linspace(106.6, 106.8, 60)]),
+        'cung kinh do': np.column_stack([rng.uniform(10.7, 10.9, 500), np.full(500, 106.7)]),
+        'trung toa do': np.repeat(rng.uniform([10.7, 106.6], [10.9, 106.8], size=(5, 2)), 40, axis=0),
+    }
+    for name, coords in cases.items():
+        start = time.perf_counter()
+        index = GridIndex(project_coordinates(coords))
+        lists = index.neighbor_lists(8)
+        elapsed = time.perf_counter() - start
+        diff = index.points[:, None, :] - index.points[None, :, :]
+        dist = np.hypot(diff[..., 0], diff[..., 1])
+        np.fill_diagonal(dist, np.inf)
+        expected = np.sort(dist, axis=1)[:, :lists.shape[1]]
+        assert np.allclose(np.take_along_axis(dist, lists, axis=1), expected), name
+        assert index.shape.prod() <= 4 * len(coords) + 4, name
+        print(f"{name}: {len(coords)} diem, luoi {index.shape.tolist()}, "
+              f"suy bien={index.degenerate}, {elapsed * 1000:.1f} ms - OK")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Split decoder (Prins) cho Multi-Vehicle TSP: chia một giant tour thành đúng
+num_routes route liên tiếp với chi phí tối ưu bằng quy hoạch động trên ma trận khoảng cách
+"""
+
+import numpy as np
+from typing import Callable, Optional
+
+SPLIT_OBJECTIVES = ('total', 'makespan')
+
+
+def split_giant_tour(tour: np.ndarray, distance_matrix: np.ndarray, num_routes: int,
+                     objective: str = 'total', min_size: int = 1,
+                     block_size: int = 1024,
+                     closing_cost: Optional[Callable[[np.ndarray, np.ndarray, int], np.ndarray]] = None
+                     ) -> np.ndarray:
+    """
+    Chia tối ưu giant tour thành num_routes đoạn liên tiếp (mỗi đoạn là một route khép kín)
+
+    Chi phí đoạn tour[i:j] = tổng cạnh liên tiếp trong đoạn + chi phí khép route (mặc định
+    cạnh quay về điểm đầu; với kho là các chặng nối kho), tính O(1) qua prefix sum.
+    Mỗi tầng DP (một xe) được tính vector hóa trên các
+    cặp (điểm đầu, điểm cuối), chia khối theo điểm cuối để giới hạn bộ nhớ tạm
+    (O(block_size·N) thay vì O(N²)).
+
+    Args:
+        tour: Hoán vị chỉ số điểm (giant tour)
+        distance_matrix: Ma trận khoảng cách (N, N)
+        num_routes: Số route (số xe)
+        objective: 'total' (tổng quãng đường nhỏ nhất) hoặc 'makespan' (route dài nhất ngắn nhất)
+        min_size: Số điểm tối thiểu của mỗi route
+        block_size: Số điểm cuối xử lý mỗi lần
+        closing_cost: Hàm (điểm đầu, điểm cuối, chỉ số route) -> chi phí khép route (mảng
+            cùng shape), ví dụ các chặng nối kho của xe đó; None: cạnh điểm cuối -> điểm đầu
+
+    Returns:
+        Mảng (num_routes,) số điểm của từng route, theo thứ tự trên tour
+    """
+    if objective not in SPLIT_OBJECTIVES:
+        raise ValueError(f"objective phai la mot trong {SPLIT_OBJECTIVES}, nhan duoc: {objective}")
+
+    tour = np.asarray(tour, dtype=np.intp)
+    n = len(tour)
+    sizes = np.zeros(num_routes, dtype=np.intp)
+    if n <= num_routes:
+        # Không đủ điểm: mỗi xe nhận tối đa một điểm
+        sizes[:n] = 1
+        return sizes
+    min_size = max(1, min(min_size, n // num_routes))
+
+    # prefix[j]: tổng cạnh tour[0] -> ... -> tour[j]
+    prefix = np.zeros(n, dtype=np.float64)
+    if n > 1:
+        prefix[1:] = np.cumsum(distance_matrix[tour[:-1], tour[1:]])
+
+    # value[k, j]: chi phí tốt nhất để phục vụ tour[:j] bằng k xe
+    value = np.full((num_routes + 1, n + 1), np.inf)
+    value[0, 0] = 0.0
+    predecessor = np.zeros((num_routes + 1, n + 1), dtype=np.intp)
+    starts = np.arange(n)
+
+    # Ma trận chi phí của một khối điểm cuối chỉ phụ thuộc vào tour (và xe, nếu có
+    # closing_cost) nên được tính một lần rồi dùng cho mọi tầng; value[k - 1] tại các
+    # điểm đầu thuộc khối hiện tại đã được tính ở tầng trước trong cùng khối
+    for block_start in range(1, n + 1, block_size):
+        ends = np.arange(block_start, min(block_start + block_size, n + 1))
+        rows = np.arange(len(ends))
+
+        # cost[b, i] = chi phí route tour[i:ends[b]] (inf nếu ít hơn min_size điểm)
+        path = prefix[ends - 1, None] - prefix[None, :]
+        too_short = ends[:, None] - starts[None, :] < min_size
+        if closing_cost is None:
+            cost = path + distance_matrix[tour[ends - 1, None], tour[None, :]]
+            cost[too_short] = np.inf
+        firsts, lasts = np.broadcast_arrays(tour[None, :], tour[ends - 1, None])
+
+        for k in range(1, num_routes + 1):
+            if closing_cost is not None:
+                cost = path + closing_cost(firsts, lasts, k - 1)
+                cost[too_short] = np.inf
+            if objective == 'total':
+                candidate = value[k - 1, None, :n] + cost
+            else:
+                candidate = np.maximum(value[k - 1, None, :n], cost)
+            best_start = candidate.argmin(axis=1)
+            value[k, ends] = candidate[rows, best_start]
+            predecessor[k, ends] = best_start
+
+    # Truy vết ngược từ cuối tour
+    end = n
+    for k in range(num_routes, 0, -1):
+        start = predecessor[k, end]
+        sizes[k - 1] = end - start
+        end = start
+
+    return sizes
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Đánh giá time windows (VRPTW) tăng dần cho Multi-Vehicle TSP
+
+Mỗi đoạn route được tóm tắt bởi dữ liệu đoạn (duration, time_warp, earliest,
+latest, busy) và hai đoạn ghép được trong O(1) (concat_segments). Với dữ liệu
+đoạn đầu (forward) và đoạn cuối (backward) tính trước cho từng route, chi phí trễ
+giờ/chờ đợi của nước đi chèn điểm hoặc 2-opt được tính trong O(1) thay vì mô
+phỏng lại cả route. Trễ giờ dùng mô hình time warp: xe đến muộn coi như quay
+về cuối time window và phần muộn bị phạt. Route có kho xuất phát (origin) rời kho
+lúc start_time nên chặng kho -> điểm đầu nằm ngay trong đoạn forward.
+
+Với travel_time_model (tốc độ theo khung giờ), thời gian mỗi chặng phụ thuộc thời
+điểm xuất phát: lịch trình forward (fitness) tính chính xác từng chặng theo giờ đi
+thực tế; chặng mới của nước đi được ước lượng theo giờ đi hiện tại của điểm xuất
+phát nên đánh giá nước đi vẫn O(1) nhưng chỉ xấp xỉ.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+
+from local_search import IMPROVEMENT_EPS
+from travel_time import TravelTimeModel
+
+# Dữ liệu đoạn: (duration, time_warp, earliest, latest, busy)
+#   duration: tổng thời gian (di chuyển + phục vụ + chờ)
+#   time_warp: tổng số phút trễ so với time window
+#   earliest, latest: khoảng thời điểm bắt đầu đoạn để đạt duration/time_warp trên
+#   busy: tổng thời gian di chuyển + phục vụ (chờ = duration - busy)
+Segment = Tuple
+
+# Đoạn rỗng: phần tử trung hòa của phép ghép (thời gian di chuyển tới/từ nó phải là 0)
+EMPTY_SEGMENT = (0.0, 0.0, -np.inf, np.inf, 0.0)
+
+
+def concat_segments(first: Segment, second: Segment, travel_time) -> Segment:
+    """
+    Ghép hai đoạn liên tiếp trong O(1) (áp dụng được cho số thực hoặc mảng NumPy)
+
+    Args:
+        first: Dữ liệu đoạn đầu
+        second: Dữ liệu đoạn sau
+        travel_time: Thời gian di chuyển từ điểm cuối đoạn đầu đến điểm đầu đoạn sau
+
+    Returns:
+        Dữ liệu đoạn ghép
+    """
+    duration1, warp1, earliest1, latest1, busy1 = first
+    duration2, warp2, earliest2, latest2, busy2 = second
+
+    delta = duration1 - warp1 + travel_time
+    wait = np.maximum(earliest2 - delta - latest1, 0.0)
+    warp = np.maximum(earliest1 + delta - latest2, 0.0)
+    return (duration1 + duration2 + travel_time + wait,
+            warp1 + warp2 + warp,
+            np.maximum(earliest2 - delta, earliest1) - wait,
+            np.minimum(latest2 - delta, latest1) + warp,
+            busy1 + busy2 + travel_time)
+
+
+def _concat_scalar(first: Segment, second: Segment, travel_time: float) -> Segment:
+    """concat_segments cho số thực Python (nhanh hơn nhiều khi ghép tuần tự trong vòng lặp)"""
+    duration1, warp1, earliest1, latest1, busy1 = first
+    duration2, warp2, earliest2, latest2, busy2 = second
+
+    delta = duration1 - warp1 + travel_time
+    wait = max(earliest2 - delta - latest1, 0.0)
+    warp = max(earliest1 + delta - latest2, 0.0)
+    return (duration1 + duration2 + travel_time + wait,
+            warp1 + warp2 + warp,
+            max(earliest2 - delta, earliest1) - wait,
+            min(latest2 - delta, latest1) + warp,
+            busy1 + busy2 + travel_time)
+
+
+class TimeWindowModel:
+    """Mô hình lịch trình VRPTW: thời gian di chuyển, phục vụ, time window và trọng số phạt"""
+
+    def __init__(self, earliest: np.ndarray, latest: np.ndarray,
+                 service_time: float = 15.0, start_time: float = 480.0,
+                 speed_kmh: float = 30.0, lateness_penalty: float = 1.0,
+                 waiting_penalty: float = 0.1,
+                 travel_time_model: Optional[TravelTimeModel] = None):
+        """
+        Khởi tạo mô hình time windows
+
+        Args:
+            earliest: Mảng (N,) thời điểm sớm nhất bắt đầu phục vụ từng điểm (phút từ 0h)
+            latest: Mảng (N,) thời điểm muộn nhất bắt đầu phục vụ từng điểm
+            service_time: Thời gian phục vụ mỗi điểm (phút)
+            start_time: Thời điểm xe rời kho (hoặc có mặt tại điểm đầu tiên nếu route không có kho)
+            speed_kmh: Tốc độ trung bình để đổi khoảng cách sang thời gian di chuyển
+            lateness_penalty: Phạt (km tương đương) cho mỗi phút trễ
+            waiting_penalty: Phạt (km tương đương) cho mỗi phút chờ
+            travel_time_model: Thời gian di chuyển theo giờ xuất phát (None: tốc độ cố định speed_kmh)
+        """
+        self.earliest = np.asarray(earliest, dtype=np.float64)
+        self.latest = np.asarray(latest, dtype=np.float64)
+        self.service_time = float(service_time)
+        self.start_time = float(start_time)
+        self.minutes_per_km = 60.0 / speed_kmh
+        self.lateness_penalty = lateness_penalty
+        self.waiting_penalty = waiting_penalty
+        self.travel_time_model = travel_time_model
+
+        # Đoạn xuất phát: xe có mặt đúng lúc start_time, chưa đi quãng nào
+        self.start_segment = (0.0, 0.0, self.start_time, self.start_time, 0.0)
+
+    def node_segments(self, nodes) -> Segment:
+        """Dữ liệu đoạn gồm một điểm (chỉ số hoặc mảng chỉ số)"""
+        service = np.full(np.shape(nodes), self.service_time)
+        return (service, np.zeros(np.shape(nodes)), self.earliest[nodes],
+                self.latest[nodes], service)
+
+    def travel_times(self, distance_matrix: np.ndarray, origins, destinations, departure_times=None):
+        """
+        Thời gian di chuyển (phút) giữa các cặp điểm
+
+        Args:
+            distance_matrix: Ma trận khoảng cách (km)
+            origins, destinations: Chỉ số điểm đi / đến (số nguyên hoặc mảng)
+            departure_times: Thời điểm xuất phát (phút từ 0h); None hoặc không có
+                travel_time_model: tốc độ cố định speed_kmh
+        """
+        if self.travel_time_model is None or departure_times is None:
+            return distance_matrix[origins, destinations] * self.minutes_per_km
+        return self.travel_time_model.travel_times(
+            np.asarray(distance_matrix[origins, destinations], dtype=np.float64), departure_times)
+
+    def first_leg_times(self, distance_matrix: np.ndarray, origins, nodes):
+        """
+        Thời gian chặng đầu (kho -> điểm đầu route), xuất phát lúc start_time
+
+        Args:
+            distance_matrix: Ma trận khoảng cách (km)
+            origins: Chỉ số kho xuất phát (số nguyên hoặc mảng); None: không có kho, chặng đầu bằng 0
+            nodes: Điểm đầu route (số nguyên hoặc mảng)
+        """
+        if origins is None:
+            return np.zeros(np.broadcast(nodes).shape) if np.ndim(nodes) else 0.0
+        return self.travel_times(distance_matrix, origins, nodes,
+                                 np.full(np.broadcast(origins, nodes).shape, self.start_time))
+
+    @staticmethod
+    def departure_time(segment: Segment):
+        """
+        Thời điểm rời điểm cuối của đoạn forward (bắt đầu từ đoạn xuất phát, earliest = start_time):
+        thời điểm bắt đầu + duration - time warp
+        """
+        duration, warp, earliest, _, _ = segment
+        return earliest + duration - warp
+
+    def penalty(self, segment: Segment):
+        """Chi phí phạt (km tương đương) của một route hoàn chỉnh"""
+        duration, warp, _, _, busy = segment
+        return self.lateness_penalty * warp + self.waiting_penalty * (duration - busy)
+
+    def route_schedule(self, route: np.ndarray, distance_matrix: np.ndarray,
+                       origin: Optional[int] = None) -> 'RouteSchedule':
+        """Dữ liệu forward/backward của một route (origin: kho xuất phát) để đánh giá nước đi O(1)"""
+        return RouteSchedule(self, np.asarray(route, dtype=np.intp), distance_matrix, origin)
+
+    def route_penalty(self, route: np.ndarray, distance_matrix: np.ndarray,
+                      origin: Optional[int] = None) -> float:
+        """Chi phí phạt time window của một route (origin: kho xuất phát, None: không có kho)"""
+        if len(route) == 0:
+            return 0.0
+        return float(self.penalty(self.route_schedule(route, distance_matrix, origin)
+                                  .forward_segment(len(route) - 1)))
+
+    def route_summary(self, route: np.ndarray, distance_matrix: np.ndarray,
+                      origin: Optional[int] = None) -> Tuple[float, float, float, int]:
+        """
+        Tóm tắt lịch trình route (origin: kho xuất phát, None: không có kho)
+
+        Returns:
+            Tuple (tổng thời gian làm việc, số phút trễ, số phút chờ, số điểm phục vụ trễ)
+        """
+        if len(route) == 0:
+            return 0.0, 0.0, 0.0, 0
+        schedule = self.route_schedule(route, distance_matrix, origin)
+        duration, warp, _, _, busy = schedule.forward_segment(len(route) - 1)
+        # Điểm phục vụ trễ: time warp tích lũy tăng tại điểm đó
+        late_stops = int(np.count_nonzero(np.diff(schedule.forward[1], prepend=0.0) > 0))
+        return float(duration), float(warp), float(duration - busy), late_stops
+
+    def population_penalties(self, tours: np.ndarray, sizes: np.ndarray,
+                             distance_matrix: np.ndarray,
+                             origins: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Chi phí phạt time window của từng xe cho cả quần thể
+
+        Duyệt tuần tự theo vị trí trên tour, vector hóa theo các cá thể; tại điểm
+        đầu mỗi route đoạn được khởi tạo lại từ đoạn xuất phát, nối bằng chặng kho -> điểm đầu.
+
+        Args:
+            tours: Mảng (population, số điểm) chỉ số điểm
+            sizes: Mảng (population, số xe) số điểm của từng xe
+            distance_matrix: Ma trận khoảng cách (km)
+            origins: Mảng (population, số xe) chỉ số kho xuất phát của từng route (None: không có kho)
+
+        Returns:
+            Mảng (population, số xe) chi phí phạt
+        """
+        pop_size, num_points = tours.shape
+        penalties = np.zeros(sizes.shape, dtype=np.float64)
+        if num_points == 0:
+            return penalties
+
+        if pop_size == 1:
+            # Một giải pháp (ví dụ ALNS): ghép tuần tự trên số thực Python theo từng route,
+            # cùng thứ tự phép tính nên cho kết quả giống hệt đường vector hóa bên dưới
+            start = 0
+            for vehicle, size in enumerate(sizes[0].tolist()):
+                origin = None if origins is None else int(origins[0, vehicle])
+                penalties[0, vehicle] = self.route_penalty(tours[0, start:start + size], distance_matrix, origin)
+                start += size
+            return penalties
+
+        ends = np.cumsum(sizes, axis=1, dtype=np.intp)
+        starts = ends - sizes
+        positions = np.arange(num_points)
+        # vehicle_of[r, p]: xe phục vụ vị trí p của cá thể r
+        vehicle_of = (positions[None, :, None] >= ends[:, None, :]).sum(axis=2)
+        is_start = np.zeros((pop_size, num_points + 1), dtype=bool)
+        is_end = np.zeros((pop_size, num_points + 1), dtype=bool)
+        nonempty = sizes > 0
+        rows = np.broadcast_to(np.arange(pop_size)[:, None], sizes.shape)
+        is_start[rows[nonempty], starts[nonempty]] = True
+        is_end[rows[nonempty], ends[nonempty] - 1] = True
+
+        # origin_of[r, p]: kho xuất phát của route chứa vị trí p (chặng đầu khi p là điểm đầu route)
+        origin_of = None if origins is None else np.take_along_axis(
+            np.asarray(origins, dtype=np.intp), np.minimum(vehicle_of, sizes.shape[1] - 1), axis=1)
+
+        all_rows = np.arange(pop_size)
+        segment = None
+        for p in range(num_points):
+            nodes = tours[:, p]
+            node_segment = self.node_segments(nodes)
+            first_leg = (0.0 if origin_of is None
+                         else self.first_leg_times(distance_matrix, origin_of[:, p], nodes))
+            if p == 0:
+                previous = tuple(np.full(pop_size, value) for value in self.start_segment)
+                travel = np.zeros(pop_size) + first_leg
+            else:
+                restart = is_start[:, p]
+                previous = tuple(np.where(restart, start_value, value)
+                                 for start_value, value in zip(self.start_segment, segment))
+                travel = np.where(restart, first_leg,
+                                  self.travel_times(distance_matrix, tours[:, p - 1], nodes,
+                                                    self.departure_time(segment)))
+            segment = concat_segments(previous, node_segment, travel)
+
+            finished = is_end[:, p]
+            if finished.any():
+                finished_rows = all_rows[finished]
+                penalties[finished_rows, vehicle_of[finished_rows, p]] = self.penalty(
+                    tuple(value[finished] for value in segment))
+
+        return penalties
+
+
+class RouteSchedule:
+    """
+    Dữ liệu đoạn forward (xuất phát tại kho -> route[:i+1]) và backward (route[i:]) của một route
+
+    Cho phép tính chi phí phạt sau khi chèn điểm trong O(1) mỗi vị trí và sau khi đảo
+    đoạn (2-opt) trong O(1) khấu hao mỗi nước đi (đoạn đảo ngược mở rộng dần theo điểm cuối).
+    """
+
+    def __init__(self, model: TimeWindowModel, route: np.ndarray, distance_matrix: np.ndarray,
+                 origin: Optional[int] = None):
+        self.model = model
+        self.route = route
+        self.distance_matrix = distance_matrix
+        self.origin = origin
+        size = len(route)
+        # Chặng kho -> route[0] (0 nếu route không có kho)
+        first_leg = float(model.first_leg_times(distance_matrix, origin, route[0])) if size else 0.0
+
+        # Ghép tuần tự trên số thực Python rồi chuyển một lần sang mảng
+        node_segment = list(zip(*(field.tolist() for field in model.node_segments(route))))
+
+        # travel[i]: thời gian đi từ route[i] đến route[i + 1]; theo giờ xuất phát thì
+        # mỗi chặng tính tại thời điểm rời route[i] trong lịch trình forward
+        time_model = model.travel_time_model
+        if time_model is None:
+            travel = (model.travel_times(distance_matrix, route[:-1], route[1:]) if size else np.zeros(0)).tolist()
+        else:
+            distances = np.asarray(distance_matrix[route[:-1], route[1:]], dtype=np.float64).tolist()
+            travel = []
+
+        forward = []
+        current = model.start_segment
+        for i in range(size):
+            if i > 0 and time_model is not None:
+                travel.append(time_model.travel_time(distances[i - 1], model.departure_time(current)))
+            current = _concat_scalar(current, node_segment[i], first_leg if i == 0 else travel[i - 1])
+            forward.append(current)
+        self.forward = np.array(forward, dtype=np.float64).reshape(size, 5).T
+        self.travel = np.array(travel, dtype=np.float64)
+        # departures[i]: thời điểm rời route[i] (giờ xuất phát của các chặng mới khi đánh giá nước đi)
+        self.departures = self.model.departure_time(self.forward)
+
+        backward = [EMPTY_SEGMENT]
+        current = EMPTY_SEGMENT
+        for i in range(size - 1, -1, -1):
+            current = _concat_scalar(node_segment[i], current, travel[i] if i < size - 1 else 0.0)
+            backward.append(current)
+        backward.reverse()
+        self.backward = np.array(backward, dtype=np.float64).T
+
+        # Bản số thực Python cho reversal_penalty; đoạn đảo ngược theo điểm đầu tính khi cần
+        self._node_segments = node_segment
+        self._forward_list = forward
+        self._backward_list = backward
+        self._back_travel = None
+        self._reversed = {}
+
+    def forward_segment(self, i: int) -> Segment:
+        """Đoạn xuất phát -> route[:i+1] (i = -1: chỉ đoạn xuất phát)"""
+        return self.model.start_segment if i < 0 else tuple(self.forward[:, i])
+
+    def backward_segment(self, i: int) -> Segment:
+        """Đoạn route[i:] (i = len(route): đoạn rỗng)"""
+        return tuple(self.backward[:, i])
+
+    def penalty(self) -> float:
+        """Chi phí phạt hiện tại của route"""
+        if len(self.route) == 0:
+            return 0.0
+        return float(self.model.penalty(self.forward_segment(len(self.route) - 1)))
+
+    def insertion_penalties(self, node: int) -> np.ndarray:
+        """
+        Chi phí phạt sau khi chèn node vào từng vị trí 1..len(route) (sau route[pos - 1]), O(1) mỗi vị trí
+
+        Returns:
+            Mảng (len(route),) chi phí phạt route mới theo vị trí chèn 1..len(route)
+        """
+        size = len(self.route)
+        model = self.model
+        before = tuple(self.forward[:, :size])
+        after = tuple(self.backward[:, 1:size + 1])
+        to_node = model.travel_times(self.distance_matrix, self.route, node, self.departures)
+        from_node = np.zeros(size)
+        if size > 1:
+            from_node[:-1] = model.travel_times(self.distance_matrix, node, self.route[1:],
+                                                (self.departures + to_node + model.service_time)[:-1])
+        node_segment = model.node_segments(np.full(size, node))
+        return model.penalty(concat_segments(concat_segments(before, node_segment, to_node),
+                                             after, from_node))
+
+    def reversal_penalty(self, start: int, end: int) -> float:
+        """
+        Chi phí phạt sau khi đảo ngược route[start..end] (0 <= start <= end < len)
+
+        Đoạn đảo ngược của mỗi điểm đầu start được mở rộng dần và lưu lại: đoạn ngược
+        [start..q] = route[q] ⊕ đoạn ngược [start..q-1], O(1) mỗi bước. Mỗi truy vấn là O(1)
+        cộng số bước mở rộng còn thiếu, nên chỉ các cặp (start, end) thực sự được hỏi mới
+        tốn chi phí thay vì dựng bảng mọi cặp (i, j) cho mỗi lịch trình.
+        """
+        model = self.model
+        route = self.route
+        if self._back_travel is None:
+            # back_travel[q]: thời gian đi từ route[q + 1] về route[q]
+            self._back_travel = model.travel_times(self.distance_matrix, route[1:], route[:-1],
+                                                   self.departures[1:]).tolist()
+        reversed_segments = self._reversed.get(start)
+        if reversed_segments is None:
+            reversed_segments = self._reversed[start] = [self._node_segments[start]]
+        for q in range(start + len(reversed_segments), end + 1):
+            reversed_segments.append(_concat_scalar(self._node_segments[q], reversed_segments[-1],
+                                                    self._back_travel[q - 1]))
+
+        segment = self.model.start_segment if start == 0 else self._forward_list[start - 1]
+        if start == 0:
+            travel = float(model.first_leg_times(self.distance_matrix, self.origin, route[end]))
+        else:
+            travel = float(model.travel_times(self.distance_matrix, route[start - 1], route[end],
+                                              self.departures[start - 1]))
+        segment = _concat_scalar(segment, reversed_segments[end - start], travel)
+        if end + 1 < len(route):
+            travel = float(model.travel_times(self.distance_matrix, route[start], route[end + 1],
+                                              self.departures[end]))
+            segment = _concat_scalar(segment, self._backward_list[end + 1], travel)
+        return float(model.penalty(segment))
+
+
+def two_opt_route_tw(route: np.ndarray, distance_matrix: np.ndarray, neighbor_lists: np.ndarray,
+                     model: TimeWindowModel, first_improvement: bool = True,
+                     anchor: Optional[int] = None, origin: Optional[int] = None) -> Tuple[np.ndarray, float]:
+    """
+    2-opt có xét time window: chi phí nước đi = delta khoảng cách + delta phạt time window
+
+    Route được xem là đường đi bắt đầu tại route[0] (điểm đầu cố định về thời gian);
+    mỗi nước đi cắt hai cạnh (p, p+1), (q, q+1) với p < q và đảo route[p+1..q].
+    Delta khoảng cách O(1) như local_search.two_opt_route, delta phạt qua
+    RouteSchedule.reversal_penalty (đoạn đảo ngược mở rộng dần, không dựng bảng mọi cặp (i, j)).
+    Khi có anchor (kho, hoặc điểm kết thúc ảo của route mở) route được tối ưu như chu trình
+    [anchor] + route với anchor cố định ở đầu, lịch trình xuất phát từ kho origin.
+
+    Args:
+        route: Mảng chỉ số điểm của route
+        distance_matrix: Ma trận khoảng cách (N, N)
+        neighbor_lists: Mảng (N, k) láng giềng gần nhất
+        model: Mô hình time windows
+        first_improvement: Áp dụng ngay nước đi cải thiện đầu tiên
+        anchor: Điểm neo nối hai đầu route (None: route khép kín qua route[0])
+        origin: Kho xuất phát của lịch trình và chặng đầu (None: chặng đầu đi từ anchor)
+
+    Returns:
+        Tuple (route mới, tổng chi phí giảm được)
+    """
+    route = np.array(route, copy=True)
+    # Với điểm neo, route[0] là anchor và các điểm giao hàng bắt đầu từ vị trí offset
+    offset = 0 if anchor is None else 1
+    if anchor is not None:
+        route = np.concatenate(([anchor], route)).astype(route.dtype)
+    size = len(route)
+    if size <= 2:
+        return route[offset:], 0.0
+
+    dist = distance_matrix
+    # Chặng đầu anchor -> điểm đầu tính từ kho xuất phát (route mở: điểm neo là điểm kết thúc ảo)
+    head = origin if origin is not None else anchor
+    pos = np.full(len(dist), -1, dtype=np.intp)
+    total_gain = 0.0
+    schedule = model.route_schedule(route[offset:], dist, origin)
+    # Nước đi bị loại vì delta thực tế không cải thiện (chỉ xảy ra khi delta phạt là xấp xỉ)
+    rejected = set()
+
+    while True:
+        pos[route] = np.arange(size)
+        current_penalty = schedule.penalty()
+        best_move, best_delta = None, IMPROVEMENT_EPS
+
+        for i, a in enumerate(route.tolist()):
+            d_succ = dist[a, route[(i + 1) % size]]
+            d_pred = dist[route[i - 1], a]
+            for c in neighbor_lists[a]:
+                j = pos[c]
+                if j < 0 or j == i:
+                    continue
+                # Cùng tiêu chí cắt tỉa láng giềng như local_search.two_opt_route
+                if dist[a, c] >= d_succ and dist[a, c] >= d_pred:
+                    break
+                # Hướng tiến: cắt (a, succ a), (c, succ c); hướng lùi: cắt (pred a, a), (pred c, c)
+                for p, q in ((i, j), ((i - 1) % size, (j - 1) % size)):
+                    p, q = min(p, q), max(p, q)
+                    # Hai cạnh kề nhau (kể cả cạnh khép kín với cạnh đầu) không tạo nước đi; có
+                    # điểm neo thì đảo cả route vẫn đổi chiều lịch trình
+                    if q - p < 2 or (p == 0 and q == size - 1 and not offset):
+                        continue
+                    u, u_next = route[p], route[p + 1]
+                    v, v_next = route[q], route[(q + 1) % size]
+                    if p == 0 and offset:
+                        u = head
+                    distance_delta = dist[u, v] + dist[u_next, v_next] - dist[u, u_next] - dist[v, v_next]
+                    # Phạt mới không âm: nước đi không thể tốt hơn best_delta thì bỏ qua
+                    if distance_delta - current_penalty >= best_delta or (p + 1, q) in rejected:
+                        continue
+                    delta = distance_delta + schedule.reversal_penalty(p + 1 - offset, q - offset) - current_penalty
+                    if delta < best_delta:
+                        best_move, best_delta = (p + 1, q, distance_delta), delta
+                if first_improvement and best_move is not None:
+                    break
+            if first_improvement and best_move is not None:
+                break
+
+        if best_move is None:
+            break
+        start, end, distance_delta = best_move
+        route[start:end + 1] = route[start:end + 1][::-1]
+
+        # Kiểm tra lại bằng lịch trình mới (chính xác); không cải thiện thì hoàn tác để
+        # đánh giá xấp xỉ theo khung giờ không làm vòng lặp đi tới đi lui mãi
+        new_schedule = model.route_schedule(route[offset:], dist, origin)
+        actual_delta = distance_delta + new_schedule.penalty() - current_penalty
+        if actual_delta >= IMPROVEMENT_EPS:
+            route[start:end + 1] = route[start:end + 1][::-1]
+            rejected.add((start, end))
+            continue
+        schedule = new_schedule
+        rejected.clear()
+        total_gain -= actual_delta
+
+    return route[offset:], total_gain
+
+
+def two_opt_solution_tw(tour: np.ndarray, sizes: np.ndarray, distance_matrix: np.ndarray,
+                        neighbor_lists: np.ndarray, model: TimeWindowModel,
+                        first_improvement: bool = True) -> np.ndarray:
+    """
+    Áp dụng 2-opt có xét time window cho từng route của giải pháp (tour, sizes)
+
+    Returns:
+        Tour mới (sizes không đổi)
+    """
+    improved = np.array(tour, copy=True)
+    start = 0
+    for size in sizes.tolist():
+        if size > 2:
+            improved[start:start + size], _ = two_opt_route_tw(
+                improved[start:start + size], distance_matrix, neighbor_lists, model, first_improvement)
+        start += size
+    return improved
+
+
+def two_opt_solution_tw_anchored(tour: np.ndarray, sizes: np.ndarray, distance_matrix: np.ndarray,
+                                 neighbor_lists: np.ndarray, model: TimeWindowModel, anchors: np.ndarray,
+                                 origins: Optional[np.ndarray] = None,
+                                 first_improvement: bool = True) -> np.ndarray:
+    """
+    2-opt có xét time window khi route nối qua điểm neo (như local_search.two_opt_solution_anchored):
+    route r được tối ưu như chu trình [anchors[r]] + route, lịch trình xuất phát từ kho origins[r]
+
+    Args:
+        tour, sizes: Giải pháp đã mã hóa
+        distance_matrix: Ma trận khoảng cách chứa cả các điểm neo
+        neighbor_lists: Danh sách láng giềng có hàng cho cả các điểm neo
+        model: Mô hình time windows
+        anchors: Mảng (số xe,) chỉ số điểm neo của từng route
+        origins: Mảng (số xe,) chỉ số kho xuất phát của từng route (None: không có kho)
+        first_improvement: Áp dụng ngay nước đi cải thiện đầu tiên
+
+    Returns:
+        Tour mới (sizes không đổi)
+    """
+    improved = np.array(tour, copy=True)
+    anchors = np.asarray(anchors).tolist()
+    origins = [None] * len(anchors) if origins is None else np.asarray(origins).tolist()
+    start = 0
+    for size, anchor, origin in zip(sizes.tolist(), anchors, origins):
+        if size > 1:
+            improved[start:start + size], _ = two_opt_route_tw(
+                improved[start:start + size], distance_matrix, neighbor_lists, model, first_improvement,
+                anchor=anchor, origin=origin)
+        start += size
+    return improved
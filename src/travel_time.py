@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Thời gian di chuyển phụ thuộc thời điểm xuất phát
+
+Tốc độ được cho theo từng khung thời gian (mặc định 15 phút) trong ngày. Thời gian
+di chuyển theo mô hình Ichoua-Gendreau-Potvin (tốc độ thay đổi khi xe đi qua ranh
+giới khung) nên thỏa FIFO: xuất phát muộn hơn không bao giờ đến sớm hơn.
+
+TravelTimeModel tính trực tiếp từng chặng từ quãng đường và thời điểm xuất phát
+(không cần bảng N x N) - dùng cho fitness VRPTW và lịch trình kết quả.
+TravelTimeTensor tính trước bảng (khung, điểm đi, điểm đến) cho tra cứu hàng loạt;
+giữa hai mốc khung thời gian di chuyển được nội suy tuyến tính - vẫn giữ FIFO vì độ
+dốc luôn >= -1. Bảng tốn (số khung + 1) x N x N phần tử nên bị chặn bởi max_bytes.
+"""
+
+import bisect
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+# Kích thước tối đa mặc định của TravelTimeTensor (byte)
+TENSOR_MAX_BYTES = 512 * 1024 ** 2
+
+
+def rush_hour_speed_profile(rush_hours: List[Tuple[int, int]], base_speed: float = 30.0,
+                            rush_speed: float = 20.0, bucket_minutes: int = 15) -> np.ndarray:
+    """
+    Hồ sơ tốc độ theo khung thời gian từ danh sách giờ cao điểm
+
+    Args:
+        rush_hours: Danh sách (bắt đầu, kết thúc) giờ cao điểm tính bằng phút từ 0h
+        base_speed: Tốc độ giờ bình thường (km/h)
+        rush_speed: Tốc độ giờ cao điểm (km/h)
+        bucket_minutes: Độ dài mỗi khung (phút)
+
+    Returns:
+        Mảng (số khung trong ngày,) tốc độ km/h
+    """
+    bucket_starts = np.arange(0, MINUTES_PER_DAY, bucket_minutes)
+    speeds = np.full(len(bucket_starts), base_speed, dtype=np.float64)
+    for rush_start, rush_end in rush_hours:
+        speeds[(bucket_starts >= rush_start) & (bucket_starts < rush_end)] = rush_speed
+    return speeds
+
+
+class TravelTimeModel:
+    """Thời gian di chuyển (phút) của từng chặng theo quãng đường và thời điểm xuất phát"""
+
+    def __init__(self, speed_profile: Sequence[float], bucket_minutes: int = 15):
+        """
+        Khởi tạo mô hình từ hồ sơ tốc độ
+
+        Args:
+            speed_profile: Tốc độ (km/h) của từng khung, bao phủ một ngày
+                (len(speed_profile) * bucket_minutes = 1440); ngày sau lặp lại hồ sơ
+            bucket_minutes: Độ dài mỗi khung (phút)
+        """
+        speeds = np.asarray(speed_profile, dtype=np.float64)
+        if len(speeds) * bucket_minutes != MINUTES_PER_DAY:
+            raise ValueError(f"speed_profile phai bao phu dung mot ngay: "
+                             f"{len(speeds)} khung x {bucket_minutes} phut")
+        if np.any(speeds <= 0):
+            raise ValueError("Toc do trong speed_profile phai lon hon 0")
+
+        self.bucket_minutes = bucket_minutes
+        self.num_buckets = len(speeds)
+        self.speed_profile = speeds
+
+        # Quãng đường tích lũy đi được từ 0h theo thời gian (hai ngày để chuyến
+        # xuất phát cuối ngày vẫn tính được), hàm tuyến tính từng khúc tăng ngặt
+        self.breakpoints = np.arange(2 * self.num_buckets + 1) * float(bucket_minutes)
+        self.cumulative_km = np.concatenate(
+            [[0.0], np.cumsum(np.tile(speeds, 2) * bucket_minutes / 60.0)])
+        # Bản số thực Python cho travel_time (tra từng chặng trong vòng lặp)
+        self._breakpoints = self.breakpoints.tolist()
+        self._cumulative_km = self.cumulative_km.tolist()
+        self._speeds = np.tile(speeds, 2).tolist()
+
+    def travel_times(self, distances, departure_times):
+        """
+        Thời gian di chuyển (phút) vector hóa
+
+        Args:
+            distances: Quãng đường (km, số thực hoặc mảng)
+            departure_times: Thời điểm xuất phát (phút từ 0h, broadcast với distances)
+
+        Returns:
+            Thời gian di chuyển (phút)
+        """
+        departure = np.mod(departure_times, MINUTES_PER_DAY)
+        start_km = np.interp(departure, self.breakpoints, self.cumulative_km)
+        return np.interp(start_km + distances, self.cumulative_km, self.breakpoints) - departure
+
+    def travel_time(self, distance: float, departure_time: float) -> float:
+        """Thời gian di chuyển (phút) của một chặng (số thực Python, O(log số khung))"""
+        departure = departure_time % MINUTES_PER_DAY
+        bucket = min(int(departure // self.bucket_minutes), self.num_buckets - 1)
+        start_km = self._cumulative_km[bucket] + self._speeds[bucket] * (departure - self._breakpoints[bucket]) / 60.0
+        target_km = start_km + distance
+        end = min(bisect.bisect_right(self._cumulative_km, target_km, lo=bucket), len(self._speeds)) - 1
+        arrival = self._breakpoints[end] + (target_km - self._cumulative_km[end]) * 60.0 / self._speeds[end]
+        return arrival - departure
+
+    def route_arrivals(self, route: Sequence[int], distance_matrix: np.ndarray, start_time: float,
+                       service_time: float = 0.0,
+                       earliest: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Thời điểm đến từng điểm của route (như TravelTimeTensor.route_arrivals, chỉ tính các chặng của route)
+
+        Args:
+            route: Chỉ số điểm theo thứ tự
+            distance_matrix: Ma trận khoảng cách (km)
+            start_time: Thời điểm có mặt tại điểm đầu tiên
+            service_time: Thời gian phục vụ mỗi điểm (phút)
+            earliest: Mảng (N,) thời điểm sớm nhất được phục vụ (xe chờ nếu đến sớm); None: không chờ
+
+        Returns:
+            Mảng thời điểm đến từng điểm
+        """
+        arrivals = np.empty(len(route))
+        current_time = float(start_time)
+        for k, node in enumerate(route):
+            if k > 0:
+                current_time += self.travel_time(float(distance_matrix[route[k - 1], node]), current_time)
+            arrivals[k] = current_time
+            if earliest is not None:
+                current_time = max(current_time, float(earliest[node]))
+            current_time += service_time
+        return arrivals
+
+
+class TravelTimeTensor:
+    """Bảng tra thời gian di chuyển (phút) theo (khung thời gian, điểm đi, điểm đến)"""
+
+    def __init__(self, distance_matrix: np.ndarray, speed_profile: Sequence[float],
+                 bucket_minutes: int = 15, dtype=np.float32,
+                 max_bytes: Optional[int] = TENSOR_MAX_BYTES):
+        """
+        Tính trước tensor thời gian di chuyển
+
+        Args:
+            distance_matrix: Ma trận khoảng cách (N, N) tính bằng km
+            speed_profile: Tốc độ (km/h) của từng khung, bao phủ một ngày
+                (len(speed_profile) * bucket_minutes = 1440); ngày sau lặp lại hồ sơ
+            bucket_minutes: Độ dài mỗi khung (phút)
+            dtype: Kiểu dữ liệu của tensor
+            max_bytes: Kích thước tensor tối đa (byte); None: không giới hạn
+        """
+        model = TravelTimeModel(speed_profile, bucket_minutes)
+        self.bucket_minutes = bucket_minutes
+        self.num_buckets = model.num_buckets
+        self.speed_profile = model.speed_profile
+        breakpoints, cumulative_km = model.breakpoints, model.cumulative_km
+
+        distances = np.asarray(distance_matrix, dtype=np.float64)
+        num_bytes = (self.num_buckets + 1) * distances.size * np.dtype(dtype).itemsize
+        if max_bytes is not None and num_bytes > max_bytes:
+            raise ValueError(f"TravelTimeTensor can {num_bytes / 1024 ** 2:.0f} MB, vuot gioi han "
+                             f"{max_bytes / 1024 ** 2:.0f} MB; dung TravelTimeModel de tinh tung chang")
+
+        # tensor[b, i, j]: thời gian đi i -> j khi xuất phát đúng đầu khung b;
+        # thêm khung num_buckets (= đầu ngày hôm sau) để nội suy khung cuối
+        self.tensor = np.empty((self.num_buckets + 1,) + distances.shape, dtype=dtype)
+        for bucket in range(self.num_buckets + 1):
+            departure = breakpoints[bucket]
+            arrival = np.interp(cumulative_km[bucket] + distances, cumulative_km, breakpoints)
+            self.tensor[bucket] = arrival - departure
+
+    def _bucket_position(self, departure_time):
+        """Khung thời gian và tỷ lệ vị trí trong khung của thời điểm xuất phát"""
+        position = np.mod(departure_time, MINUTES_PER_DAY) / self.bucket_minutes
+        bucket = np.minimum(np.floor(position).astype(np.intp), self.num_buckets - 1)
+        return bucket, position - bucket
+
+    def travel_time(self, origins, destinations, departure_time):
+        """
+        Thời gian di chuyển (phút) khi xuất phát tại departure_time (nội suy tuyến tính trong khung)
+
+        Args:
+            origins, destinations: Chỉ số điểm đi/đến (số nguyên hoặc mảng)
+            departure_time: Thời điểm xuất phát (phút từ 0h, số thực hoặc mảng)
+
+        Returns:
+            Thời gian di chuyển (phút)
+        """
+        bucket, fraction = self._bucket_position(departure_time)
+        start = self.tensor[bucket, origins, destinations]
+        end = self.tensor[bucket + 1, origins, destinations]
+        return start + fraction * (end - start)
+
+    def arrival_time(self, origins, destinations, departure_time):
+        """Thời điểm đến khi xuất phát tại departure_time"""
+        return departure_time + self.travel_time(origins, destinations, departure_time)
+
+    def route_arrivals(self, route: Sequence[int], start_time: float,
+                       service_time: float = 0.0,
+                       earliest: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Thời điểm đến từng điểm của route (mỗi chặng là một lần tra bảng)
+
+        Args:
+            route: Chỉ số điểm theo thứ tự
+            start_time: Thời điểm có mặt tại điểm đầu tiên
+            service_time: Thời gian phục vụ mỗi điểm (phút)
+            earliest: Mảng (N,) thời điểm sớm nhất được phục vụ (xe chờ nếu đến sớm); None: không chờ
+
+        Returns:
+            Mảng thời điểm đến từng điểm
+        """
+        arrivals = np.empty(len(route))
+        current_time = float(start_time)
+        for k, node in enumerate(route):
+            if k > 0:
+                current_time = float(self.arrival_time(route[k - 1], node, current_time))
+            arrivals[k] = current_time
+            if earliest is not None:
+                current_time = max(current_time, float(earliest[node]))
+            current_time += service_time
+        return arrivals
@@ -7,13 +7,179 @@ Advanced Genetic Algorithm for Multi-Vehicle TSP with Time Windows
 
 import pandas as pd
 import numpy as np
-import random
 import math
 import time
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Sequence, Callable, Iterator, Union
 import json
+import queue
+import threading
+import copy
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from datetime import datetime, timedelta
 
+from local_search import (two_opt_solution, two_opt_solution_anchored,
+                          InterRouteLocalSearch)
+from split import SPLIT_OBJECTIVES, split_giant_tour
+from history import HistoryRecorder
+from kernels import NUMBA_AVAILABLE, population_route_distances_kernel
+from time_windows import TimeWindowModel, two_opt_solution_tw, two_opt_solution_tw_anchored
+from travel_time import TravelTimeModel, TravelTimeTensor, rush_hour_speed_profile
+from pareto import crowded_order, crowded_tournament, pareto_front_indices
+from capacity import CapacityModel
+from spatial_index import GridIndex, project_coordinates
+from construction import (nearest_neighbor_routes, regret_insertion_routes, savings_routes,
+                          sweep_routes)
+
+EARTH_RADIUS_KM = 6371  # Bán kính Trái Đất (km)
+
+# Giải pháp mã hóa: (tour, sizes) - hoán vị chỉ số điểm và số điểm của từng xe
+Solution = Tuple[np.ndarray, np.ndarray]
+# Quần thể: (tours, sizes) - mảng 2 chiều (population × số điểm) và (population × số xe)
+Population = Tuple[np.ndarray, np.ndarray]
+
+
+def haversine_matrix(coords_array: np.ndarray, dtype=np.float64,
+                     block_size: int = 1024) -> np.ndarray:
+    """
+    Tính ma trận khoảng cách Haversine N×N cho toàn bộ các điểm (vector hóa)
+    
+    Args:
+        coords_array: Mảng (N, 2) chứa (latitude, longitude) theo độ
+        dtype: Kiểu dữ liệu của ma trận kết quả (np.float32 hoặc np.float64)
+        block_size: Số hàng tính mỗi lần để giới hạn bộ nhớ tạm
+        
+    Returns:
+        Ma trận khoảng cách (N, N) tính bằng km
+    """
+    coords_rad = np.radians(np.asarray(coords_array, dtype=np.float64))
+    lat, lon = coords_rad[:, 0], coords_rad[:, 1]
+    cos_lat = np.cos(lat)
+    n = len(coords_rad)
+    
+    matrix = np.empty((n, n), dtype=dtype)
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        dphi = lat[None, :] - lat[start:end, None]
+        dlambda = lon[None, :] - lon[start:end, None]
+        
+        a = (np.sin(dphi / 2) ** 2 +
+             cos_lat[start:end, None] * cos_lat[None, :] * np.sin(dlambda / 2) ** 2)
+        np.clip(a, 0.0, 1.0, out=a)
+        
+        matrix[start:end] = 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
+    return matrix
+
+
+# Bộ nhớ đệm nhãn K-means trong process: khóa (hash tọa độ, số cụm, seed)
+_KMEANS_CACHE: Dict[Tuple[str, int, int], np.ndarray] = {}
+
+
+def kmeans_labels(coords_array: np.ndarray, n_clusters: int, seed: int = 42,
+                  n_init: int = 10, cache_dir: Optional[str] = None) -> np.ndarray:
+    """
+    Nhãn cụm K-means của các điểm, tính một lần cho mỗi bộ (tọa độ, số cụm, seed)
+    
+    Kết quả được ghi nhớ trong process và (nếu có cache_dir) trên đĩa dạng .npy;
+    khi trúng cache không cần import sklearn. Nếu không có sklearn, dùng K-means
+    thuần NumPy (k-means++ + Lloyd) với cùng seed nên vẫn tất định.
+    
+    Args:
+        coords_array: Mảng (N, 2) tọa độ các điểm
+        n_clusters: Số cụm (số xe)
+        seed: Seed cho khởi tạo tâm cụm
+        n_init: Số lần khởi tạo, giữ kết quả có inertia nhỏ nhất
+        cache_dir: Thư mục lưu cache trên đĩa (None: chỉ cache trong bộ nhớ)
+        
+    Returns:
+        Mảng (N,) nhãn cụm (chỉ đọc, dùng chung giữa các lần gọi)
+    """
+    coords_array = np.ascontiguousarray(coords_array, dtype=np.float64)
+    digest = hashlib.sha1(coords_array.tobytes()).hexdigest()
+    key = (digest, n_clusters, seed)
+    
+    labels = _KMEANS_CACHE.get(key)
+    if labels is not None:
+        return labels
+    
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = os.path.join(cache_dir, f"kmeans_{digest[:16]}_k{n_clusters}_s{seed}.npy")
+        if os.path.exists(cache_file):
+            labels = np.load(cache_file)
+    
+    if labels is None:
+        try:
+            from sklearn.cluster import KMeans
+        except ImportError:
+            labels = _numpy_kmeans(coords_array, n_clusters, seed, n_init)
+        else:
+            kmeans = KMeans(n_clusters=n_clusters, random_state=seed, n_init=n_init)
+            labels = kmeans.fit_predict(coords_array)
+        labels = np.asarray(labels, dtype=np.int32)
+        
+        if cache_file is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(cache_file, labels)
+    
+    labels.setflags(write=False)
+    _KMEANS_CACHE[key] = labels
+    return labels
+
+
+def _numpy_kmeans(points: np.ndarray, n_clusters: int, seed: int, n_init: int,
+                  max_iter: int = 300, tol: float = 1e-4) -> np.ndarray:
+    """K-means thuần NumPy: khởi tạo k-means++ và lặp Lloyd, chọn lần chạy có inertia nhỏ nhất"""
+    rng = np.random.default_rng(seed)
+    n = len(points)
+    n_clusters = min(n_clusters, n)
+    # Ngưỡng hội tụ tương đối theo phương sai dữ liệu (giống sklearn)
+    tol = tol * points.var(axis=0).mean()
+    
+    best_labels, best_inertia = None, np.inf
+    for _ in range(max(1, n_init)):
+        # k-means++: chọn tâm tiếp theo với xác suất tỷ lệ bình phương khoảng cách
+        centers = np.empty((n_clusters, points.shape[1]))
+        centers[0] = points[rng.integers(n)]
+        closest = ((points - centers[0]) ** 2).sum(axis=1)
+        for c in range(1, n_clusters):
+            total = closest.sum()
+            idx = rng.choice(n, p=closest / total) if total > 0 else rng.integers(n)
+            centers[c] = points[idx]
+            np.minimum(closest, ((points - centers[c]) ** 2).sum(axis=1), out=closest)
+        
+        for _ in range(max_iter):
+            sq_dist = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+            labels = sq_dist.argmin(axis=1)
+            
+            counts = np.bincount(labels, minlength=n_clusters)
+            new_centers = np.zeros_like(centers)
+            np.add.at(new_centers, labels, points)
+            nonempty = counts > 0
+            new_centers[nonempty] /= counts[nonempty, None]
+            # Cụm rỗng: đặt lại tâm vào điểm xa tâm của nó nhất
+            for c in np.flatnonzero(~nonempty):
+                far = sq_dist[np.arange(n), labels].argmax()
+                new_centers[c] = points[far]
+                sq_dist[far] = 0.0
+            
+            shift = ((new_centers - centers) ** 2).sum()
+            centers = new_centers
+            if shift <= tol:
+                break
+        
+        sq_dist = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = sq_dist.argmin(axis=1)
+        inertia = sq_dist[np.arange(n), labels].sum()
+        if inertia < best_inertia:
+            best_labels, best_inertia = labels, inertia
+    
+    return best_labels
+
+
 class MultiVehicleTSPGA:
     """Thuật toán di truyền giải bài toán Multi-Vehicle TSP với Time Windows"""
     
@@ -23,7 +189,39 @@ class MultiVehicleTSPGA:
                  generations: int = 500,
                  mutation_rate: float = 0.1,
                  elite_ratio: float = 0.1,
-                 time_windows: Optional[Dict[str, Tuple[int, int]]] = None):
+                 time_windows: Optional[Dict[str, Tuple[int, int]]] = None,
+                 distance_dtype: str = 'float64',
+                 n_workers: Optional[int] = None,
+                 verbose: bool = True,
+                 neighbor_k: int = 16,
+                 two_opt_mode: str = 'first',
+                 memetic_rate: float = 0.0,
+                 crossover: str = 'random_split',
+                 mutation: str = 'swap',
+                 construction_mix: Optional[Dict[str, float]] = None,
+                 kmeans_cache_dir: Optional[str] = None,
+                 split: Optional[str] = None,
+                 history_policy: str = 'downsample',
+                 history_max_points: int = 2000,
+                 history_path: Optional[str] = None,
+                 vrptw: bool = False,
+                 lateness_penalty: float = 1.0,
+                 waiting_penalty: float = 0.1,
+                 speed_profile: Optional[Sequence[float]] = None,
+                 time_bucket_minutes: int = 15,
+                 time_limit_s: Optional[float] = None,
+                 target_fitness: Optional[float] = None,
+                 stagnation_threshold: int = 2000,
+                 seed: Optional[int] = None,
+                 nsga2: bool = False,
+                 demands: Optional[Dict[str, float]] = None,
+                 vehicle_capacities: Optional[Union[float, Sequence[float]]] = None,
+                 max_route_duration: Optional[Union[float, Sequence[float]]] = None,
+                 capacity_penalty: float = 50.0,
+                 duration_penalty: float = 1.0,
+                 depots: Optional[Dict[str, Tuple[float, float]]] = None,
+                 vehicle_depots: Optional[Sequence[str]] = None,
+                 open_routes: bool = False):
         """
         Khởi tạo thuật toán di truyền Multi-Vehicle TSP
         
@@ -35,6 +233,53 @@ class MultiVehicleTSPGA:
             mutation_rate: Tỷ lệ đột biến
             elite_ratio: Tỷ lệ elitism
             time_windows: Time windows cho từng điểm (start_time, end_time) tính bằng phút từ 0h
+            distance_dtype: Kiểu dữ liệu ma trận khoảng cách ('float32' hoặc 'float64')
+            n_workers: Số process song song để đánh giá fitness và tạo thế hệ con
+                (None hoặc 1: chạy trong process hiện tại)
+            verbose: In tiến độ ra màn hình
+            neighbor_k: Số láng giềng gần nhất dùng làm ứng viên cho 2-opt
+            two_opt_mode: 'first' (first-improvement) hoặc 'best' (best-improvement)
+            memetic_rate: Tỷ lệ con được cải thiện bằng 2-opt ngay khi tạo (memetic GA)
+            crossover: Toán tử crossover trong CROSSOVER_OPERATORS
+                ('random_split', 'ox', 'best_route', 'eax_lite')
+            mutation: Toán tử mutation trong MUTATION_OPERATORS: 'swap' (hoán đổi ngẫu nhiên
+                trong route) hoặc 'neighbor' (nối một điểm với một láng giềng gần của nó)
+            construction_mix: Tỷ lệ quần thể ban đầu theo heuristic trong CONSTRUCTION_HEURISTICS,
+                ví dụ {'savings': 0.25, 'regret': 0.25, 'sweep': 0.25, 'clustered': 0.25}; giải pháp
+                đầu tiên của mỗi heuristic là bản tất định, các giải pháp sau được ngẫu nhiên hóa.
+                None: như cũ (K-means / chia vùng địa lý / ngẫu nhiên)
+            kmeans_cache_dir: Thư mục cache nhãn K-means trên đĩa (None: chỉ cache trong bộ nhớ)
+            split: Chia giant tour tối ưu cho các xe bằng Split decoder ('total' hoặc
+                'makespan'); None: giữ cách chia số điểm của từng toán tử
+            history_policy: Cách giữ lịch sử fitness trong bộ nhớ ('full', 'ring', 'downsample')
+            history_max_points: Số điểm lịch sử fitness tối đa ('ring', 'downsample')
+            history_path: File JSON Lines ghi đầy đủ lịch sử ra đĩa (None: chỉ giữ trong bộ nhớ)
+            vrptw: Tối ưu theo time windows: fitness cộng thêm phạt trễ giờ và chờ đợi,
+                2-opt và chèn điểm xét time window (đánh giá O(1) qua time_windows.RouteSchedule)
+            lateness_penalty: Phạt (km tương đương) cho mỗi phút trễ (chế độ vrptw)
+            waiting_penalty: Phạt (km tương đương) cho mỗi phút chờ (chế độ vrptw)
+            speed_profile: Tốc độ (km/h) theo từng khung thời gian trong ngày cho lịch trình
+                (None: 30 km/h, 20 km/h trong giờ cao điểm)
+            time_bucket_minutes: Độ dài mỗi khung của speed_profile (phút)
+            time_limit_s: Ngân sách thời gian (giây) cho một lần chạy, tính từ lúc gọi
+                (None: không giới hạn); hết giờ thì dừng tiến hóa và trả giải pháp tốt nhất
+            target_fitness: Dừng ngay khi fitness tốt nhất đạt ngưỡng này (None: không dùng)
+            stagnation_threshold: Số thế hệ liên tiếp không cải thiện thì dừng sớm
+            seed: Seed của bộ sinh số ngẫu nhiên numpy.random.Generator dùng cho mọi bước
+                ngẫu nhiên và K-means (None: seed ngẫu nhiên, K-means dùng seed 42)
+            nsga2: Tối ưu đa mục tiêu (khoảng cách, cân bằng tải) bằng NSGA-II; kết quả có
+                thêm 'pareto_front' gồm toàn bộ front Pareto của quần thể cuối
+            demands: Nhu cầu của từng điểm (None: mỗi điểm 1 đơn vị khi có vehicle_capacities)
+            vehicle_capacities: Tải trọng tối đa (một giá trị cho mọi xe hoặc danh sách theo xe)
+            max_route_duration: Thời lượng route tối đa (phút, một giá trị hoặc danh sách theo xe),
+                tính bằng quãng đường ở 30 km/h cộng thời gian phục vụ
+            capacity_penalty: Phạt (km tương đương) cho mỗi đơn vị vượt tải
+            duration_penalty: Phạt (km tương đương) cho mỗi phút vượt thời lượng
+            depots: Tọa độ các kho (một hoặc nhiều); mỗi route xuất phát từ kho và quay về kho.
+                None: route là chu trình khép kín qua các điểm giao hàng như trước
+            vehicle_depots: Tên kho của từng xe (cố định); None: mỗi route dùng kho cho
+                chi phí nối nhỏ nhất (gán kho được giải trong hàm đánh giá của GA)
+            open_routes: Route mở: xe không quay về kho / điểm đầu sau điểm giao cuối cùng
         """
         self.coords = coords
         self.locations = list(coords.keys())
@@ -43,6 +288,37 @@ class MultiVehicleTSPGA:
         self.generations = generations
         self.mutation_rate = mutation_rate
         self.elite_size = int(population_size * elite_ratio)
+        self.n_workers = n_workers
+        self.verbose = verbose
+        self.memetic_rate = memetic_rate
+        
+        # Một Generator duy nhất cho mọi bước ngẫu nhiên; mỗi con trong _breed_offspring
+        # dùng luồng riêng sinh từ seed lấy từ Generator này
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        
+        if two_opt_mode not in ('first', 'best'):
+            raise ValueError(f"two_opt_mode phai la 'first' hoac 'best', nhan duoc: {two_opt_mode}")
+        self.two_opt_mode = two_opt_mode
+        
+        if crossover not in CROSSOVER_OPERATORS:
+            raise ValueError(f"crossover phai la mot trong {sorted(CROSSOVER_OPERATORS)}, nhan duoc: {crossover}")
+        self.crossover = crossover
+        
+        if mutation not in MUTATION_OPERATORS:
+            raise ValueError(f"mutation phai la mot trong {sorted(MUTATION_OPERATORS)}, nhan duoc: {mutation}")
+        self.mutation = mutation
+        
+        if construction_mix is not None:
+            unknown = sorted(set(construction_mix) - set(CONSTRUCTION_HEURISTICS))
+            if unknown or min(construction_mix.values(), default=0) < 0 or sum(construction_mix.values()) <= 0:
+                raise ValueError(f"construction_mix phai gom ty le khong am cua {sorted(CONSTRUCTION_HEURISTICS)}, "
+                                 f"nhan duoc: {construction_mix}")
+        self.construction_mix = construction_mix
+        
+        if split is not None and split not in SPLIT_OBJECTIVES:
+            raise ValueError(f"split phai la None hoac mot trong {SPLIT_OBJECTIVES}, nhan duoc: {split}")
+        self.split = split
         
         # Time windows (mặc định: 8h-18h cho tất cả điểm)
         self.time_windows = time_windows or {
@@ -54,14 +330,110 @@ class MultiVehicleTSPGA:
         
         # Không phân chia theo quận/huyện, chỉ tối ưu theo tọa độ phường/xã
         
-        # Lưu lịch sử tiến hóa
-        self.fitness_history = []
-        self.best_routes_history = []
-        
-        # Thêm logic dừng sớm
-        self.stagnation_threshold = 2000  # Tăng lên 2000 thế hệ để hội tụ hoàn toàn
+        # Thời gian bắt đầu làm việc và thời gian giao hàng mỗi điểm (phút)
+        self.start_time = 480  # 8h sáng
+        self.service_time = 15
+        
+        # Hồ sơ tốc độ theo khung thời gian: thời gian từng chặng tính trực tiếp theo giờ
+        # xuất phát (fitness VRPTW và lịch trình kết quả); tensor N x N chỉ dựng khi được yêu cầu
+        self.time_bucket_minutes = time_bucket_minutes
+        self.speed_profile = (np.asarray(speed_profile, dtype=np.float64) if speed_profile is not None
+                              else rush_hour_speed_profile(self.rush_hours, bucket_minutes=time_bucket_minutes))
+        self.travel_time_model = TravelTimeModel(self.speed_profile, time_bucket_minutes)
+        self._travel_time_tensor = None
+        
+        # Ma trận khoảng cách tính trước một lần, truy cập bằng chỉ số nguyên
+        if distance_dtype not in ('float32', 'float64'):
+            raise ValueError(f"distance_dtype phai la 'float32' hoac 'float64', nhan duoc: {distance_dtype}")
+        self.location_index = {loc: i for i, loc in enumerate(self.locations)}
+        self.coords_array = np.array([coords[loc] for loc in self.locations], dtype=np.float64)
+        
+        # Kho và route mở nằm ngay trong ma trận: hàng/cột [N, N + số kho) là các kho,
+        # hàng/cột cuối (route mở) là điểm kết thúc ảo cách mọi điểm 0 km
+        num_points = len(self.locations)
+        self.depots = dict(depots or {})
+        self.depot_names = list(self.depots.keys())
+        self.depot_indices = np.arange(num_points, num_points + len(self.depots), dtype=np.intp)
+        self.open_routes = open_routes
+        self.open_end_index = num_points + len(self.depots) if open_routes else None
+        matrix_coords = np.vstack([self.coords_array.reshape(-1, 2)] +
+                                  [np.asarray([self.depots[name] for name in self.depot_names],
+                                              dtype=np.float64).reshape(-1, 2)])
+        self.distance_matrix = haversine_matrix(matrix_coords, dtype=np.dtype(distance_dtype))
+        if open_routes:
+            self.distance_matrix = np.pad(self.distance_matrix, ((0, 1), (0, 1)))
+        
+        self.vehicle_depots = None
+        if vehicle_depots is not None:
+            unknown = [name for name in vehicle_depots if name not in self.depots]
+            if unknown or len(vehicle_depots) != num_vehicles:
+                raise ValueError(f"vehicle_depots phai gom {num_vehicles} ten kho trong depots, "
+                                 f"nhan duoc: {list(vehicle_depots)}")
+            self.vehicle_depots = np.array([num_points + self.depot_names.index(name)
+                                            for name in vehicle_depots], dtype=np.intp)
+        
+        # Nhiễm sắc thể dùng chỉ số nguyên nhỏ gọn (int16 đủ cho < 32768 điểm)
+        self.index_dtype = np.int16 if len(self.locations) < 2 ** 15 else np.int32
+        
+        # Chỉ mục không gian (lưới trên tọa độ chiếu sang km) dựng một lần, dùng để giới
+        # hạn tập ứng viên của khởi tạo, mutation và local search
+        self.spatial_index = GridIndex(project_coordinates(self.coords_array))
+        
+        # Danh sách láng giềng gần nhất cho local search (chỉ gồm điểm giao hàng), lấy từ
+        # chỉ mục không gian rồi xếp lại theo ma trận khoảng cách; kho và điểm kết thúc
+        # ảo có hàng riêng chứa các điểm giao hàng gần nhất
+        self.neighbor_lists = self.spatial_index.neighbor_lists(
+            neighbor_k, self.distance_matrix[:num_points, :num_points])
+        if len(self.distance_matrix) > num_points:
+            extra = np.argsort(self.distance_matrix[num_points:, :num_points], axis=1, kind='stable')
+            self.neighbor_lists = np.vstack([self.neighbor_lists, extra[:, :self.neighbor_lists.shape[1]]])
+        
+        # Mô hình time windows cho chế độ VRPTW, cùng mô hình thời gian di chuyển theo
+        # khung giờ với lịch trình trong kết quả cuối
+        self.time_window_model = None
+        if vrptw:
+            windows = np.array([self.time_windows[loc] for loc in self.locations], dtype=np.float64)
+            self.time_window_model = TimeWindowModel(
+                windows[:, 0], windows[:, 1],
+                service_time=self.service_time, start_time=self.start_time, speed_kmh=30,
+                lateness_penalty=lateness_penalty, waiting_penalty=waiting_penalty,
+                travel_time_model=self.travel_time_model)
+        
+        # Ràng buộc tải trọng / thời lượng theo xe (CVRP), phạt trong fitness
+        self.capacity_model = None
+        if demands is not None or vehicle_capacities is not None or max_route_duration is not None:
+            demand_array = np.array([demands.get(loc, 0.0) if demands is not None else 1.0
+                                     for loc in self.locations], dtype=np.float64)
+            self.capacity_model = CapacityModel(
+                demand_array, num_vehicles, vehicle_capacities, max_route_duration,
+                service_time=self.service_time, speed_kmh=30,
+                capacity_penalty=capacity_penalty, duration_penalty=duration_penalty)
+        
+        # Phân cụm K-means cho khởi tạo (tính lười, dùng lại cho mọi cá thể)
+        self.kmeans_cache_dir = kmeans_cache_dir
+        self._kmeans_routes = None
+        
+        # Lưu lịch sử tiến hóa (giải pháp tốt nhất chỉ lưu khi thay đổi)
+        self.history = HistoryRecorder(history_policy, history_max_points, history_path)
+        
+        # Tiêu chí dừng: số thế hệ, thời gian, fitness mục tiêu, hội tụ hoặc bị hủy
+        if time_limit_s is not None and time_limit_s <= 0:
+            raise ValueError(f"time_limit_s phai lon hon 0, nhan duoc: {time_limit_s}")
+        self.time_limit_s = time_limit_s
+        self.target_fitness = target_fitness
+        self.stagnation_threshold = stagnation_threshold
+        self.nsga2 = nsga2
         self.best_fitness = 0
+        self.best_solution = None
         self.stagnation_count = 0
+        self.stop_reason = None
+        # Số thế hệ thực sự chạy trong lần gọi _evolve gần nhất (ít hơn khi dừng sớm)
+        self.generations_run = 0
+        
+        # Trạng thái của lần chạy hiện tại (callback, thời điểm bắt đầu, yêu cầu hủy)
+        self._callback = None
+        self._start_time = None
+        self._cancel_requested = False
         
     
     def haversine_distance(self, lat1: float, lon1: float, 
@@ -76,7 +448,7 @@ class MultiVehicleTSPGA:
         Returns:
             Khoảng cách tính bằng km
         """
-        R = 6371  # Bán kính Trái Đất (km)
+        R = EARTH_RADIUS_KM
         
         phi1, phi2 = math.radians(lat1), math.radians(lat2)
         dphi = math.radians(lat2 - lat1)
@@ -117,6 +489,33 @@ class MultiVehicleTSPGA:
         
         return int(travel_time)
     
+    @property
+    def travel_time_tensor(self) -> TravelTimeTensor:
+        """
+        Tensor thời gian di chuyển (khung thời gian, điểm đi, điểm đến), tính một lần khi dùng lần đầu
+
+        Chỉ dùng khi cần tra cứu hàng loạt; solver tự tính từng chặng qua travel_time_model.
+        Báo lỗi nếu tensor vượt travel_time.TENSOR_MAX_BYTES.
+        """
+        if self._travel_time_tensor is None:
+            self._travel_time_tensor = TravelTimeTensor(self.distance_matrix, self.speed_profile,
+                                                        self.time_bucket_minutes)
+        return self._travel_time_tensor
+    
+    def travel_time(self, from_index: int, to_index: int, current_time: float) -> float:
+        """
+        Thời gian di chuyển (phút) giữa hai điểm theo thời điểm xuất phát
+        
+        Args:
+            from_index, to_index: Chỉ số điểm đi và điểm đến
+            current_time: Thời điểm xuất phát (phút từ 0h)
+            
+        Returns:
+            Thời gian di chuyển tính bằng phút
+        """
+        return self.travel_time_model.travel_time(float(self.distance_matrix[from_index, to_index]),
+                                                  float(current_time))
+    
     def is_time_window_valid(self, location: str, arrival_time: int) -> bool:
         """
         Kiểm tra xem thời gian đến có trong time window không
@@ -131,287 +530,560 @@ class MultiVehicleTSPGA:
         start_time, end_time = self.time_windows[location]
         return start_time <= arrival_time <= end_time
     
-    def create_initial_population(self) -> List[List[List[str]]]:
+    @property
+    def fitness_history(self) -> List[float]:
+        """Fitness tốt nhất theo các thế hệ đang giữ trong lịch sử"""
+        return self.history.curve()[1]
+    
+    def create_initial_population(self) -> Population:
         """
         Tạo quần thể ban đầu cho Multi-Vehicle TSP
         
         Returns:
-            Danh sách các giải pháp (mỗi giải pháp là danh sách routes cho các xe)
+            Quần thể (tours, sizes) dạng mảng 2 chiều
         """
         population = []
         
-        for _ in range(self.population_size):
-            # Tạo giải pháp ngẫu nhiên
-            solution = self._create_random_solution()
+        if self.construction_mix is None:
+            heuristics = [('clustered', True)] * self.population_size
+        else:
+            heuristics = self._construction_plan()
+        
+        for heuristic, randomized in heuristics:
+            # Tạo giải pháp bằng heuristic xây dựng
+            solution = self.construct_solution(heuristic, randomized)
+            if self.split is not None:
+                solution = self.split_tour(solution[0])
             population.append(solution)
             
-        return population
+        return self._stack_population(population)
     
-    def _create_kmeans_clustered_solution(self) -> List[List[str]]:
+    def _construction_plan(self) -> List[Tuple[str, bool]]:
         """
-        Tạo giải pháp dựa trên K-means clustering để phân chia địa lý tốt hơn
+        Heuristic cho từng cá thể của quần thể ban đầu theo construction_mix (làm tròn theo
+        phần dư lớn nhất); cá thể đầu tiên của mỗi heuristic là bản tất định
+        
+        Returns:
+            Danh sách (tên heuristic, ngẫu nhiên hóa)
+        """
+        names = list(self.construction_mix.keys())
+        weights = np.array([self.construction_mix[name] for name in names], dtype=np.float64)
+        quotas = weights / weights.sum() * self.population_size
+        counts = np.floor(quotas).astype(int)
+        remainder_order = np.argsort(-(quotas - counts), kind='stable')
+        counts[remainder_order[:self.population_size - counts.sum()]] += 1
+        return [(name, k > 0) for name, count in zip(names, counts) for k in range(count)]
+    
+    def construct_solution(self, heuristic: str, randomized: bool = True) -> Solution:
+        """
+        Tạo một giải pháp bằng heuristic xây dựng trong CONSTRUCTION_HEURISTICS
+        
+        Args:
+            heuristic: 'savings', 'sweep', 'nearest_neighbor', 'regret' hoặc 'clustered'
+                (K-means / chia vùng địa lý / ngẫu nhiên như cũ)
+            randomized: Ngẫu nhiên hóa bằng self.rng (False: bản tất định)
+            
+        Returns:
+            Giải pháp đã mã hóa (tour, sizes)
+        """
+        return CONSTRUCTION_HEURISTICS[heuristic](self, self.rng if randomized else None)
+    
+    def _construction_inputs(self) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[float]]:
+        """
+        Dữ liệu chung cho các heuristic xây dựng
+        
+        Returns:
+            Tuple (tâm dạng tọa độ phẳng, khoảng cách từ tâm tới từng điểm, nhu cầu, giới hạn tải):
+            tâm là trọng tâm các kho nếu có, nếu không là trọng tâm các điểm giao hàng
+        """
+        points = self.spatial_index.points
+        num_points = len(self.locations)
+        if len(self.depot_indices) > 0:
+            depot_coords = np.array([self.depots[name] for name in self.depot_names])
+            hub = project_coordinates(depot_coords, reference_lat=self.coords_array[:, 0].mean()).mean(axis=0)
+            hub_distances = self.distance_matrix[self.depot_indices, :num_points].min(axis=0).astype(np.float64)
+        else:
+            hub = points.mean(axis=0)
+            hub_distances = np.hypot(*(points - hub).T)
+        
+        demands, max_load = None, None
+        if self.capacity_model is not None:
+            demands = self.capacity_model.demands
+            if np.all(np.isfinite(self.capacity_model.capacities)):
+                max_load = float(self.capacity_model.capacities.max())
+        return hub, hub_distances, demands, max_load
+    
+    def _constructed_solution(self, routes: List[np.ndarray]) -> Solution:
+        """Mã hóa các route từ heuristic xây dựng và 2-opt từng route"""
+        return self.local_search_2opt(self._solution_from_routes([route.tolist() for route in routes]))
+    
+    def _construct_clustered(self, rng: Optional[np.random.Generator]) -> Solution:
+        """K-means / chia vùng địa lý / ngẫu nhiên với thứ tự ngẫu nhiên trong route (cách khởi tạo cũ)"""
+        return self._create_random_solution()
+    
+    def _construct_savings(self, rng: Optional[np.random.Generator]) -> Solution:
+        """Clarke-Wright savings quanh kho / trọng tâm (construction.savings_routes)"""
+        _, hub_distances, demands, max_load = self._construction_inputs()
+        return self._constructed_solution(savings_routes(
+            self.distance_matrix, self.neighbor_lists, hub_distances, self.num_vehicles,
+            rng=rng, demands=demands, max_load=max_load))
+    
+    def _construct_sweep(self, rng: Optional[np.random.Generator]) -> Solution:
+        """Sweep theo góc cực quanh kho / trọng tâm (construction.sweep_routes)"""
+        hub, _, demands, _ = self._construction_inputs()
+        return self._constructed_solution(sweep_routes(
+            self.spatial_index.points, hub, self.distance_matrix, self.num_vehicles,
+            rng=rng, demands=demands))
+    
+    def _construct_nearest_neighbor(self, rng: Optional[np.random.Generator]) -> Solution:
+        """Giant tour nearest neighbor cắt thành các route (construction.nearest_neighbor_routes)"""
+        _, hub_distances, demands, _ = self._construction_inputs()
+        return self._constructed_solution(nearest_neighbor_routes(
+            self.distance_matrix, self.neighbor_lists, len(self.locations), self.num_vehicles,
+            rng=rng, demands=demands, start=int(np.argmin(hub_distances))))
+    
+    def _construct_regret(self, rng: Optional[np.random.Generator]) -> Solution:
+        """Chèn regret-2 từ các hạt giống cách xa nhau (construction.regret_insertion_routes)"""
+        _, hub_distances, demands, max_load = self._construction_inputs()
+        return self._constructed_solution(regret_insertion_routes(
+            self.distance_matrix, len(self.locations), self.num_vehicles, hub_distances,
+            rng=rng, demands=demands, max_load=max_load))
+    
+    def _stack_population(self, solutions: List[Solution]) -> Population:
+        """Gộp danh sách giải pháp thành quần thể dạng mảng 2 chiều"""
+        tours = np.stack([solution[0] for solution in solutions])
+        sizes = np.stack([solution[1] for solution in solutions])
+        return tours, sizes
+    
+    def _encode_solution(self, routes: List[List[str]]) -> Solution:
         """
-        from sklearn.cluster import KMeans
+        Mã hóa giải pháp dạng danh sách tên điểm thành (tour, sizes)
         
-        # Chuẩn bị dữ liệu tọa độ
-        coords_array = np.array([self.coords[loc] for loc in self.locations])
+        Args:
+            routes: Danh sách routes, mỗi route là danh sách tên điểm
+            
+        Returns:
+            Tuple (tour, sizes): hoán vị chỉ số điểm và số điểm của từng xe
+        """
+        tour = np.fromiter((self.location_index[loc] for route in routes for loc in route),
+                           dtype=self.index_dtype)
+        sizes = np.array([len(route) for route in routes], dtype=self.index_dtype)
+        return tour, sizes
+    
+    def _decode_solution(self, solution: Solution) -> List[List[str]]:
+        """
+        Giải mã (tour, sizes) thành danh sách routes theo tên điểm
         
-        # K-means clustering
-        kmeans = KMeans(n_clusters=self.num_vehicles, random_state=42, n_init=10)
-        cluster_labels = kmeans.fit_predict(coords_array)
+        Args:
+            solution: Giải pháp đã mã hóa
+            
+        Returns:
+            Danh sách routes, mỗi route là danh sách tên điểm
+        """
+        return [[self.locations[i] for i in route] for route in self._split_routes(solution)]
+    
+    def _split_routes(self, solution: Solution) -> List[np.ndarray]:
+        """Tách tour thành các route (view, không sao chép) theo sizes"""
+        tour, sizes = solution
+        return np.split(tour, np.cumsum(sizes[:-1], dtype=np.intp))
+    
+    def _solution_from_routes(self, routes: List[List[int]]) -> Solution:
+        """Ghép các route (chỉ số điểm) thành giải pháp đã mã hóa"""
+        sizes = np.array([len(route) for route in routes], dtype=self.index_dtype)
+        if sizes.sum() == 0:
+            return np.empty(0, dtype=self.index_dtype), sizes
+        tour = np.concatenate([np.asarray(route, dtype=self.index_dtype) for route in routes])
+        return tour, sizes
+    
+    def split_tour(self, tour: np.ndarray) -> Solution:
+        """
+        Giải mã giant tour: chia tối ưu cho các xe theo mục tiêu self.split
+        (mặc định 'total'), mỗi xe tối thiểu 30% số điểm trung bình như _validate_minimum_load;
+        khi có kho / route mở, chi phí mỗi route gồm các chặng nối kho (_depot_legs)
         
-        # Phân chia locations theo cluster
-        routes = [[] for _ in range(self.num_vehicles)]
-        for i, loc in enumerate(self.locations):
-            cluster_id = cluster_labels[i]
-            routes[cluster_id].append(loc)
+        Args:
+            tour: Hoán vị chỉ số điểm
+            
+        Returns:
+            Giải pháp đã mã hóa (tour, sizes)
+        """
+        min_size = int(np.ceil(0.3 * len(tour) / self.num_vehicles))
+        closing_cost = None
+        if self.uses_depots:
+            # Route nối qua kho: chi phí khép route là các chặng nối kho của xe tương ứng
+            def closing_cost(firsts, lasts, vehicle):
+                return self._depot_legs(firsts, lasts, np.full(firsts.shape, vehicle))[0]
+        sizes = split_giant_tour(tour, self.distance_matrix, self.num_vehicles,
+                                 objective=self.split or 'total', min_size=min_size,
+                                 closing_cost=closing_cost)
+        return tour, sizes.astype(self.index_dtype)
+    
+    def _even_sizes(self, num_points: int) -> np.ndarray:
+        """Chia đều số điểm cho các xe (xe đầu nhận phần dư)"""
+        sizes = np.full(self.num_vehicles, num_points // self.num_vehicles, dtype=self.index_dtype)
+        sizes[:num_points % self.num_vehicles] += 1
+        return sizes
+    
+    def _create_kmeans_clustered_solution(self) -> Solution:
+        """
+        Tạo giải pháp dựa trên K-means clustering để phân chia địa lý tốt hơn
         
+        Phân cụm chỉ tính một lần; tính ngẫu nhiên nằm ở bước xáo trộn từng
+        route trong _balance_quadrants.
+        """
         # Cân bằng số điểm giữa các xe
-        return self._balance_quadrants(routes)
+        return self._balance_quadrants(self._kmeans_clusters())
+    
+    def _kmeans_clusters(self) -> List[np.ndarray]:
+        """
+        Chỉ số điểm của từng cụm K-means (tính lần đầu, sau đó dùng lại)
+        
+        Returns:
+            Danh sách mảng chỉ số điểm theo cụm
+        """
+        if self._kmeans_routes is None:
+            cluster_labels = kmeans_labels(self.coords_array, self.num_vehicles,
+                                           seed=42 if self.seed is None else self.seed,
+                                           cache_dir=self.kmeans_cache_dir)
+            
+            # Phân chia locations theo cluster
+            self._kmeans_routes = [np.flatnonzero(cluster_labels == cluster_id)
+                                   for cluster_id in range(self.num_vehicles)]
+        return self._kmeans_routes
     
-    def _create_geographic_clustered_solution(self) -> List[List[str]]:
+    def _create_geographic_clustered_solution(self) -> Solution:
         """
         Tạo giải pháp dựa trên clustering địa lý để cân bằng hiệu quả tốt hơn
         
         Returns:
-            Danh sách routes cho các xe
+            Giải pháp đã mã hóa (tour, sizes)
         """
-        all_locations = self.locations.copy()
+        lat, lon = self.coords_array[:, 0], self.coords_array[:, 1]
         
         # Tính trung tâm địa lý
-        center_lat = sum(self.coords[loc][0] for loc in all_locations) / len(all_locations)
-        center_lon = sum(self.coords[loc][1] for loc in all_locations) / len(all_locations)
-        
-        # Chia thành các góc phần tư dựa trên trung tâm
-        quadrants = [[] for _ in range(self.num_vehicles)]
-        
-        # Calculate max_distance_from_center for num_vehicles > 4 case
-        max_distance_from_center = 0
-        if self.num_vehicles > 4:
-            for loc in all_locations:
-                lat, lon = self.coords[loc]
-                dist = ((lat - center_lat)**2 + (lon - center_lon)**2)**0.5
-                if dist > max_distance_from_center:
-                    max_distance_from_center = dist
-
-        for loc in all_locations:
-            lat, lon = self.coords[loc]
-            
-            # Xác định góc phần tư dựa trên số xe
-            if self.num_vehicles == 2:
-                # Chia đôi theo kinh độ
-                quadrant = 0 if lon >= center_lon else 1
-            elif self.num_vehicles == 3:
-                # Chia thành 3 vùng
-                if lat >= center_lat:
-                    quadrant = 0 if lon >= center_lon else 1
-                else:
-                    quadrant = 2
-            elif self.num_vehicles == 4:
-                # Chia thành 4 góc phần tư
-                if lat >= center_lat and lon >= center_lon:
-                    quadrant = 0  # Đông Bắc
-                elif lat >= center_lat and lon < center_lon:
-                    quadrant = 1  # Tây Bắc
-                elif lat < center_lat and lon >= center_lon:
-                    quadrant = 2  # Đông Nam
-                else:
-                    quadrant = 3  # Tây Nam
+        center_lat = lat.mean()
+        center_lon = lon.mean()
+        
+        # Xác định góc phần tư dựa trên số xe
+        if self.num_vehicles == 2:
+            # Chia đôi theo kinh độ
+            quadrant = np.where(lon >= center_lon, 0, 1)
+        elif self.num_vehicles == 3:
+            # Chia thành 3 vùng
+            quadrant = np.where(lat >= center_lat, np.where(lon >= center_lon, 0, 1), 2)
+        elif self.num_vehicles == 4:
+            # Chia thành 4 góc phần tư: Đông Bắc, Tây Bắc, Đông Nam, Tây Nam
+            quadrant = (np.where(lat >= center_lat, 0, 2) +
+                        np.where(lon >= center_lon, 0, 1))
+        else:
+            # Cho số xe khác, chia theo khoảng cách từ trung tâm
+            distance_from_center = np.hypot(lat - center_lat, lon - center_lon)
+            max_distance_from_center = distance_from_center.max()
+            if max_distance_from_center > 0:
+                quadrant = ((distance_from_center / max_distance_from_center) *
+                            self.num_vehicles).astype(int) % self.num_vehicles
             else:
-                # Cho số xe > 4, chia theo khoảng cách từ trung tâm
-                distance_from_center = ((lat - center_lat)**2 + (lon - center_lon)**2)**0.5
-                quadrant = int((distance_from_center / max_distance_from_center) * self.num_vehicles) % self.num_vehicles
-            
-            quadrants[quadrant].append(loc)
+                quadrant = np.zeros(len(lat), dtype=int)
         
-        # Cân bằng số điểm giữa các vùng
-        routes = self._balance_quadrants(quadrants)
+        quadrants = [np.flatnonzero(quadrant == q) for q in range(self.num_vehicles)]
         
-        return routes
+        # Cân bằng số điểm giữa các vùng
+        return self._balance_quadrants(quadrants)
     
-    def _balance_quadrants(self, quadrants: List[List[str]]) -> List[List[str]]:
+    def _balance_quadrants(self, quadrants: List[np.ndarray]) -> Solution:
         """
         Cân bằng số điểm giữa các vùng để tránh xe nào quá ít điểm
         
         Args:
-            quadrants: Danh sách các vùng với điểm
+            quadrants: Danh sách các vùng với chỉ số điểm
             
         Returns:
-            Routes đã cân bằng
+            Giải pháp đã cân bằng (tour, sizes)
         """
-        all_locations = []
-        for quadrant in quadrants:
-            all_locations.extend(quadrant)
-        
-        # Tính số điểm trung bình mỗi xe
-        avg_points = len(all_locations) // self.num_vehicles
-        remaining_points = len(all_locations) % self.num_vehicles
+        tour = np.concatenate(quadrants).astype(self.index_dtype)
         
         # Phân chia lại để cân bằng
-        balanced_routes = []
-        start_idx = 0
+        sizes = self._even_sizes(len(tour))
         
-        for i in range(self.num_vehicles):
-            # Tính số điểm cho xe này
-            if i < remaining_points:
-                vehicle_points = avg_points + 1
-            else:
-                vehicle_points = avg_points
-            
-            # Lấy điểm cho xe này
-            end_idx = start_idx + vehicle_points
-            vehicle_locations = all_locations[start_idx:end_idx]
-            
-            # Tạo route ngẫu nhiên cho xe này
-            if vehicle_locations:
-                random.shuffle(vehicle_locations)
-                balanced_routes.append(vehicle_locations)
-            else:
-                balanced_routes.append([])
-            
-            start_idx = end_idx
+        # Tạo route ngẫu nhiên cho từng xe (xáo trộn tại chỗ trên từng đoạn)
+        for route in self._split_routes((tour, sizes)):
+            self.rng.shuffle(route)
         
-        return balanced_routes
+        return tour, sizes
     
-    def _create_random_solution(self) -> List[List[str]]:
+    def _create_random_solution(self) -> Solution:
         """
         Tạo một giải pháp ngẫu nhiên cho Multi-Vehicle TSP
         
         Returns:
-            Danh sách routes cho các xe
+            Giải pháp đã mã hóa (tour, sizes)
         """
         # 60% tạo giải pháp K-means clustering, 30% geographic clustering, 10% ngẫu nhiên
-        rand = random.random()
+        rand = self.rng.random()
         if rand < 0.6:
             return self._create_kmeans_clustered_solution()
         elif rand < 0.9:
             return self._create_geographic_clustered_solution()
         else:
             # Tạo routes cho từng xe với đa dạng hơn
-            routes = []
-            all_locations = self.locations.copy()
-            random.shuffle(all_locations)
-            
-            # Chia đều số điểm cho các xe nhưng cho phép một chút biến động
-            points_per_vehicle = len(all_locations) // self.num_vehicles
-            remaining_points = len(all_locations) % self.num_vehicles
+            num_points = len(self.locations)
+            tour = self.rng.permutation(num_points).astype(self.index_dtype)
             
+            # Chia đều số điểm cho các xe nhưng cho phép một chút biến động (±2 điểm)
+            sizes = self._even_sizes(num_points)
+            variations = self.rng.integers(-2, 3, size=self.num_vehicles)
             start_idx = 0
             for vehicle_id in range(self.num_vehicles):
-                # Tính số điểm cho xe này với một chút biến động
-                if vehicle_id < remaining_points:
-                    base_points = points_per_vehicle + 1
-                else:
-                    base_points = points_per_vehicle
-                
-                # Thêm biến động ngẫu nhiên (±2 điểm)
-                variation = random.randint(-2, 2)
-                vehicle_points = max(1, base_points + variation)
+                vehicle_points = max(1, int(sizes[vehicle_id]) + int(variations[vehicle_id]))
                 
                 # Đảm bảo không vượt quá số điểm còn lại
-                remaining = len(all_locations) - start_idx
-                vehicle_points = min(vehicle_points, remaining)
-                
-                # Lấy điểm cho xe này
-                end_idx = start_idx + vehicle_points
-                vehicle_locations = all_locations[start_idx:end_idx]
-                
-                # Tạo route ngẫu nhiên cho xe này
-                if vehicle_locations:
-                    random.shuffle(vehicle_locations)
-                    routes.append(vehicle_locations)
-                else:
-                    routes.append([])
-                
-                start_idx = end_idx
+                vehicle_points = min(vehicle_points, num_points - start_idx)
+                sizes[vehicle_id] = vehicle_points
+                start_idx += vehicle_points
+            
+            # Xe cuối nhận các điểm còn dư để giải pháp luôn đủ điểm
+            sizes[-1] += num_points - start_idx
+            
+            return tour, sizes
+    
+    def _to_indices(self, route) -> np.ndarray:
+        """
+        Chuyển lộ trình (tên điểm hoặc chỉ số) thành mảng chỉ số nguyên
+        
+        Args:
+            route: Danh sách tên điểm hoặc mảng chỉ số
             
-            return routes
+        Returns:
+            Mảng chỉ số vào ma trận khoảng cách
+        """
+        if isinstance(route, np.ndarray) and route.dtype.kind in 'iu':
+            return route
+        if len(route) > 0 and isinstance(route[0], str):
+            return np.fromiter((self.location_index[loc] for loc in route),
+                               dtype=np.intp, count=len(route))
+        return np.asarray(route, dtype=np.intp)
+    
+    @property
+    def uses_depots(self) -> bool:
+        """Route được nối qua kho hoặc là route mở (không còn là chu trình qua các điểm giao hàng)"""
+        return len(self.depot_indices) > 0 or self.open_routes
     
-    def route_distance(self, route: List[str]) -> float:
+    def route_distance(self, route, vehicle: Optional[int] = None) -> float:
         """
         Tính tổng khoảng cách của một lộ trình
         
         Args:
-            route: Danh sách các điểm theo thứ tự
+            route: Danh sách các điểm theo thứ tự (tên điểm hoặc chỉ số)
+            vehicle: Chỉ số xe (để tra kho cố định của xe); None: dùng kho gần nhất
             
         Returns:
             Tổng khoảng cách tính bằng km
         """
-        if not route:
+        if len(route) == 0:
             return 0
+        
+        idx = self._to_indices(route)
+        
+        # Cạnh i -> i+1 và cạnh quay về điểm xuất phát, tra trực tiếp từ ma trận
+        distance = float(self.distance_matrix[idx, np.roll(idx, -1)].sum(dtype=np.float64))
+        if self.uses_depots:
+            # Thay cạnh quay về điểm đầu bằng các chặng nối với kho
+            legs, _ = self._depot_legs(idx[0], idx[-1], vehicle)
+            distance += float(legs) - float(self.distance_matrix[idx[-1], idx[0]])
+        return distance
+    
+    def _depot_legs(self, firsts, lasts, vehicles=None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Chi phí các chặng nối route với kho: kho -> điểm đầu, và điểm cuối -> kho nếu
+        route khép kín. Xe không có kho cố định dùng kho cho chi phí nhỏ nhất.
+        
+        Args:
+            firsts, lasts: Chỉ số điểm đầu / cuối của các route (số nguyên hoặc mảng)
+            vehicles: Chỉ số xe tương ứng (cùng shape); None: mọi route chọn kho tự do
             
-        total_distance = 0
+        Returns:
+            Tuple (chi phí nối, chỉ số kho được chọn trong ma trận hoặc None nếu không có kho)
+        """
+        if len(self.depot_indices) == 0:
+            # Route mở không có kho: không có chặng nối nào
+            return np.zeros(np.shape(firsts)), None
+        
+        if self.vehicle_depots is not None and vehicles is not None:
+            candidates = self.vehicle_depots[np.asarray(vehicles)][..., None]
+        else:
+            candidates = self.depot_indices
+        firsts = np.asarray(firsts)[..., None]
+        lasts = np.asarray(lasts)[..., None]
+        legs = self.distance_matrix[candidates, firsts].astype(np.float64)
+        if not self.open_routes:
+            legs = legs + self.distance_matrix[lasts, candidates]
+        
+        choice = np.argmin(legs, axis=-1)[..., None]
+        depots = np.take_along_axis(np.broadcast_to(candidates, legs.shape), choice, axis=-1)[..., 0]
+        return np.take_along_axis(legs, choice, axis=-1)[..., 0], depots
+    
+    def _population_route_ends(self, tours: np.ndarray, sizes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Chỉ số điểm đầu / cuối của từng route (route rỗng lấy điểm bất kỳ, cần lọc theo sizes > 0)"""
+        ends = np.cumsum(sizes, axis=1, dtype=np.intp)
+        starts = np.minimum(ends - sizes, tours.shape[1] - 1)
+        firsts = np.take_along_axis(tours, starts, axis=1)
+        lasts = np.take_along_axis(tours, np.maximum(ends - 1, 0), axis=1)
+        return firsts, lasts
+    
+    def _route_depots(self, solution: Solution) -> Optional[np.ndarray]:
+        """Chỉ số kho (trong ma trận) của từng route của giải pháp; None nếu không có kho"""
+        depots = self._population_depots(solution[0][None, :], solution[1][None, :])
+        return None if depots is None else depots[0]
+    
+    def _population_depots(self, tours: np.ndarray, sizes: np.ndarray) -> Optional[np.ndarray]:
+        """Chỉ số kho xuất phát của từng route cho cả quần thể (population, số xe); None nếu không có kho"""
+        if len(self.depot_indices) == 0 or tours.shape[1] == 0:
+            return None
+        firsts, lasts = self._population_route_ends(tours, sizes)
+        _, depots = self._depot_legs(firsts, lasts, np.arange(sizes.shape[1]))
+        return depots
+    
+    def population_route_distances(self, tours: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """
+        Tính khoảng cách từng xe cho toàn bộ quần thể trong một lượt vector hóa
         
-        for i in range(len(route) - 1):
-            coord1 = self.coords[route[i]]
-            coord2 = self.coords[route[i + 1]]
-            total_distance += self.haversine_distance(*coord1, *coord2)
+        Args:
+            tours: Mảng (population, số điểm) chỉ số điểm
+            sizes: Mảng (population, số xe) số điểm của từng xe
+            
+        Returns:
+            Mảng (population, số xe) khoảng cách từng xe tính bằng km
+        """
+        if NUMBA_AVAILABLE:
+            vehicle_distances = population_route_distances_kernel(tours, sizes, self.distance_matrix)
+        else:
+            vehicle_distances = self._numpy_route_distances(tours, sizes)
         
-        # Quay về điểm xuất phát
-        coord1 = self.coords[route[-1]]
-        coord2 = self.coords[route[0]]
-        total_distance += self.haversine_distance(*coord1, *coord2)
+        if self.uses_depots and tours.shape[1] > 0:
+            # Thay cạnh quay về điểm đầu route bằng các chặng nối với kho
+            firsts, lasts = self._population_route_ends(tours, sizes)
+            legs, _ = self._depot_legs(firsts, lasts, np.arange(sizes.shape[1]))
+            closing = self.distance_matrix[lasts, firsts]
+            vehicle_distances = vehicle_distances + np.where(sizes > 0, legs - closing, 0.0)
         
-        return total_distance
+        return vehicle_distances
+    
+    def _numpy_route_distances(self, tours: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """Khoảng cách route khép kín từng xe bằng NumPy (đường dự phòng khi không có Numba)"""
+        pop_size, num_points = tours.shape
+        vehicle_distances = np.zeros(sizes.shape, dtype=np.float64)
+        if num_points == 0:
+            return vehicle_distances
+        
+        ends = np.cumsum(sizes, axis=1, dtype=np.intp)
+        starts = ends - sizes
+        nonempty = sizes > 0
+        rows = np.broadcast_to(np.arange(pop_size)[:, None], sizes.shape)
+        
+        # Vị trí kế tiếp trong tour; điểm cuối mỗi route quay về điểm đầu route đó
+        next_pos = np.tile(np.arange(1, num_points + 1), (pop_size, 1))
+        next_pos[rows[nonempty], ends[nonempty] - 1] = starts[nonempty]
+        edges = self.distance_matrix[tours, np.take_along_axis(tours, next_pos, axis=1)]
+        
+        # Tổng theo đoạn = hiệu tổng tích lũy (cộng tuần tự theo từng hàng, cùng thứ
+        # tự phép cộng với kernel Numba nên hai đường cho kết quả giống hệt)
+        cumulative = np.cumsum(edges, axis=1, dtype=np.float64)
+        end_totals = np.take_along_axis(cumulative, np.maximum(ends - 1, 0), axis=1)
+        start_totals = np.where(starts > 0, np.take_along_axis(cumulative, np.maximum(starts - 1, 0), axis=1), 0.0)
+        vehicle_distances[nonempty] = (end_totals - start_totals)[nonempty]
+        
+        return vehicle_distances
     
-    def multi_objective_fitness(self, solution: List[List[str]]) -> tuple:
+    def evaluate_population(self, tours: np.ndarray, sizes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Hàm fitness đa mục tiêu cải tiến: tối ưu khoảng cách và cân bằng hiệu quả
+        Đánh giá fitness đa mục tiêu cho toàn bộ quần thể (vector hóa)
         
         Args:
-            solution: Giải pháp gồm routes cho các xe
+            tours: Mảng (population, số điểm) chỉ số điểm
+            sizes: Mảng (population, số xe) số điểm của từng xe
             
         Returns:
-            Tuple (distance_fitness, efficiency_balance_fitness) - càng cao càng tốt
+            Tuple (distance_fitness, efficiency_balance_fitness) - mảng (population,)
         """
-        total_distance = 0
-        vehicle_distances = []
+        vehicle_distances = self.population_route_distances(tours, sizes)
+        total_distance = vehicle_distances.sum(axis=1)
         
-        for vehicle_id, route in enumerate(solution):
-            if not route:
-                vehicle_distances.append(0)
-                continue
-            route_dist = self.route_distance(route)
-            total_distance += route_dist
-            vehicle_distances.append(route_dist)
+        # Chế độ VRPTW: cộng phạt trễ giờ/chờ đợi (km tương đương) vào tổng khoảng cách;
+        # route có kho bắt đầu bằng chặng kho -> điểm đầu
+        if self.time_window_model is not None:
+            total_distance = total_distance + self.time_window_model.population_penalties(
+                tours, sizes, self.distance_matrix, self._population_depots(tours, sizes)).sum(axis=1)
+        
+        # Ràng buộc tải trọng / thời lượng: cộng phạt vượt giới hạn
+        if self.capacity_model is not None:
+            total_distance = total_distance + self.capacity_model.population_penalties(
+                tours, sizes, vehicle_distances).sum(axis=1)
         
         # Mục tiêu 1: Tối ưu tổng khoảng cách với scaling tốt hơn
         # Sử dụng exponential để tăng độ nhạy với khoảng cách ngắn
         distance_fitness = np.exp(-total_distance / 10000)  # Scaling tốt hơn
         
-        # Mục tiêu 2: Cân bằng hiệu quả giữa các xe (cải tiến)
-        if len(vehicle_distances) > 1 and max(vehicle_distances) > 0:
-            max_distance = max(vehicle_distances)
-            min_distance = min(vehicle_distances)
+        # Mục tiêu 2: Cân bằng hiệu quả giữa các xe - coefficient of variation (CV)
+        efficiency_balance_fitness = np.ones(len(tours))
+        if vehicle_distances.shape[1] > 1:
+            mean_distance = vehicle_distances.mean(axis=1)
+            std_distance = vehicle_distances.std(axis=1)
             
-            # Tính coefficient of variation (CV) để đo độ phân tán
-            mean_distance = np.mean(vehicle_distances)
-            std_distance = np.std(vehicle_distances)
+            # Fitness cân bằng: CV càng thấp càng tốt (exponential penalty cho CV cao)
+            positive = mean_distance > 0
+            efficiency_balance_fitness[positive] = np.exp(
+                -2 * std_distance[positive] / mean_distance[positive])
+        
+        return distance_fitness, efficiency_balance_fitness
+    
+    def multi_objective_fitness(self, solution: Solution) -> tuple:
+        """
+        Hàm fitness đa mục tiêu cải tiến: tối ưu khoảng cách và cân bằng hiệu quả
+        
+        Args:
+            solution: Giải pháp đã mã hóa (tour, sizes)
             
-            if mean_distance > 0:
-                cv = std_distance / mean_distance
-                # Fitness cân bằng: CV càng thấp càng tốt
-                efficiency_balance_fitness = np.exp(-cv * 2)  # Exponential penalty cho CV cao
-            else:
-                efficiency_balance_fitness = 1.0
-        else:
-            efficiency_balance_fitness = 1.0
+        Returns:
+            Tuple (distance_fitness, efficiency_balance_fitness) - càng cao càng tốt
+        """
+        tour, sizes = solution
+        distance_fitness, efficiency_balance_fitness = self.evaluate_population(
+            tour[None, :], sizes[None, :])
         
-        return (distance_fitness, efficiency_balance_fitness)
+        return (float(distance_fitness[0]), float(efficiency_balance_fitness[0]))
     
-    def adaptive_fitness(self, solution: List[List[str]], generation: int) -> float:
+    def adaptive_fitness(self, solution: Solution, generation: int) -> float:
         """
         Hàm fitness thích ứng: điều chỉnh trọng số theo thế hệ
         
         Args:
-            solution: Giải pháp gồm routes cho các xe
+            solution: Giải pháp đã mã hóa (tour, sizes)
             generation: Thế hệ hiện tại
             
         Returns:
             Giá trị fitness tổng hợp
         """
         distance_fitness, efficiency_balance_fitness = self.multi_objective_fitness(solution)
+        return self._combine_fitness(distance_fitness, efficiency_balance_fitness, generation)
+    
+    def population_fitness(self, population: Population, generation: int) -> np.ndarray:
+        """
+        Fitness thích ứng cho toàn bộ quần thể trong một lượt vector hóa
         
+        Args:
+            population: Quần thể (tours, sizes)
+            generation: Thế hệ hiện tại
+            
+        Returns:
+            Mảng fitness tổng hợp (population,)
+        """
+        distance_fitness, efficiency_balance_fitness = self.evaluate_population(*population)
+        return self._combine_fitness(distance_fitness, efficiency_balance_fitness, generation)
+    
+    def _combine_fitness(self, distance_fitness, efficiency_balance_fitness, generation: int):
+        """
+        Gộp hai mục tiêu với trọng số thích ứng (áp dụng cho số thực hoặc mảng)
+        """
         # Trọng số thích ứng: tập trung hoàn toàn vào khoảng cách
         total_generations = self.generations
         
@@ -425,52 +1097,100 @@ class MultiVehicleTSPGA:
         
         return combined_fitness
     
-    def local_search_2opt(self, solution: List[List[str]]) -> List[List[str]]:
+    def local_search_2opt(self, solution: Solution) -> Solution:
         """
         Local search 2-opt để cải thiện từng route
+        
+        Đánh giá delta O(1) trên ma trận khoảng cách, chỉ thử các láng giềng gần
+        nhất và dùng don't-look bits (xem local_search.two_opt_route).
+        """
+        tour, sizes = solution
+        first_improvement = self.two_opt_mode == 'first'
+        if self.uses_depots:
+            return self._anchored_2opt(tour, sizes, first_improvement), sizes.copy()
+        if self.time_window_model is not None:
+            improved_tour = two_opt_solution_tw(tour, sizes, self.distance_matrix, self.neighbor_lists,
+                                                self.time_window_model,
+                                                first_improvement=self.two_opt_mode == 'first')
+        else:
+            improved_tour = two_opt_solution(tour, sizes, self.distance_matrix, self.neighbor_lists,
+                                             first_improvement=self.two_opt_mode == 'first')
+        return improved_tour, sizes.copy()
+    
+    def _anchored_2opt(self, tour: np.ndarray, sizes: np.ndarray, first_improvement: bool) -> np.ndarray:
+        """
+        2-opt khi route nối qua kho: route khép kín được tối ưu như chu trình qua kho của
+        nó; route mở như chu trình qua điểm kết thúc ảo (tức là đường đi), sau đó đảo
+        chiều nếu điểm cuối gần kho hơn điểm đầu. Chế độ VRPTW dùng 2-opt có xét time
+        window với lịch trình xuất phát từ kho của route (chặng kho -> điểm đầu tính cả
+        khi đảo chiều nên không cần bước đảo chiều sau cùng)
         """
-        improved_solution = []
+        depots = self._route_depots((tour, sizes))
+        if self.open_routes:
+            anchors = np.full(self.num_vehicles, self.open_end_index, dtype=np.intp)
+        else:
+            anchors = depots
+        if self.time_window_model is not None:
+            return two_opt_solution_tw_anchored(tour, sizes, self.distance_matrix, self.neighbor_lists,
+                                                self.time_window_model, anchors, depots,
+                                                first_improvement=first_improvement)
+        improved = two_opt_solution_anchored(tour, sizes, self.distance_matrix, self.neighbor_lists,
+                                             anchors, first_improvement=first_improvement)
+        
+        if self.open_routes and len(self.depot_indices) > 0 and len(improved) > 0:
+            firsts, lasts = self._population_route_ends(improved[None, :], sizes[None, :])
+            vehicles = np.arange(self.num_vehicles)
+            forward, _ = self._depot_legs(firsts[0], lasts[0], vehicles)
+            backward, _ = self._depot_legs(lasts[0], firsts[0], vehicles)
+            ends = np.cumsum(sizes)
+            for vehicle in np.flatnonzero(backward < forward):
+                start = ends[vehicle] - sizes[vehicle]
+                improved[start:ends[vehicle]] = improved[start:ends[vehicle]][::-1]
+        return improved
+    
+    def inter_route_local_search(self, solution: Solution, **options) -> Solution:
+        """
+        Local search giữa các route (relocate, Or-opt, swap, 2-opt*, cross-exchange)
+        với đánh giá delta O(1), sau đó 2-opt lại từng route
         
-        for route in solution:
-            if len(route) <= 2:
-                improved_solution.append(route)
-                continue
-                
-            best_route = route.copy()
-            best_distance = self.route_distance(route)
-            improved = True
-            
-            while improved:
-                improved = False
-                for i in range(1, len(best_route) - 1):
-                    for j in range(i + 1, len(best_route)):
-                        # Thử 2-opt swap
-                        new_route = best_route[:i] + best_route[i:j+1][::-1] + best_route[j+1:]
-                        new_distance = self.route_distance(new_route)
-                        
-                        if new_distance < best_distance:
-                            best_route = new_route
-                            best_distance = new_distance
-                            improved = True
-                            break
-                    if improved:
-                        break
-            
-            improved_solution.append(best_route)
-        
-        return improved_solution
-    
-    def balance_load_local_search(self, solution: List[List[str]]) -> List[List[str]]:
+        Args:
+            solution: Giải pháp đã mã hóa
+            options: Tham số cho local_search.InterRouteLocalSearch
+                (operators, acceptance, first_improvement, ...)
+            
+        Returns:
+            Giải pháp đã cải thiện
+        """
+        options.setdefault('constraints', self.capacity_model)
+        search = InterRouteLocalSearch(self.distance_matrix, self.neighbor_lists, **options)
+        routes, _ = search.run([route.tolist() for route in self._split_routes(solution)])
+        return self.local_search_2opt(self._solution_from_routes(routes))
+    
+    def post_optimize(self, routes: List[List[str]], **options) -> Dict:
+        """
+        Hậu tối ưu độc lập cho một giải pháp có sẵn (ví dụ 'best_solution' trong file kết quả JSON)
+        
+        Args:
+            routes: Danh sách routes theo tên điểm
+            options: Tham số cho local_search.InterRouteLocalSearch
+            
+        Returns:
+            Dictionary kết quả như run_multi_vehicle_ga
+        """
+        solution = self.local_search_2opt(self._encode_solution(routes))
+        return self._calculate_final_results(self.inter_route_local_search(solution, **options))
+    
+    def balance_load_local_search(self, solution: Solution) -> Solution:
         """
         Local search để cân bằng tải giữa các xe
         """
-        improved_solution = [route.copy() for route in solution]
+        improved_solution = [route.tolist() for route in self._split_routes(solution)]
         
         # Tính khoảng cách mỗi xe
         vehicle_distances = []
-        for route in improved_solution:
+        for vehicle, route in enumerate(improved_solution):
             if route:
-                vehicle_distances.append(self.route_distance(route))
+                vehicle_distances.append(self.route_distance(route, vehicle))
             else:
                 vehicle_distances.append(0)
         
@@ -483,16 +1203,17 @@ class MultiVehicleTSPGA:
             if len(improved_solution[max_distance_idx]) > 1:
                 # Chọn điểm tốt nhất để di chuyển
                 point_to_move = self._find_best_point_for_efficiency(
-                    improved_solution[max_distance_idx], improved_solution[min_distance_idx]
+                    improved_solution[max_distance_idx], improved_solution[min_distance_idx],
+                    to_vehicle=min_distance_idx, from_vehicle=max_distance_idx
                 )
                 
-                if point_to_move:
+                if point_to_move is not None:
                     improved_solution[max_distance_idx].remove(point_to_move)
                     improved_solution[min_distance_idx].append(point_to_move)
         
-        return improved_solution
+        return self._solution_from_routes(improved_solution)
     
-    def _balance_efficiency_post_optimization(self, solution: List[List[str]]) -> List[List[str]]:
+    def _balance_efficiency_post_optimization(self, solution: Solution) -> Solution:
         """
         Cân bằng hiệu quả sau khi tối ưu bằng cách di chuyển điểm giữa các xe
         
@@ -502,11 +1223,13 @@ class MultiVehicleTSPGA:
         Returns:
             Giải pháp đã cân bằng hiệu quả
         """
+        solution = [route.tolist() for route in self._split_routes(solution)]
+        
         # Tính khoảng cách mỗi xe
         vehicle_distances = []
-        for route in solution:
+        for vehicle, route in enumerate(solution):
             if route:
-                vehicle_distances.append(self.route_distance(route))
+                vehicle_distances.append(self.route_distance(route, vehicle))
             else:
                 vehicle_distances.append(0)
         
@@ -520,48 +1243,68 @@ class MultiVehicleTSPGA:
             if len(solution[max_distance_idx]) > 1:
                 # Chọn điểm tốt nhất để di chuyển (gần nhất với xe đích)
                 point_to_move = self._find_best_point_for_efficiency(
-                    solution[max_distance_idx], solution[min_distance_idx]
+                    solution[max_distance_idx], solution[min_distance_idx],
+                    to_vehicle=min_distance_idx, from_vehicle=max_distance_idx
                 )
                 
-                if point_to_move:
+                if point_to_move is not None:
                     # Di chuyển điểm
                     solution[max_distance_idx].remove(point_to_move)
                     solution[min_distance_idx].append(point_to_move)
         
-        return solution
+        return self._solution_from_routes(solution)
     
-    def _find_best_point_for_efficiency(self, from_route: List[str], to_route: List[str]) -> str:
+    def _find_best_point_for_efficiency(self, from_route: List[int], to_route: List[int],
+                                        to_vehicle: Optional[int] = None,
+                                        from_vehicle: Optional[int] = None) -> Optional[int]:
         """
         Tìm điểm tốt nhất để di chuyển nhằm cân bằng hiệu quả
         
         Args:
-            from_route: Route có khoảng cách lớn
-            to_route: Route có khoảng cách nhỏ
+            from_route: Route có khoảng cách lớn (chỉ số điểm)
+            to_route: Route có khoảng cách nhỏ (chỉ số điểm)
+            to_vehicle: Chỉ số xe của to_route; khi có ràng buộc tải trọng chỉ xét các điểm
+                mà xe này còn chở được (kiểm tra O(1) theo tổng tải của route)
+            from_vehicle: Chỉ số xe của from_route (để tính quãng đường qua kho cố định của xe)
             
         Returns:
-            Điểm tốt nhất để di chuyển
+            Chỉ số điểm tốt nhất để di chuyển
         """
-        if not from_route or not to_route:
-            return from_route[0] if from_route else None
+        # Chỉ xét các điểm xe đích còn đủ sức chứa
+        candidates = from_route
+        if self.capacity_model is not None and to_vehicle is not None:
+            demands = self.capacity_model.demands
+            spare_capacity = self.capacity_model.capacities[to_vehicle] - demands[to_route].sum()
+            candidates = [point for point in from_route if demands[point] <= spare_capacity]
+        
+        if not candidates or not to_route:
+            return candidates[0] if candidates else None
+        
+        # Chỉ xét các điểm nằm trong danh sách láng giềng gần (từ chỉ mục không gian) của
+        # route đích; không có điểm nào gần thì xét mọi điểm như trước
+        near = np.isin(candidates, self.neighbor_lists[to_route])
+        if near.any():
+            candidates = [point for point, is_near in zip(candidates, near) if is_near]
         
         # Tìm điểm mà khi di chuyển sẽ giảm chênh lệch hiệu quả nhất
         best_point = None
         best_improvement = 0
         
-        for point in from_route:
-            # Tính khoảng cách hiện tại của route đích
-            current_to_distance = self.route_distance(to_route)
-            
+        # Tính khoảng cách hiện tại của hai route (một lần cho mọi ứng viên)
+        current_to_distance = self.route_distance(to_route, to_vehicle)
+        current_from_distance = self.route_distance(from_route, from_vehicle)
+        
+        for point in candidates:
             # Tính khoảng cách mới nếu thêm điểm này
             new_to_route = to_route + [point]
-            new_to_distance = self.route_distance(new_to_route)
+            new_to_distance = self.route_distance(new_to_route, to_vehicle)
             
             # Tính khoảng cách mới của route nguồn
             new_from_route = [p for p in from_route if p != point]
-            new_from_distance = self.route_distance(new_from_route) if new_from_route else 0
+            new_from_distance = self.route_distance(new_from_route, from_vehicle) if new_from_route else 0
             
             # Tính cải thiện cân bằng hiệu quả
-            current_imbalance = abs(self.route_distance(from_route) - current_to_distance)
+            current_imbalance = abs(current_from_distance - current_to_distance)
             new_imbalance = abs(new_from_distance - new_to_distance)
             improvement = current_imbalance - new_imbalance
             
@@ -571,7 +1314,7 @@ class MultiVehicleTSPGA:
         
         return best_point
     
-    def _validate_minimum_load(self, solution: List[List[str]]) -> List[List[str]]:
+    def _validate_minimum_load(self, solution: Solution) -> Solution:
         """
         Validation: đảm bảo không có xe nào quá ít điểm
         
@@ -581,6 +1324,7 @@ class MultiVehicleTSPGA:
         Returns:
             Giải pháp đã được validation
         """
+        solution = [route.tolist() for route in self._split_routes(solution)]
         vehicle_loads = [len(route) for route in solution]
         
         # Tính số điểm trung bình
@@ -598,179 +1342,972 @@ class MultiVehicleTSPGA:
             if len(solution[max_load_idx]) > 1:
                 # Chọn điểm tốt nhất để di chuyển
                 point_to_move = self._find_best_point_for_efficiency(
-                    solution[max_load_idx], solution[min_load_idx]
+                    solution[max_load_idx], solution[min_load_idx],
+                    to_vehicle=min_load_idx, from_vehicle=max_load_idx
                 )
                 
-                if point_to_move:
+                if point_to_move is not None:
                     solution[max_load_idx].remove(point_to_move)
                     solution[min_load_idx].append(point_to_move)
         
-        return solution
+        return self._solution_from_routes(solution)
     
-    def run_multi_vehicle_ga(self) -> Dict:
+    def run_multi_vehicle_ga(self, callback: Optional[Callable[[Dict], Optional[bool]]] = None) -> Dict:
         """
         Chạy thuật toán di truyền cho Multi-Vehicle TSP
         
+        Dừng khi hết self.generations, hết time_limit_s, đạt target_fitness, không cải
+        thiện trong stagnation_threshold thế hệ, khi callback trả về True hoặc khi
+        cancel() được gọi; luôn trả về giải pháp tốt nhất tìm được đến lúc dừng.
+        
+        Args:
+            callback: Hàm gọi mỗi khi giải pháp tốt nhất được cải thiện với dictionary
+                {'event': 'improvement', 'generation', 'fitness', 'total_distance',
+                'routes', 'elapsed_s'}; trả về True để dừng sớm
+            
         Returns:
             Dictionary chứa kết quả tối ưu
         """
-        print("Khoi tao quan the ban dau...")
+        self._begin_run(callback)
+        if self.verbose:
+            print("Khoi tao quan the ban dau...")
         population = self.create_initial_population()
         
-        best_solution = None
-        best_fitness = 0
+        return self._run_from_population(population)
+    
+    def iter_improvements(self) -> Iterator[Dict]:
+        """
+        Chạy GA trong thread nền và trả về lần lượt các giải pháp tốt hơn ngay khi tìm được
+        
+        Mỗi phần tử là dictionary sự kiện như tham số callback của run_multi_vehicle_ga;
+        phần tử cuối cùng là {'event': 'finished', 'result': kết quả cuối cùng}. Dừng
+        vòng lặp sớm (break hoặc close()) sẽ hủy lần chạy và chờ thread kết thúc.
+        
+        Returns:
+            Iterator các sự kiện
+        """
+        events = queue.Queue()
+        outcome = {}
+        
+        def run():
+            try:
+                outcome['result'] = self.run_multi_vehicle_ga(callback=events.put)
+            except BaseException as error:
+                outcome['error'] = error
+            finally:
+                events.put(None)
+        
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    break
+                yield event
+            thread.join()
+            if 'error' in outcome:
+                raise outcome['error']
+            yield {'event': 'finished', 'result': outcome['result']}
+        finally:
+            # Người dùng dừng sớm: yêu cầu hủy cho đến khi thread kết thúc
+            while thread.is_alive():
+                self.cancel()
+                thread.join(timeout=0.1)
+    
+    def cancel(self):
+        """Yêu cầu dừng lần chạy hiện tại (an toàn khi gọi từ thread khác); kiểm tra mỗi thế hệ"""
+        self._cancel_requested = True
+    
+    def reoptimize(self, previous_routes: List[List[str]],
+                   generations: int = 200,
+                   perturbation_strength: int = 3,
+                   random_ratio: float = 0.1,
+                   callback: Optional[Callable[[Dict], Optional[bool]]] = None) -> Dict:
+        """
+        Tối ưu lại nhanh từ giải pháp trước khi tập điểm thay đổi ít (warm start)
+        
+        Solver được khởi tạo với tập điểm mới (xem replan). Các điểm không còn trong
+        coords được bỏ khỏi route cũ, các điểm mới được chèn rẻ nhất, quần thể được
+        sinh quanh giải pháp đã sửa rồi tiến hóa trong số thế hệ ngắn.
+        
+        Args:
+            previous_routes: Routes của giải pháp trước (danh sách tên điểm theo xe)
+            generations: Số thế hệ tối đa của lần tối ưu lại
+            perturbation_strength: Số lần đột biến tối đa áp lên mỗi cá thể sinh từ giải pháp đã sửa
+            random_ratio: Tỷ lệ cá thể khởi tạo ngẫu nhiên để giữ đa dạng
+            callback: Hàm gọi mỗi khi giải pháp tốt nhất được cải thiện (xem run_multi_vehicle_ga)
+            
+        Returns:
+            Dictionary kết quả như run_multi_vehicle_ga
+        """
+        self._begin_run(callback)
+        repaired = self.repair_solution(previous_routes)
+        if self.verbose:
+            print(f"Toi uu lai tu giai phap truoc trong toi da {generations} the he...")
+        population = self.warm_start_population(repaired, perturbation_strength, random_ratio)
+        return self._run_from_population(population, num_generations=generations)
+    
+    def repair_solution(self, previous_routes: List[List[str]]) -> Solution:
+        """
+        Sửa giải pháp cũ theo tập điểm hiện tại: bỏ điểm không còn trong coords,
+        chèn rẻ nhất các điểm chưa có trong giải pháp
+        
+        Args:
+            previous_routes: Routes của giải pháp trước (danh sách tên điểm theo xe)
+            
+        Returns:
+            Giải pháp đã mã hóa chứa đúng các điểm hiện tại
+        """
+        routes = [[self.location_index[loc] for loc in route if loc in self.location_index]
+                  for route in previous_routes[:self.num_vehicles]]
+        routes += [[] for _ in range(self.num_vehicles - len(routes))]
+        
+        # Điểm chưa có trong giải pháp (mới thêm hoặc thuộc route vượt quá số xe)
+        served = np.zeros(len(self.locations), dtype=bool)
+        for route in routes:
+            served[route] = True
+        added = np.flatnonzero(~served).tolist()
+        
+        if self.verbose:
+            print(f"Sua giai phap: bo {sum(len(r) for r in previous_routes) - int(served.sum())} diem, "
+                  f"chen {len(added)} diem moi")
+        
+        return self._solution_from_routes(self._insert_cheapest(routes, added))
+    
+    def warm_start_population(self, solution: Solution, perturbation_strength: int = 3,
+                              random_ratio: float = 0.1) -> Population:
+        """
+        Quần thể ban đầu quanh một giải pháp: bản gốc, bản 2-opt, các biến thể đột biến
+        và một tỷ lệ nhỏ cá thể ngẫu nhiên
+        
+        Args:
+            solution: Giải pháp gốc
+            perturbation_strength: Số lần đột biến tối đa cho mỗi biến thể
+            random_ratio: Tỷ lệ cá thể khởi tạo ngẫu nhiên
+            
+        Returns:
+            Quần thể (tours, sizes)
+        """
+        population = [self._copy_solution(solution), self.local_search_2opt(solution)]
+        num_random = int(self.population_size * random_ratio)
+        
+        while len(population) < self.population_size - num_random:
+            variant = solution
+            for _ in range(self.rng.integers(1, max(1, perturbation_strength) + 1)):
+                variant = self._multi_vehicle_mutation(variant)
+            population.append(variant)
+        
+        while len(population) < self.population_size:
+            population.append(self._create_random_solution())
+        
+        return self._stack_population(population[:self.population_size])
+    
+    def _run_from_population(self, population: Population,
+                             num_generations: Optional[int] = None) -> Dict:
+        """
+        Tiến hóa từ quần thể cho trước rồi hậu xử lý và tính kết quả cuối cùng
+        
+        Args:
+            population: Quần thể ban đầu
+            num_generations: Số thế hệ (None: self.generations)
+            
+        Returns:
+            Dictionary chứa kết quả tối ưu
+        """
+        self.best_fitness = 0
+        self.best_solution = None
+        self.stagnation_count = 0
+        if self._start_time is None:
+            self._begin_run(self._callback)
+        
+        # Pool process (tùy chọn) dùng chung ma trận khoảng cách qua shared memory
+        executor, shm = self._start_worker_pool() if self.n_workers and self.n_workers > 1 else (None, None)
+        evolve = self._evolve_nsga2 if self.nsga2 else self._evolve
+        try:
+            population, objectives = evolve(population, executor=executor,
+                                            num_generations=num_generations)
+        finally:
+            self.history.close()
+            self._callback = None
+            if executor is not None:
+                executor.shutdown()
+                shm.close()
+                shm.unlink()
+        elapsed_s = time.time() - self._start_time
+        self._start_time = None
+        
+        # Cân bằng hiệu quả sau khi tối ưu (giảm số lần để tập trung vào khoảng cách)
+        balanced_solution = self.best_solution
+        for _ in range(3):  # Giảm xuống 3 lần để tập trung vào khoảng cách
+            balanced_solution = self._balance_efficiency_post_optimization(balanced_solution)
+        
+        # Validation: đảm bảo không có xe nào quá ít điểm
+        balanced_solution = self._validate_minimum_load(balanced_solution)
+        
+        # Tính toán kết quả cuối cùng với giải pháp đã cân bằng hiệu quả
+        result = self._calculate_final_results(balanced_solution)
+        result['stop_reason'] = self.stop_reason or 'generations'
+        result['elapsed_s'] = elapsed_s
+        if self.nsga2:
+            result['pareto_front'] = self._pareto_front(population, objectives)
+        
+        return result
+    
+    def _begin_run(self, callback: Optional[Callable[[Dict], Optional[bool]]] = None):
+        """Đặt lại trạng thái dừng, lịch sử và bắt đầu tính ngân sách thời gian cho một lần chạy"""
+        # Lịch sử mới cho mỗi lần chạy (cùng chính sách, file stream ghi lại từ đầu) để đường
+        # cong fitness và sự kiện giải pháp không lẫn với lần chạy trước
+        self.history.close()
+        self.history = self.history.empty_copy(stream=True)
+        self._callback = callback
+        self._start_time = time.time()
+        self._cancel_requested = False
+        self.stop_reason = None
+    
+    def _notify_improvement(self, generation: int) -> bool:
+        """
+        Gọi callback với giải pháp tốt nhất mới
+        
+        Returns:
+            True nếu callback yêu cầu dừng
+        """
+        if self._callback is None:
+            return False
+        routes = self._split_routes(self.best_solution)
+        event = {
+            'event': 'improvement',
+            'generation': generation,
+            'fitness': float(self.best_fitness),
+            'total_distance': float(sum(self.route_distance(route, vehicle)
+                                        for vehicle, route in enumerate(routes))),
+            'routes': self._decode_solution(self.best_solution),
+            'elapsed_s': time.time() - self._start_time,
+        }
+        return bool(self._callback(event))
+    
+    def _check_stop(self, generation: int) -> Optional[str]:
+        """
+        Kiểm tra các tiêu chí dừng (ngoài số thế hệ) sau mỗi thế hệ
+        
+        Returns:
+            Lý do dừng ('cancelled', 'target_fitness', 'time_limit', 'stagnation') hoặc None
+        """
+        if self._cancel_requested:
+            return 'cancelled'
+        if self.target_fitness is not None and self.best_fitness >= self.target_fitness:
+            return 'target_fitness'
+        if self.time_limit_s is not None and time.time() - self._start_time >= self.time_limit_s:
+            return 'time_limit'
+        if self.stagnation_count >= self.stagnation_threshold:
+            return 'stagnation'
+        return None
+    
+    def _evolve(self, population: Population,
+                objectives: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                executor: Optional[ProcessPoolExecutor] = None,
+                start_generation: int = 0,
+                num_generations: Optional[int] = None) -> Tuple[Population, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Vòng lặp tiến hóa chính; có thể gọi nhiều lần liên tiếp để chạy theo từng đoạn
         
-        for generation in range(self.generations):
-            # Đánh giá fitness cho từng giải pháp với adaptive fitness
-            fitness_scores = [self.adaptive_fitness(solution, generation) for solution in population]
+        Giải pháp tốt nhất được lưu vào self.best_solution / self.best_fitness.
+        
+        Args:
+            population: Quần thể hiện tại
+            objectives: Hai mục tiêu (distance, balance) của quần thể (None: tính lại)
+            executor: Pool process để chia shard đánh giá và tạo thế hệ con (None: tuần tự)
+            start_generation: Thế hệ bắt đầu
+            num_generations: Số thế hệ chạy (None: đến hết self.generations)
+            
+        Returns:
+            Tuple (population, objectives) sau thế hệ cuối cùng
+        """
+        self.stop_reason = None
+        self.generations_run = 0
+        if self._start_time is None:
+            self._start_time = time.time()
+        
+        # Đánh giá fitness quần thể ban đầu; thế hệ con được đánh giá ngay khi tạo
+        if objectives is None:
+            objectives = self._run_sharded(executor, 'evaluate_population', *population)
+        
+        end_generation = (self.generations if num_generations is None
+                          else start_generation + num_generations)
+        
+        for generation in range(start_generation, end_generation):
+            previous_best_fitness = self.best_fitness
+            
+            # Fitness thích ứng từ hai mục tiêu của từng giải pháp
+            fitness_scores = self._combine_fitness(*objectives, generation)
             
             # Tìm giải pháp tốt nhất
             best_idx = np.argmax(fitness_scores)
             current_best_fitness = fitness_scores[best_idx]
             
-            if current_best_fitness > best_fitness:
-                best_fitness = current_best_fitness
-                best_solution = population[best_idx].copy()
+            if current_best_fitness > self.best_fitness:
+                self.best_fitness = current_best_fitness
+                self.best_solution = (population[0][best_idx].copy(), population[1][best_idx].copy())
                 self.stagnation_count = 0  # Reset stagnation counter
             else:
                 self.stagnation_count += 1  # Tăng stagnation counter
             
             # Áp dụng local search cho giải pháp tốt nhất mỗi 100 thế hệ
             if generation % 100 == 0 and generation > 0:
-                improved_solution = self.local_search_2opt(best_solution)
+                improved_solution = self.local_search_2opt(self.best_solution)
                 improved_fitness = self.adaptive_fitness(improved_solution, generation)
-                if improved_fitness > best_fitness:
-                    best_fitness = improved_fitness
-                    best_solution = improved_solution
-                    print(f"Local search cải thiện tại thế hệ {generation}: {improved_fitness:.6f}")
+                if improved_fitness > self.best_fitness:
+                    self.best_fitness = improved_fitness
+                    self.best_solution = improved_solution
+                    if self.verbose:
+                        print(f"Local search cải thiện tại thế hệ {generation}: {improved_fitness:.6f}")
             
             # Áp dụng balance load local search mỗi 200 thế hệ
             if generation % 200 == 0 and generation > 0:
-                balanced_solution = self.balance_load_local_search(best_solution)
+                balanced_solution = self.balance_load_local_search(self.best_solution)
                 balanced_fitness = self.adaptive_fitness(balanced_solution, generation)
-                if balanced_fitness > best_fitness:
-                    best_fitness = balanced_fitness
-                    best_solution = balanced_solution
-                    print(f"Balance load cải thiện tại thế hệ {generation}: {balanced_fitness:.6f}")
-            
-            # Lưu lịch sử
-            self.fitness_history.append(best_fitness)
-            self.best_routes_history.append(best_solution.copy())
-            
-            # Kiểm tra dừng sớm nếu không có cải thiện
-            if self.stagnation_count >= self.stagnation_threshold:
-                print(f"\nDung som tai the he {generation}: Khong co cai thien trong {self.stagnation_threshold} the he")
+                if balanced_fitness > self.best_fitness:
+                    self.best_fitness = balanced_fitness
+                    self.best_solution = balanced_solution
+                    if self.verbose:
+                        print(f"Balance load cải thiện tại thế hệ {generation}: {balanced_fitness:.6f}")
+                
+                # Local search giữa các route cho giải pháp tốt nhất
+                inter_route_solution = self.inter_route_local_search(self.best_solution)
+                inter_route_fitness = self.adaptive_fitness(inter_route_solution, generation)
+                if inter_route_fitness > self.best_fitness:
+                    self.best_fitness = inter_route_fitness
+                    self.best_solution = inter_route_solution
+                    if self.verbose:
+                        print(f"Inter-route local search cải thiện tại thế hệ {generation}: {inter_route_fitness:.6f}")
+            
+            self.generations_run += 1
+            if self._finish_generation(generation, previous_best_fitness):
                 break
             
-            # In tiến độ với thông tin chi tiết
-            if generation % 50 == 0:
-                # Tính các mục tiêu riêng biệt để hiển thị
-                distance_fit, efficiency_balance_fit = self.multi_objective_fitness(best_solution)
-                print(f"The he {generation}: Fitness = {best_fitness:.6f} "
-                      f"(Distance: {distance_fit:.6f}, Efficiency Balance: {efficiency_balance_fit:.6f})")
+            # Elitism: giữ lại các giải pháp tốt nhất
+            elite_indices = self._elite_indices(fitness_scores, self.elite_size)
             
-            # Tạo quần thể mới
-            new_population = []
+            # Chọn cha mẹ (mảng chỉ số, một lượt cho cả thế hệ) và seed riêng cho từng con
+            num_offspring = self.population_size - len(elite_indices)
+            parents = self._tournament_indices(fitness_scores, 2 * num_offspring)
+            parents1, parents2 = parents[:num_offspring], parents[num_offspring:]
+            child_seeds = self.rng.integers(0, 2 ** 63 - 1, size=num_offspring, dtype=np.int64)
             
-            # Elitism: giữ lại các giải pháp tốt nhất
-            elite_indices = np.argsort(fitness_scores)[-self.elite_size:]
-            for idx in elite_indices:
-                new_population.append(population[idx].copy())
-            
-            # Tạo các giải pháp mới bằng crossover và mutation
-            while len(new_population) < self.population_size:
-                # Chọn cha mẹ
-                parent1 = self._tournament_selection_multi(population, fitness_scores)
-                parent2 = self._tournament_selection_multi(population, fitness_scores)
+            # Tạo các giải pháp mới bằng crossover và mutation (chia shard cho các worker)
+            tours, sizes = population
+            offspring = self._run_sharded(
+                executor, '_breed_offspring',
+                tours[parents1], sizes[parents1], tours[parents2], sizes[parents2], child_seeds)
+            
+            population = (np.concatenate([tours[elite_indices], offspring[0]]),
+                          np.concatenate([sizes[elite_indices], offspring[1]]))
+            objectives = (np.concatenate([objectives[0][elite_indices], offspring[2]]),
+                          np.concatenate([objectives[1][elite_indices], offspring[3]]))
+        
+        return population, objectives
+    
+    def _finish_generation(self, generation: int, previous_best_fitness: float) -> bool:
+        """
+        Cuối mỗi thế hệ: lưu lịch sử, báo callback, kiểm tra tiêu chí dừng và in tiến độ
+        
+        Returns:
+            True nếu phải dừng (self.stop_reason cho biết lý do)
+        """
+        # Lưu lịch sử
+        self.history.record(generation, self.best_fitness, self.best_solution)
+        
+        # Báo giải pháp tốt hơn cho callback (trả về True: dừng)
+        if self.best_fitness > previous_best_fitness and self._notify_improvement(generation):
+            self._cancel_requested = True
+        
+        # Kiểm tra dừng sớm: hủy, đạt mục tiêu, hết giờ hoặc không có cải thiện
+        self.stop_reason = self._check_stop(generation)
+        if self.stop_reason is not None:
+            if self.verbose:
+                messages = {
+                    'cancelled': "Da huy theo yeu cau",
+                    'target_fitness': f"Dat fitness muc tieu {self.target_fitness}",
+                    'time_limit': f"Het thoi gian {self.time_limit_s} giay",
+                    'stagnation': f"Khong co cai thien trong {self.stagnation_threshold} the he",
+                }
+                print(f"\nDung som tai the he {generation}: {messages[self.stop_reason]}")
+            return True
+        
+        # In tiến độ với thông tin chi tiết
+        if self.verbose and generation % 50 == 0:
+            # Tính các mục tiêu riêng biệt để hiển thị
+            distance_fit, efficiency_balance_fit = self.multi_objective_fitness(self.best_solution)
+            print(f"The he {generation}: Fitness = {self.best_fitness:.6f} "
+                  f"(Distance: {distance_fit:.6f}, Efficiency Balance: {efficiency_balance_fit:.6f})")
+        return False
+    
+    def _evolve_nsga2(self, population: Population,
+                      objectives: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                      executor: Optional[ProcessPoolExecutor] = None,
+                      start_generation: int = 0,
+                      num_generations: Optional[int] = None) -> Tuple[Population, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Vòng lặp NSGA-II: crowded tournament chọn cha mẹ, thế hệ con tạo như _evolve,
+        chọn lọc môi trường (μ+λ) theo hạng front rồi crowding distance
+        
+        Giải pháp có fitness tổng hợp (_combine_fitness) cao nhất vẫn được theo dõi trong
+        self.best_solution cho lịch sử, callback và tiêu chí dừng.
+        
+        Args:
+            population: Quần thể hiện tại
+            objectives: Hai mục tiêu (distance, balance) của quần thể (None: tính lại)
+            executor: Pool process để chia shard đánh giá và tạo thế hệ con (None: tuần tự)
+            start_generation: Thế hệ bắt đầu
+            num_generations: Số thế hệ chạy (None: đến hết self.generations)
+            
+        Returns:
+            Tuple (population, objectives) sau thế hệ cuối cùng
+        """
+        self.stop_reason = None
+        if self._start_time is None:
+            self._start_time = time.time()
+        
+        if objectives is None:
+            objectives = self._run_sharded(executor, 'evaluate_population', *population)
+        order = crowded_order(np.column_stack(objectives))
+        
+        end_generation = (self.generations if num_generations is None
+                          else start_generation + num_generations)
+        
+        for generation in range(start_generation, end_generation):
+            previous_best_fitness = self.best_fitness
+            
+            # 2-opt cho các giải pháp trên front Pareto mỗi 100 thế hệ
+            if generation % 100 == 0 and generation > 0:
+                front = pareto_front_indices(np.column_stack(objectives))
+                improved = self._stack_population([
+                    self.local_search_2opt((population[0][i], population[1][i])) for i in front])
+                population[0][front], population[1][front] = improved
+                improved_objectives = self.evaluate_population(*improved)
+                objectives[0][front], objectives[1][front] = improved_objectives
+                order = crowded_order(np.column_stack(objectives))
+            
+            fitness_scores = self._combine_fitness(*objectives, generation)
+            best_idx = np.argmax(fitness_scores)
+            if fitness_scores[best_idx] > self.best_fitness:
+                self.best_fitness = fitness_scores[best_idx]
+                self.best_solution = (population[0][best_idx].copy(), population[1][best_idx].copy())
+                self.stagnation_count = 0
+            else:
+                self.stagnation_count += 1
+            
+            if self._finish_generation(generation, previous_best_fitness):
+                break
+            
+            # Crowded tournament chọn cha mẹ cho toàn bộ thế hệ con
+            num_offspring = self.population_size
+            parents = crowded_tournament(order, 2 * num_offspring, self.rng)
+            parents1, parents2 = parents[:num_offspring], parents[num_offspring:]
+            child_seeds = self.rng.integers(0, 2 ** 63 - 1, size=num_offspring, dtype=np.int64)
+            
+            tours, sizes = population
+            offspring = self._run_sharded(
+                executor, '_breed_offspring',
+                tours[parents1], sizes[parents1], tours[parents2], sizes[parents2], child_seeds)
+            
+            # Chọn lọc môi trường trên cha mẹ + con
+            combined_tours = np.concatenate([tours, offspring[0]])
+            combined_sizes = np.concatenate([sizes, offspring[1]])
+            combined_objectives = (np.concatenate([objectives[0], offspring[2]]),
+                                   np.concatenate([objectives[1], offspring[3]]))
+            survivors = crowded_order(np.column_stack(combined_objectives))[:self.population_size]
+            
+            population = (combined_tours[survivors], combined_sizes[survivors])
+            objectives = (combined_objectives[0][survivors], combined_objectives[1][survivors])
+            order = np.arange(len(survivors))  # survivors đã theo thứ tự crowded-comparison
+        
+        return population, objectives
+    
+    def _pareto_front(self, population: Population,
+                      objectives: Tuple[np.ndarray, np.ndarray]) -> List[Dict]:
+        """
+        Front Pareto (khoảng cách, cân bằng tải) của quần thể sau khi 2-opt từng giải pháp trên front
+        
+        Args:
+            population: Quần thể cuối cùng
+            objectives: Hai mục tiêu của quần thể
+            
+        Returns:
+            Danh sách giải pháp không bị trội, sắp theo distance_fitness giảm dần; mỗi phần tử
+            gồm 'total_distance', 'distance_cv', 'distance_fitness', 'efficiency_balance_fitness',
+            'vehicle_distances' và 'routes'
+        """
+        front = pareto_front_indices(np.column_stack(objectives))
+        
+        # 2-opt trong từng route chỉ rút ngắn route nên thêm các biến thể đã cải thiện vào ứng viên
+        candidates = [(population[0][i], population[1][i]) for i in front]
+        candidates += [self.local_search_2opt(solution) for solution in candidates]
+        tours, sizes = self._stack_population(candidates)
+        candidate_objectives = np.column_stack(self.evaluate_population(tours, sizes))
+        vehicle_distances = self.population_route_distances(tours, sizes)
+        
+        pareto_front = []
+        for i in pareto_front_indices(candidate_objectives):
+            distances = vehicle_distances[i]
+            mean_distance = distances.mean()
+            pareto_front.append({
+                'total_distance': float(distances.sum()),
+                'distance_cv': float(distances.std() / mean_distance) if mean_distance > 0 else 0.0,
+                'distance_fitness': float(candidate_objectives[i, 0]),
+                'efficiency_balance_fitness': float(candidate_objectives[i, 1]),
+                'vehicle_distances': distances.tolist(),
+                'routes': self._decode_solution((tours[i], sizes[i])),
+            })
+        return pareto_front
+    
+    def _start_worker_pool(self) -> Tuple[ProcessPoolExecutor, shared_memory.SharedMemory]:
+        """
+        Khởi tạo pool process; ma trận khoảng cách được đặt trong shared memory
+        thay vì pickle theo từng task
+        
+        Returns:
+            Tuple (executor, shared memory block)
+        """
+        worker_args, shm = self._share_distance_matrix()
+        executor = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            initializer=_init_worker,
+            initargs=worker_args)
+        return executor, shm
+    
+    def _share_distance_matrix(self) -> Tuple[tuple, shared_memory.SharedMemory]:
+        """
+        Đặt ma trận khoảng cách vào shared memory cho các process con
+        
+        Returns:
+            Tuple (tham số cho _init_worker, shared memory block do process gọi quản lý)
+        """
+        matrix = self.distance_matrix
+        shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=shm.buf)[:] = matrix
+        
+        # Bản sao nhẹ của solver (không kèm ma trận và lịch sử) gửi một lần cho mỗi process
+        worker_solver = copy.copy(self)
+        worker_solver.distance_matrix = None
+        worker_solver.history = self.history.empty_copy()
+        worker_solver._travel_time_tensor = None
+        worker_solver._callback = None
+        
+        return (worker_solver, shm.name, matrix.shape, matrix.dtype.str), shm
+    
+    def _run_sharded(self, executor: Optional[ProcessPoolExecutor], method_name: str,
+                     *arrays: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Gọi một phương thức trên các shard (theo trục 0) của các mảng đầu vào
+        
+        Args:
+            executor: Pool process (None: gọi trực tiếp trong process hiện tại)
+            method_name: Tên phương thức của solver trả về tuple các mảng
+            arrays: Các mảng đầu vào có cùng số hàng
+            
+        Returns:
+            Tuple các mảng kết quả đã ghép theo thứ tự ban đầu
+        """
+        if executor is None:
+            return getattr(self, method_name)(*arrays)
+        
+        chunks = [chunk for chunk in np.array_split(np.arange(len(arrays[0])), self.n_workers)
+                  if len(chunk)]
+        futures = [executor.submit(_worker_call, method_name, *(array[chunk] for array in arrays))
+                   for chunk in chunks]
+        results = [future.result() for future in futures]
+        
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+    
+    def _breed_offspring(self, parent1_tours: np.ndarray, parent1_sizes: np.ndarray,
+                         parent2_tours: np.ndarray, parent2_sizes: np.ndarray,
+                         child_seeds: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Tạo và đánh giá thế hệ con bằng crossover và mutation
+        
+        Mỗi con dùng Generator riêng khởi tạo từ seed của nó (qua SeedSequence nên
+        các luồng độc lập), nên kết quả không phụ thuộc vào số worker hay cách chia shard.
+        
+        Args:
+            parent1_tours, parent1_sizes: Cha của từng con
+            parent2_tours, parent2_sizes: Mẹ của từng con
+            child_seeds: Seed ngẫu nhiên cho từng con
+            
+        Returns:
+            Tuple (tours, sizes, distance_fitness, efficiency_balance_fitness)
+        """
+        if len(child_seeds) == 0:
+            empty = np.empty(0)
+            return parent1_tours, parent1_sizes, empty, empty
+        
+        parent_rng = self.rng
+        children = []
+        try:
+            for i, seed in enumerate(child_seeds):
+                self.rng = np.random.default_rng(int(seed))
                 
                 # Tạo con
-                child = self._multi_vehicle_crossover(parent1, parent2)
+                child = self._multi_vehicle_crossover((parent1_tours[i], parent1_sizes[i]),
+                                                      (parent2_tours[i], parent2_sizes[i]))
                 
                 # Đột biến
-                if random.random() < self.mutation_rate:
+                if self.rng.random() < self.mutation_rate:
                     child = self._multi_vehicle_mutation(child)
                 
-                new_population.append(child)
+                # Chia lại giant tour tối ưu cho các xe
+                if self.split is not None:
+                    child = self.split_tour(child[0])
+                
+                # Memetic: cải thiện con bằng 2-opt
+                if self.memetic_rate > 0 and self.rng.random() < self.memetic_rate:
+                    child = self.local_search_2opt(child)
+                
+                children.append(child)
+        finally:
+            self.rng = parent_rng
+        
+        tours, sizes = self._stack_population(children)
+        return (tours, sizes) + self.evaluate_population(tours, sizes)
+    
+    def _tournament_selection_multi(self, population: Population, 
+                                   fitness_scores: np.ndarray, k: int = 3) -> Solution:
+        """Tournament selection cho Multi-Vehicle TSP (trả về view, các toán tử không sửa tại chỗ)"""
+        winner_idx = self._tournament_indices(fitness_scores, 1, k)[0]
+        return population[0][winner_idx], population[1][winner_idx]
+    
+    def _tournament_indices(self, fitness_scores: np.ndarray, num_winners: int, k: int = 3) -> np.ndarray:
+        """
+        Chỉ số cá thể thắng của num_winners tournament kích thước k
+        
+        Mọi ứng viên (num_winners, k) được rút trong một lần gọi Generator (có hoàn lại)
+        và người thắng của từng tournament lấy bằng một argmax theo trục.
+        
+        Args:
+            fitness_scores: Fitness của quần thể
+            num_winners: Số tournament
+            k: Kích thước tournament
             
-            population = new_population
+        Returns:
+            Mảng (num_winners,) chỉ số cá thể thắng
+        """
+        candidates = self.rng.integers(0, len(fitness_scores), size=(num_winners, k))
+        winners = np.argmax(fitness_scores[candidates], axis=1)
+        return candidates[np.arange(num_winners), winners]
+    
+    def _elite_indices(self, fitness_scores: np.ndarray, count: int) -> np.ndarray:
+        """Chỉ số count cá thể có fitness cao nhất (không sắp xếp, np.argpartition O(N))"""
+        count = min(count, len(fitness_scores))
+        if count <= 0:
+            return np.empty(0, dtype=np.intp)
+        return np.argpartition(fitness_scores, len(fitness_scores) - count)[-count:]
+    
+    def _copy_solution(self, solution: Solution) -> Solution:
+        """Sao chép giải pháp đã mã hóa (hai mảng liên tục, chi phí memcpy)"""
+        return solution[0].copy(), solution[1].copy()
+    
+    def _multi_vehicle_crossover(self, parent1: Solution, 
+                                parent2: Solution) -> Solution:
+        """Crossover cho Multi-Vehicle TSP - gọi toán tử đã chọn trong CROSSOVER_OPERATORS"""
+        return CROSSOVER_OPERATORS[self.crossover](self, parent1, parent2)
+    
+    def _random_split_crossover(self, parent1: Solution, parent2: Solution) -> Solution:
+        """Crossover phân chia ngẫu nhiên (phiên bản gốc): con không kế thừa cấu trúc cha mẹ"""
+        # Cả hai cha mẹ đều là hoán vị của toàn bộ địa điểm:
+        # phân chia ngẫu nhiên các địa điểm rồi chia đều cho các xe
+        tour = self.rng.permutation(parent1[0])
         
-        # Cân bằng hiệu quả sau khi tối ưu (giảm số lần để tập trung vào khoảng cách)
-        balanced_solution = best_solution
-        for _ in range(3):  # Giảm xuống 3 lần để tập trung vào khoảng cách
-            balanced_solution = self._balance_efficiency_post_optimization(balanced_solution)
+        return tour, self._even_sizes(len(tour))
+    
+    def _order_crossover(self, parent1: Solution, parent2: Solution) -> Solution:
+        """
+        Order crossover (OX) trên giant tour: giữ một đoạn của cha, điền phần còn lại
+        theo thứ tự xuất hiện trong mẹ; con kế thừa cách chia xe của cha
+        """
+        tour1, sizes1 = parent1
+        tour2 = parent2[0]
+        num_points = len(tour1)
+        if num_points < 2:
+            return self._copy_solution(parent1)
         
-        # Validation: đảm bảo không có xe nào quá ít điểm
-        balanced_solution = self._validate_minimum_load(balanced_solution)
+        start, end = np.sort(self.rng.choice(num_points + 1, 2, replace=False))
         
-        # Tính toán kết quả cuối cùng với giải pháp đã cân bằng hiệu quả
-        result = self._calculate_final_results(balanced_solution)
+        used = np.zeros(len(self.locations), dtype=bool)
+        used[tour1[start:end]] = True
+        rotated = np.roll(tour2, -end)
         
-        return result
+        child = np.empty_like(tour1)
+        child[start:end] = tour1[start:end]
+        child[np.r_[end:num_points, 0:start]] = rotated[~used[rotated]]
+        
+        return child, sizes1.copy()
+    
+    def _best_route_crossover(self, parent1: Solution, parent2: Solution) -> Solution:
+        """
+        Crossover giữ route tốt: giữ một số route ngắn nhất (km/điểm) của một cha mẹ,
+        lấy các route của cha mẹ kia sau khi bỏ các điểm đã có, chèn rẻ nhất các điểm còn lại
+        """
+        if self.rng.random() < 0.5:
+            parent1, parent2 = parent2, parent1
+        
+        routes1 = self._split_routes(parent1)
+        distances1 = self.population_route_distances(parent1[0][None, :], parent1[1][None, :])[0]
+        per_point = distances1 / np.maximum(parent1[1], 1)
+        
+        # Giữ ngẫu nhiên 1..num_vehicles-1 route tốt nhất của cha
+        num_keep = int(self.rng.integers(1, max(1, self.num_vehicles - 1) + 1))
+        kept = [routes1[r].tolist() for r in np.argsort(per_point, kind='stable')[:num_keep]]
+        
+        placed = np.zeros(len(self.locations), dtype=bool)
+        for route in kept:
+            placed[route] = True
+        
+        # Các route của mẹ (bỏ điểm đã có), ưu tiên route còn nhiều điểm nhất
+        remainders = [route[~placed[route]] for route in self._split_routes(parent2)]
+        order = sorted(range(len(remainders)), key=lambda r: -len(remainders[r]))
+        num_take = self.num_vehicles - len(kept)
+        child_routes = kept + [remainders[r].tolist() for r in order[:num_take]]
+        
+        # Chèn rẻ nhất các điểm của những route mẹ không được lấy
+        leftovers = [node for r in order[num_take:] for node in remainders[r].tolist()]
+        self._insert_cheapest(child_routes, leftovers)
+        
+        return self._solution_from_routes(child_routes)
+    
+    def _insert_cheapest(self, routes: List[List[int]], nodes: List[int]) -> List[List[int]]:
+        """
+        Chèn từng điểm vào vị trí làm tăng khoảng cách ít nhất (sửa tại chỗ)
+        
+        Args:
+            routes: Danh sách route (chỉ số điểm)
+            nodes: Các điểm cần chèn
+            
+        Returns:
+            Danh sách route sau khi chèn
+        """
+        dist = self.distance_matrix
+        capacity_model = self.capacity_model
+        if capacity_model is not None:
+            # Tải và quãng đường từng route, cập nhật O(1) sau mỗi lần chèn
+            loads = [float(capacity_model.demands[route].sum()) for route in routes]
+            lengths = [self.route_distance(route, r) if route else 0.0 for r, route in enumerate(routes)]
+        route_of = {point: r for r, route in enumerate(routes) for point in route}
+        for node in nodes:
+            # Chỉ thử các route chứa láng giềng gần của điểm (và route rỗng); không có thì thử mọi route
+            near_routes = {route_of[c] for c in self.neighbor_lists[node].tolist() if c in route_of}
+            candidate_routes = ([r for r, route in enumerate(routes) if not route or r in near_routes]
+                                if near_routes else range(len(routes)))
+            best_route, best_pos, best_delta, best_length_delta = 0, 0, np.inf, 0.0
+            for r in candidate_routes:
+                route = routes[r]
+                if not route:
+                    empty_delta = 0.0 if capacity_model is None else capacity_model.route_penalty(
+                        r, 0.0, capacity_model.demands[node], 1)
+                    if best_delta > empty_delta:
+                        best_route, best_pos, best_delta, best_length_delta = r, 0, empty_delta, 0.0
+                    continue
+                idx = np.asarray(route, dtype=np.intp)
+                nxt = np.roll(idx, -1)
+                length_deltas = dist[idx, node] + dist[node, nxt] - dist[idx, nxt]
+                deltas = length_deltas
+                if self.time_window_model is not None:
+                    # Thay đổi phạt time window khi chèn, O(1) mỗi vị trí
+                    _, origin = self._depot_legs(idx[0], idx[-1], r)
+                    schedule = self.time_window_model.route_schedule(
+                        idx, dist, None if origin is None else int(origin))
+                    deltas = deltas + schedule.insertion_penalties(node) - schedule.penalty()
+                if capacity_model is not None:
+                    # Thay đổi phạt tải trọng / thời lượng khi chèn (tải route mới tính O(1))
+                    deltas = deltas + capacity_model.penalties(
+                        lengths[r] + length_deltas, loads[r] + capacity_model.demands[node], len(route) + 1,
+                        r) - capacity_model.route_penalty(r, lengths[r], loads[r], len(route))
+                pos = int(np.argmin(deltas))
+                if deltas[pos] < best_delta:
+                    best_route, best_pos, best_delta = r, pos + 1, deltas[pos]
+                    best_length_delta = length_deltas[pos]
+            routes[best_route].insert(best_pos, node)
+            route_of[node] = best_route
+            if capacity_model is not None:
+                loads[best_route] += capacity_model.demands[node]
+                lengths[best_route] += best_length_delta
+        return routes
+    
+    def _eax_lite_crossover(self, parent1: Solution, parent2: Solution) -> Solution:
+        """
+        Edge assembly crossover rút gọn (EAX-1AB) trên giant tour
+        
+        Tạo một AB-cycle xen kẽ cạnh của cha (A) và mẹ (B), thay các cạnh A trong
+        AB-cycle bằng cạnh B, sau đó nối các subtour bằng phép nối 2-opt rẻ nhất
+        (ứng viên từ neighbor lists). Con kế thừa cách chia xe của cha.
+        """
+        tour_a, sizes = parent1
+        tour_b = parent2[0]
+        num_points = len(tour_a)
+        if num_points < 4:
+            return self._copy_solution(parent1)
+        
+        adjacency_a = _cycle_adjacency(tour_a)
+        adjacency_b = _cycle_adjacency(tour_b)
+        
+        # Cạnh riêng của từng cha mẹ (bỏ cạnh chung)
+        only_a = {node: [v for v in nbrs if v not in adjacency_b[node]] for node, nbrs in adjacency_a.items()}
+        only_b = {node: [v for v in nbrs if v not in adjacency_a[node]] for node, nbrs in adjacency_b.items()}
+        starts = [node for node in tour_a.tolist() if only_a[node]]
+        if not starts:
+            return self._copy_solution(parent1)
+        
+        ab_cycle = _find_ab_cycle(starts[self.rng.integers(len(starts))], only_a, only_b, self.rng)
+        
+        # Con = A - cạnh A trong AB-cycle + cạnh B trong AB-cycle
+        child_adjacency = {node: list(nbrs) for node, nbrs in adjacency_a.items()}
+        for (u, v), from_a in ab_cycle:
+            if from_a:
+                child_adjacency[u].remove(v)
+                child_adjacency[v].remove(u)
+            else:
+                child_adjacency[u].append(v)
+                child_adjacency[v].append(u)
+        
+        tour = self._merge_subtours(child_adjacency, int(tour_a[0]))
+        return np.array(tour, dtype=self.index_dtype), sizes.copy()
+    
+    def _merge_subtours(self, adjacency: Dict[int, List[int]], start: int) -> List[int]:
+        """
+        Nối các subtour của đồ thị bậc 2 thành một chu trình Hamilton
+        
+        Lặp: lấy subtour nhỏ nhất, bỏ một cạnh (u, u2) của nó và một cạnh (v, v2) của
+        subtour khác, nối lại theo cách rẻ nhất; v lấy từ neighbor lists của u.
+        
+        Returns:
+            Thứ tự các điểm của chu trình, bắt đầu tại start
+        """
+        dist = self.distance_matrix
+        while True:
+            subtours = _extract_cycles(adjacency)
+            if len(subtours) == 1:
+                break
+            
+            smallest = min(subtours, key=len)
+            member = set(smallest)
+            candidates = [(u, v) for u in smallest for v in self.neighbor_lists[u].tolist()
+                          if v not in member]
+            if not candidates:
+                other = next(node for node in adjacency if node not in member)
+                candidates = [(smallest[0], other)]
+            
+            best = None
+            for u, v in candidates:
+                for u2 in set(adjacency[u]):
+                    for v2 in set(adjacency[v]):
+                        removed = dist[u, u2] + dist[v, v2]
+                        for a, b, c, d in ((u, v, u2, v2), (u, v2, u2, v)):
+                            cost = dist[a, b] + dist[c, d] - removed
+                            if best is None or cost < best[0]:
+                                best = (cost, u, u2, v, v2, (a, b), (c, d))
+            
+            _, u, u2, v, v2, edge1, edge2 = best
+            adjacency[u].remove(u2)
+            adjacency[u2].remove(u)
+            adjacency[v].remove(v2)
+            adjacency[v2].remove(v)
+            for a, b in (edge1, edge2):
+                adjacency[a].append(b)
+                adjacency[b].append(a)
+        
+        # Duyệt chu trình bắt đầu từ start
+        tour = [start]
+        prev, current = start, adjacency[start][0]
+        while current != start:
+            tour.append(current)
+            nbrs = adjacency[current]
+            prev, current = current, (nbrs[1] if nbrs[0] == prev else nbrs[0])
+        return tour
+    
+    def _multi_vehicle_mutation(self, solution: Solution) -> Solution:
+        """Mutation cho Multi-Vehicle TSP - gọi toán tử đã chọn trong MUTATION_OPERATORS"""
+        return MUTATION_OPERATORS[self.mutation](self, solution)
+    
+    def _swap_mutation(self, solution: Solution) -> Solution:
+        """Hoán đổi ngẫu nhiên hai điểm trong mỗi route"""
+        tour, sizes = self._copy_solution(solution)
+        
+        # Hoán đổi ngẫu nhiên hai địa điểm trong cùng một route: vị trí của mọi route
+        # được rút trong một lần gọi Generator rồi hoán đổi vector hóa
+        lengths = sizes.astype(np.intp)
+        starts = np.cumsum(lengths) - lengths
+        draws = self.rng.random((len(lengths), 2))
+        first = (draws[:, 0] * lengths).astype(np.intp)
+        second = (first + 1 + (draws[:, 1] * (lengths - 1)).astype(np.intp)) % np.maximum(lengths, 1)
+        swappable = lengths > 1
+        i = starts[swappable] + first[swappable]
+        j = starts[swappable] + second[swappable]
+        tour[np.concatenate([i, j])] = tour[np.concatenate([j, i])]
+        
+        return tour, sizes
+    
+    def _neighbor_mutation(self, solution: Solution) -> Solution:
+        """
+        Mutation theo láng giềng: với mỗi xe chọn ngẫu nhiên một điểm a trong route và một
+        láng giềng gần c của a (từ neighbor lists); cùng route thì đảo đoạn để a và c kề
+        nhau (nước đi 2-opt), khác route thì chuyển a đến ngay sau c
+        
+        Args:
+            solution: Giải pháp đã mã hóa
+            
+        Returns:
+            Giải pháp mới
+        """
+        tour, sizes = self._copy_solution(solution)
+        if self.neighbor_lists.shape[1] == 0:
+            return tour, sizes
+        draws = self.rng.random((self.num_vehicles, 2))
+        
+        for vehicle in range(self.num_vehicles):
+            ends = np.cumsum(sizes)
+            size = int(sizes[vehicle])
+            if size == 0:
+                continue
+            i = int(ends[vehicle] - size + int(draws[vehicle, 0] * size))
+            a = int(tour[i])
+            c = int(self.neighbor_lists[a, int(draws[vehicle, 1] * self.neighbor_lists.shape[1])])
+            j = int(np.flatnonzero(tour == c)[0])
+            c_vehicle = int(np.searchsorted(ends, j, side='right'))
+            
+            if c_vehicle == vehicle:
+                # Đảo đoạn giữa a và c để hai điểm đứng cạnh nhau
+                if i < j:
+                    tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1].copy()
+                else:
+                    tour[j:i] = tour[j:i][::-1].copy()
+            elif size > 1:
+                # Chuyển a sang route của c, ngay sau c
+                moved = np.delete(tour, i)
+                insert_at = j + 1 if j < i else j
+                tour = np.insert(moved, insert_at, a).astype(tour.dtype)
+                sizes[vehicle] -= 1
+                sizes[c_vehicle] += 1
+        
+        return tour, sizes
     
-    def _tournament_selection_multi(self, population: List[List[List[str]]], 
-                                   fitness_scores: List[float], k: int = 3) -> List[List[str]]:
-        """Tournament selection cho Multi-Vehicle TSP"""
-        tournament_indices = random.sample(range(len(population)), k)
-        tournament_fitness = [fitness_scores[i] for i in tournament_indices]
-        winner_idx = tournament_indices[np.argmax(tournament_fitness)]
-        return population[winner_idx].copy()
-    
-    def _multi_vehicle_crossover(self, parent1: List[List[str]], 
-                                parent2: List[List[str]]) -> List[List[str]]:
-        """Crossover cho Multi-Vehicle TSP - phân chia ngẫu nhiên theo tọa độ"""
-        child = []
-        
-        # Lấy tất cả địa điểm từ cả hai cha mẹ
-        all_locations = set()
-        for route in parent1 + parent2:
-            all_locations.update(route)
-        
-        # Phân chia ngẫu nhiên các địa điểm cho các xe
-        all_locations = list(all_locations)
-        random.shuffle(all_locations)
-        
-        # Phân chia đều cho các xe
-        points_per_vehicle = len(all_locations) // self.num_vehicles
-        remaining_points = len(all_locations) % self.num_vehicles
-        
-        start_idx = 0
-        for vehicle_id in range(self.num_vehicles):
-            # Tính số điểm cho xe này
-            vehicle_points = points_per_vehicle
-            if vehicle_id < remaining_points:
-                vehicle_points += 1
-            
-            # Lấy điểm cho xe này
-            end_idx = start_idx + vehicle_points
-            vehicle_locations = all_locations[start_idx:end_idx]
-            
-            child.append(vehicle_locations)
-            start_idx = end_idx
-        
-        return child
-    
-    def _multi_vehicle_mutation(self, solution: List[List[str]]) -> List[List[str]]:
-        """Mutation cho Multi-Vehicle TSP"""
-        mutated = [route.copy() for route in solution]
-        
-        # Hoán đổi ngẫu nhiên hai địa điểm trong cùng một route
-        for route in mutated:
-            if len(route) > 1:
-                i, j = random.sample(range(len(route)), 2)
-                route[i], route[j] = route[j], route[i]
-        
-        return mutated
-    
-    def _calculate_final_results(self, best_solution: List[List[str]]) -> Dict:
+    def _calculate_final_results(self, best_solution: Solution) -> Dict:
         """Tính toán kết quả cuối cùng"""
+        # Chỉ giải mã sang tên địa điểm ở bước cuối
+        best_solution = self._decode_solution(best_solution)
+        
         results = {
             'best_solution': best_solution,
             'vehicle_routes': [],
             'total_distance': 0,
             'total_time': 0,
             'fitness_history': self.fitness_history,
+            'fitness_history_generations': self.history.curve()[0],
             'time_window_violations': 0
         }
+        if self.capacity_model is not None:
+            results['constraint_violations'] = 0
+        if self.uses_depots:
+            results['depots'] = dict(self.depots)
+            results['open_routes'] = self.open_routes
         
         for vehicle_id, route in enumerate(best_solution):
             if not route:
@@ -779,30 +2316,46 @@ class MultiVehicleTSPGA:
             route_info = {
                 'vehicle_id': vehicle_id,
                 'route': route,
-                'distance': self.route_distance(route),
+                'distance': self.route_distance(route, vehicle_id),
                 'time': 0
             }
             
-            # Tính thời gian và kiểm tra time windows
-            current_time = 480  # Bắt đầu lúc 8h sáng
-            violations = 0
+            # Tính thời gian và kiểm tra time windows (thời gian từng chặng theo khung giờ xuất phát)
+            idx = self._to_indices(route)
+            first_arrival = self.start_time
+            depot = None
+            if len(self.depot_indices) > 0:
+                _, depot = self._depot_legs(idx[0], idx[-1], vehicle_id)
+                depot = int(depot)
+                route_info['depot'] = self.depot_names[depot - len(self.locations)]
+                first_arrival = self.start_time + self.travel_time(depot, idx[0], self.start_time)
+            arrivals = self.travel_time_model.route_arrivals(
+                idx, self.distance_matrix, first_arrival, service_time=self.service_time)
+            violations = sum(not self.is_time_window_valid(location, arrival_time)
+                             for location, arrival_time in zip(route, arrivals))
+            current_time = arrivals[-1]
+            if depot is not None and not self.open_routes:
+                # Quay về kho sau khi phục vụ điểm cuối
+                departure = current_time + self.service_time
+                current_time = departure + self.travel_time(idx[-1], depot, departure)
             
-            for i, location in enumerate(route):
-                # Kiểm tra time window
-                if not self.is_time_window_valid(location, current_time):
-                    violations += 1
-                
-                # Cập nhật thời gian
-                if i < len(route) - 1:
-                    next_location = route[i + 1]
-                    coord1 = self.coords[location]
-                    coord2 = self.coords[next_location]
-                    travel_time = self.calculate_travel_time(*coord1, *coord2, current_time)
-                    current_time += travel_time + 15  # Thêm 15 phút để giao hàng
-                
-                # Không cần ghi nhận quận/huyện nữa
+            route_info['time'] = float(current_time - self.start_time)  # Thời gian làm việc (phút)
             
-            route_info['time'] = current_time - 480  # Thời gian làm việc (phút)
+            # Chế độ VRPTW: lịch trình có chờ đợi theo time window
+            if self.time_window_model is not None:
+                duration, lateness, waiting, violations = self.time_window_model.route_summary(
+                    idx, self.distance_matrix, depot)
+                route_info['time'] = duration
+                route_info['lateness'] = lateness
+                route_info['waiting_time'] = waiting
+            
+            # Ràng buộc tải trọng / thời lượng của xe
+            if self.capacity_model is not None:
+                summary = self.capacity_model.route_summary(
+                    vehicle_id, self._to_indices(route), route_info['distance'])
+                route_info.update(summary)
+                results['constraint_violations'] += int(
+                    summary['capacity_excess'] > 0 or summary['duration_excess'] > 0)
             
             results['vehicle_routes'].append(route_info)
             results['total_distance'] += route_info['distance']
@@ -811,6 +2364,154 @@ class MultiVehicleTSPGA:
         
         return results
 
+# Registry toán tử crossover: tên -> hàm (solver, parent1, parent2) -> Solution.
+# Có thể đăng ký thêm toán tử trước khi khởi tạo MultiVehicleTSPGA.
+CROSSOVER_OPERATORS = {
+    'random_split': MultiVehicleTSPGA._random_split_crossover,
+    'ox': MultiVehicleTSPGA._order_crossover,
+    'best_route': MultiVehicleTSPGA._best_route_crossover,
+    'eax_lite': MultiVehicleTSPGA._eax_lite_crossover,
+}
+
+# Registry toán tử mutation: tên -> hàm (solver, solution) -> Solution
+MUTATION_OPERATORS = {
+    'swap': MultiVehicleTSPGA._swap_mutation,
+    'neighbor': MultiVehicleTSPGA._neighbor_mutation,
+}
+
+# Registry heuristic xây dựng quần thể ban đầu: tên -> hàm (solver, rng hoặc None) -> Solution
+CONSTRUCTION_HEURISTICS = {
+    'clustered': MultiVehicleTSPGA._construct_clustered,
+    'savings': MultiVehicleTSPGA._construct_savings,
+    'sweep': MultiVehicleTSPGA._construct_sweep,
+    'nearest_neighbor': MultiVehicleTSPGA._construct_nearest_neighbor,
+    'regret': MultiVehicleTSPGA._construct_regret,
+}
+
+
+def _cycle_adjacency(tour: np.ndarray) -> Dict[int, List[int]]:
+    """Danh sách kề (2 láng giềng mỗi điểm) của chu trình khép kín theo tour"""
+    nodes = tour.tolist()
+    return {node: [nodes[i - 1], nodes[(i + 1) % len(nodes)]] for i, node in enumerate(nodes)}
+
+
+def _find_ab_cycle(start: int, only_a: Dict[int, List[int]],
+                   only_b: Dict[int, List[int]],
+                   rng: np.random.Generator) -> List[Tuple[Tuple[int, int], bool]]:
+    """
+    Tìm một AB-cycle: chu trình xen kẽ cạnh riêng của A và cạnh riêng của B (chọn cạnh tiếp theo bằng rng)
+    
+    Returns:
+        Danh sách ((u, v), from_a) theo thứ tự của chu trình
+    """
+    only_a = {node: list(nbrs) for node, nbrs in only_a.items()}
+    only_b = {node: list(nbrs) for node, nbrs in only_b.items()}
+    path = [start]
+    edges = []
+    seen = {start: [0]}
+    
+    while True:
+        current = path[-1]
+        from_a = len(edges) % 2 == 0
+        available = (only_a if from_a else only_b)[current]
+        nxt = available[rng.integers(len(available))]
+        available.remove(nxt)
+        (only_a if from_a else only_b)[nxt].remove(current)
+        edges.append(((current, nxt), from_a))
+        path.append(nxt)
+        
+        # Đóng chu trình khi quay lại một điểm với số cạnh chẵn (xen kẽ hợp lệ)
+        end = len(path) - 1
+        for p in seen.get(nxt, []):
+            if (end - p) % 2 == 0:
+                return edges[p:]
+        seen.setdefault(nxt, []).append(end)
+
+
+def _extract_cycles(adjacency: Dict[int, List[int]]) -> List[List[int]]:
+    """Tách đồ thị bậc 2 thành các chu trình"""
+    visited = set()
+    cycles = []
+    for start in adjacency:
+        if start in visited:
+            continue
+        cycle = [start]
+        visited.add(start)
+        prev, current = start, adjacency[start][0]
+        while current != start:
+            cycle.append(current)
+            visited.add(current)
+            nbrs = adjacency[current]
+            prev, current = current, (nbrs[1] if nbrs[0] == prev else nbrs[0])
+        cycles.append(cycle)
+    return cycles
+
+
+# Trạng thái của mỗi worker process (khởi tạo một lần qua _init_worker)
+_worker_solver = None
+_worker_shm = None
+
+
+def _init_worker(solver: MultiVehicleTSPGA, shm_name: str, shape: Tuple[int, int],
+                 dtype: str) -> MultiVehicleTSPGA:
+    """Khởi tạo worker: gắn ma trận khoảng cách từ shared memory vào solver"""
+    global _worker_solver, _worker_shm
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    solver.distance_matrix = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_shm.buf)
+    _worker_solver = solver
+    return solver
+
+
+def _worker_call(method_name: str, *args):
+    """Gọi phương thức của solver trong worker process"""
+    return getattr(_worker_solver, method_name)(*args)
+
+
+def replan(coords: Dict[str, Tuple[float, float]], previous_routes: List[List[str]],
+           added: Optional[Dict[str, Tuple[float, float]]] = None,
+           removed: Optional[List[str]] = None,
+           generations: int = 200,
+           callback: Optional[Callable[[Dict], Optional[bool]]] = None,
+           **ga_kwargs) -> Dict:
+    """
+    Lập lại kế hoạch khi tập điểm thay đổi: áp dụng thay đổi lên coords rồi tối ưu
+    lại từ giải pháp trước (MultiVehicleTSPGA.reoptimize)
+    
+    Args:
+        coords: Tọa độ các điểm của kế hoạch trước
+        previous_routes: Routes của giải pháp trước
+        added: Tọa độ các điểm mới
+        removed: Tên các điểm bị hủy
+        generations: Số thế hệ tối đa của lần tối ưu lại
+        callback: Hàm gọi mỗi khi giải pháp tốt nhất được cải thiện (xem run_multi_vehicle_ga)
+        ga_kwargs: Tham số cho MultiVehicleTSPGA (mặc định num_vehicles = số route cũ)
+        
+    Returns:
+        Dictionary kết quả như run_multi_vehicle_ga
+    """
+    removed = set(removed or [])
+    new_coords = {loc: coord for loc, coord in coords.items() if loc not in removed}
+    new_coords.update(added or {})
+    ga_kwargs.setdefault('num_vehicles', len(previous_routes))
+    
+    ga = MultiVehicleTSPGA(new_coords, **ga_kwargs)
+    return ga.reoptimize(previous_routes, generations=generations, callback=callback)
+
+
+def load_previous_routes(results_file: str) -> List[List[str]]:
+    """
+    Đọc routes của giải pháp trước từ file kết quả JSON (dùng cho reoptimize)
+    
+    Args:
+        results_file: Đường dẫn file kết quả (vd. results/multi_vehicle_tsp_results.json)
+        
+    Returns:
+        Danh sách routes, mỗi route là danh sách tên điểm
+    """
+    with open(results_file, 'r', encoding='utf-8') as f:
+        return json.load(f)['best_solution']
+
+
 def load_data(csv_file: str) -> Dict[str, Tuple[float, float]]:
     """
     Tải dữ liệu từ file CSV